@@ -204,6 +204,11 @@ def create_app(config_name='default'):
     return app
 
 
+def get_redis_client():
+    """Retourne le client Redis partagé (None si indisponible)"""
+    return _redis_client
+
+
 def blacklist_token(jti, expires_in_seconds=3600):
     """
     Ajoute un token à la blacklist.
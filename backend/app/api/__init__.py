@@ -5,7 +5,7 @@ from flask import Blueprint
 
 api_bp = Blueprint('api', __name__)
 
-from app.api.routes import health, auth, candidate, qcm, content, stats, pages, schools, notifications, certificates, rankings
+from app.api.routes import health, auth, candidate, qcm, content, stats, pages, schools, notifications, certificates, rankings, exports
 
 api_bp.register_blueprint(health.bp)
 api_bp.register_blueprint(auth.bp, url_prefix='/auth')
@@ -18,3 +18,4 @@ api_bp.register_blueprint(schools.bp, url_prefix='/schools')
 api_bp.register_blueprint(notifications.bp, url_prefix='/notifications')
 api_bp.register_blueprint(certificates.bp, url_prefix='/certificates')
 api_bp.register_blueprint(rankings.bp, url_prefix='/rankings')
+api_bp.register_blueprint(exports.bp, url_prefix='/exports')
@@ -6,6 +6,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User
 from app.services.candidate_service import CandidateService
+from app.services.candidate_export_service import CandidateExportService, XLSX_MIMETYPE
 from app.utils import error_response, candidate_required, admin_required
 
 bp = Blueprint('candidate', __name__)
@@ -229,19 +230,8 @@ def admin_list_candidates():
     page = request.args.get('page', 1, type=int)
     per_page = min(request.args.get('per_page', 20, type=int), 100)
     
-    filters = {
-        'status': request.args.get('status'),
-        'region': request.args.get('region'),
-        'gender': request.args.get('gender'),
-        'class_level': request.args.get('class_level'),
-        'search': request.args.get('search'),
-        'score_min': request.args.get('score_min', type=float),
-        'score_max': request.args.get('score_max', type=float),
-        'has_score': request.args.get('has_score')
-    }
-    
-    # Retirer les filtres vides
-    filters = {k: v for k, v in filters.items() if v is not None}
+    # Filtres vides ou invalides ignorés
+    filters = CandidateService.parse_filters(request.args)
     
     result, error = CandidateService.get_all(filters, page, per_page)
     
@@ -368,116 +358,41 @@ def admin_export_candidates():
     Query params: 
         - format: json|csv|xlsx (défaut: json)
         - Mêmes filtres que /admin/list
+    
+    CSV et XLSX sont envoyés en flux, sans limite de nombre de candidats.
     """
-    import io
-    import csv
-    from flask import Response
+    from flask import Response, stream_with_context
     
     export_format = request.args.get('format', 'json').lower()
     
-    filters = {
-        'status': request.args.get('status'),
-        'region': request.args.get('region'),
-        'gender': request.args.get('gender'),
-        'search': request.args.get('search')
-    }
-    filters = {k: v for k, v in filters.items() if v is not None}
-    
-    # Récupérer tous sans pagination
-    result, error = CandidateService.get_all(filters, page=1, per_page=10000)
-    
-    if error:
-        return error_response(error, 400)
-    
-    candidates = result['candidates']
+    filters = CandidateService.parse_filters(request.args)
     
     if export_format == 'json':
+        # Récupérer tous sans pagination
+        result, error = CandidateService.get_all(filters, page=1, per_page=10000)
+        
+        if error:
+            return error_response(error, 400)
+        
         return jsonify({
             'success': True,
-            'data': candidates,
+            'data': result['candidates'],
             'total': result['total']
         })
     
-    # Colonnes pour CSV/Excel
-    headers = [
-        'ID', 'Prénom', 'Nom', 'Email', 'Genre', 'Date de naissance',
-        'Téléphone', 'Ville', 'Région', 'École', 'Classe',
-        'Moyenne T1', 'Moyenne T2', 'Moyenne T3', 'Moyenne Générale',
-        'Moyenne Maths', 'Moyenne Sciences',
-        'Statut', 'Score QCM', 'Date inscription'
-    ]
-    
-    def extract_row(c):
-        return [
-            c.get('id', ''),
-            c.get('first_name', ''),
-            c.get('last_name', ''),
-            c.get('email', ''),
-            c.get('gender', ''),
-            c.get('birth_date', ''),
-            c.get('phone', ''),
-            c.get('city', ''),
-            c.get('region', ''),
-            c.get('school_name', ''),
-            c.get('class_level', ''),
-            c.get('academic', {}).get('average_t1', '') if isinstance(c.get('academic'), dict) else c.get('average_t1', ''),
-            c.get('academic', {}).get('average_t2', '') if isinstance(c.get('academic'), dict) else c.get('average_t2', ''),
-            c.get('academic', {}).get('average_t3', '') if isinstance(c.get('academic'), dict) else c.get('average_t3', ''),
-            c.get('academic', {}).get('average_score', '') if isinstance(c.get('academic'), dict) else c.get('average_score', ''),
-            c.get('academic', {}).get('math_average', '') if isinstance(c.get('academic'), dict) else c.get('math_average', ''),
-            c.get('academic', {}).get('science_average', '') if isinstance(c.get('academic'), dict) else c.get('science_average', ''),
-            c.get('status', ''),
-            c.get('qcm_score', ''),
-            c.get('created_at', '')
-        ]
-    
+    # Le contexte reste actif pendant l'envoi (session SQLAlchemy du curseur)
     if export_format == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(headers)
-        for c in candidates:
-            writer.writerow(extract_row(c))
-        
         return Response(
-            output.getvalue(),
+            stream_with_context(CandidateExportService.iter_csv(filters)),
             mimetype='text/csv',
             headers={'Content-Disposition': 'attachment; filename=candidats_olympiades.csv'}
         )
     
     elif export_format == 'xlsx':
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Candidats"
-        
-        # Style en-têtes
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="206080", end_color="206080", fill_type="solid")
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Données
-        for row_idx, c in enumerate(candidates, 2):
-            for col_idx, val in enumerate(extract_row(c), 1):
-                ws.cell(row=row_idx, column=col_idx, value=val if val != '' else None)
-        
-        # Largeurs auto
-        for col in ws.columns:
-            max_length = max(len(str(cell.value or '')) for cell in col)
-            ws.column_dimensions[col[0].column_letter].width = min(max_length + 2, 30)
-        
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
         return Response(
-            output.getvalue(),
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            stream_with_context(CandidateExportService.iter_xlsx(filters)),
+            mimetype=XLSX_MIMETYPE,
             headers={'Content-Disposition': 'attachment; filename=candidats_olympiades.xlsx'}
         )
+
+    return error_response("Format non supporté. Utilisez json, csv ou xlsx.", 400)
@@ -4,7 +4,9 @@ Routes de gestion du contenu
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.content_service import ContentService
+from app.services.reference_data_service import ReferenceDataService, REFERENCE_CACHE_SECONDS
 from app.utils import error_response, admin_required
+from app.utils.http_cache import cached_response
 
 bp = Blueprint('content', __name__)
 
@@ -16,30 +18,30 @@ bp = Blueprint('content', __name__)
 @bp.route('/news', methods=['GET'])
 def get_public_news():
     """Récupère les actualités publiées"""
-    result, _ = ContentService.get_public_news()
-    return jsonify({'success': True, 'data': result})
+    entry = ReferenceDataService.get('news')
+    return cached_response(entry.payload, REFERENCE_CACHE_SECONDS, entry.last_modified)
 
 
 @bp.route('/faq', methods=['GET'])
 @bp.route('/faqs', methods=['GET'])
 def get_public_faqs():
     """Récupère les FAQ actives"""
-    result, _ = ContentService.get_public_faqs()
-    return jsonify({'success': True, 'data': result})
+    entry = ReferenceDataService.get('faqs')
+    return cached_response(entry.payload, REFERENCE_CACHE_SECONDS, entry.last_modified)
 
 
 @bp.route('/timeline', methods=['GET'])
 def get_timeline():
     """Récupère la timeline"""
-    result, _ = ContentService.get_timeline()
-    return jsonify({'success': True, 'data': result})
+    entry = ReferenceDataService.get('timeline')
+    return cached_response(entry.payload, REFERENCE_CACHE_SECONDS, entry.last_modified)
 
 
 @bp.route('/partners', methods=['GET'])
 def get_public_partners():
     """Récupère les partenaires actifs"""
-    result, _ = ContentService.get_public_partners()
-    return jsonify({'success': True, 'data': result})
+    entry = ReferenceDataService.get('partners')
+    return cached_response(entry.payload, REFERENCE_CACHE_SECONDS, entry.last_modified)
 
 
 # ============================================
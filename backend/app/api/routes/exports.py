@@ -0,0 +1,95 @@
+"""
+Routes des exports en arrière-plan (admin)
+"""
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from app.services.export_job_service import ExportJobService
+from app.services.file_service import FileService
+from app.utils import error_response, admin_required
+
+bp = Blueprint('exports', __name__)
+
+
+@bp.before_request
+def start_recovery():
+    """Reprise des jobs interrompus, quel que soit l'endpoint appelé en premier"""
+    ExportJobService.ensure_recovery()
+
+
+@bp.route('', methods=['POST'])
+@admin_required()
+def create_export():
+    """
+    Lance un export en arrière-plan
+    
+    Body:
+        - kind: candidates|questions
+        - format: csv|xlsx (défaut: xlsx)
+        - filters: dict (candidats : mêmes filtres que la liste admin)
+    """
+    admin_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    
+    result, error = ExportJobService.create(
+        data.get('kind'),
+        str(data.get('format', 'xlsx')).lower(),
+        data.get('filters'),
+        admin_id
+    )
+    
+    if error:
+        return error_response(error, 400)
+    
+    return jsonify({
+        'success': True,
+        'message': "Export lancé",
+        'data': result
+    }), 202
+
+
+@bp.route('', methods=['GET'])
+@admin_required()
+def list_exports():
+    """Liste les derniers exports"""
+    result, error = ExportJobService.get_jobs()
+    return jsonify({'success': True, 'data': result})
+
+
+@bp.route('/<int:job_id>', methods=['GET'])
+@admin_required()
+def get_export(job_id):
+    """État et progression d'un export"""
+    result, error = ExportJobService.get_job(job_id)
+    
+    if error:
+        return error_response(error, 404)
+    
+    return jsonify({'success': True, 'data': result})
+
+
+@bp.route('/<int:job_id>/download', methods=['GET'])
+@admin_required()
+def download_export(job_id):
+    """Télécharge le fichier d'un export terminé"""
+    result, error = ExportJobService.get_download(job_id)
+    
+    if error:
+        status_code = 404 if error == "Export non trouvé" else 409
+        return error_response(error, status_code)
+    
+    file_path, file_name = result
+    return FileService.send_export(file_path, file_name)
+
+
+@bp.route('/<int:job_id>', methods=['DELETE'])
+@admin_required()
+def delete_export(job_id):
+    """Supprime un export et son fichier"""
+    admin_id = int(get_jwt_identity())
+    result, error = ExportJobService.delete_job(job_id, admin_id)
+    
+    if error:
+        status_code = 404 if error == "Export non trouvé" else 409
+        return error_response(error, status_code)
+    
+    return jsonify({'success': True, 'data': result})
@@ -5,7 +5,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import StaticPage, AuditLog
+from app.services.reference_data_service import ReferenceDataService, REFERENCE_CACHE_SECONDS
 from app.utils import error_response, admin_required
+from app.utils.http_cache import cached_response
 
 bp = Blueprint('pages', __name__)
 
@@ -18,15 +20,12 @@ def get_page(slug):
     Args:
         slug: Identifiant de la page (mentions-legales, cgu, confidentialite)
     """
-    page = StaticPage.query.filter_by(slug=slug).first()
+    entry = ReferenceDataService.get('pages', slug)
     
-    if not page:
+    if not entry:
         return error_response("Page non trouvée", 404)
     
-    return jsonify({
-        'success': True,
-        'data': page.to_dict()
-    })
+    return cached_response(entry.payload, REFERENCE_CACHE_SECONDS, entry.last_modified)
 
 
 @bp.route('/<slug>', methods=['PUT'])
@@ -74,6 +73,7 @@ def update_page(slug):
     )
     
     db.session.commit()
+    ReferenceDataService.invalidate('pages')
     
     return jsonify({
         'success': True,
@@ -3,9 +3,12 @@ Routes du QCM
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
 from app.models import Question
-from app.services.qcm_service import QCMService, QCMAdminService
+from app.services.qcm_service import QCMService, QCMAdminService, QUESTION_EXPORT_HEADERS
+from app.services.attempt_answer_service import AttemptAnswerService
+from app.services.exam_form_service import ExamFormService
+from app.services.item_analysis_service import ItemAnalysisService
+from app.services.question_import_service import QuestionImportService
 from app.utils import error_response, candidate_required, admin_required
 
 bp = Blueprint('qcm', __name__)
@@ -90,6 +93,33 @@ def save_answer():
     return jsonify({'success': True, 'data': result})
 
 
+@bp.route('/answers/batch', methods=['POST'])
+@candidate_required()
+def save_answers_batch():
+    """
+    Sauvegarde un lot de réponses (écritures regroupées côté client)
+    
+    Body:
+        - attempt_id: int
+        - changes: array of {question_index: int, answer_index: int (-1 à 3), client_ts: int (ms)}
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    
+    attempt_id = data.get('attempt_id')
+    changes = data.get('changes')
+    
+    if attempt_id is None or not changes:
+        return error_response("attempt_id et changes requis", 400)
+    
+    result, error = QCMService.save_answers_batch(user_id, attempt_id, changes)
+    
+    if error:
+        return error_response(error, 400)
+    
+    return jsonify({'success': True, 'data': result})
+
+
 @bp.route('/submit', methods=['POST'])
 @candidate_required()
 def submit_qcm():
@@ -256,6 +286,127 @@ def admin_qcm_stats():
     return jsonify({'success': True, 'data': result})
 
 
+@bp.route('/admin/answer-stats', methods=['GET'])
+@admin_required()
+def admin_answer_stats():
+    """
+    Répartition des réponses et délai moyen par question (table attempt_answers)
+    
+    Query params:
+        - question_ids: liste d'IDs séparés par virgule (optionnel)
+    """
+    raw_ids = request.args.get('question_ids', '')
+    try:
+        question_ids = [int(qid) for qid in raw_ids.split(',') if qid.strip()]
+    except ValueError:
+        return error_response("question_ids invalide", 400)
+    
+    stats = AttemptAnswerService.get_answer_distribution(question_ids or None)
+    return jsonify({'success': True, 'data': {str(qid): entry for qid, entry in stats.items()}})
+
+
+@bp.route('/admin/forms', methods=['GET'])
+@admin_required()
+def admin_get_forms():
+    """Liste les cahiers pré-générés actifs"""
+    result, error = ExamFormService.get_forms()
+    return jsonify({'success': True, 'data': result})
+
+
+@bp.route('/admin/forms/generate', methods=['POST'])
+@admin_required()
+def admin_generate_forms():
+    """
+    Pré-génère les cahiers de questions (remplace les cahiers actifs)
+    
+    Body:
+        - count: int (défaut: 20)
+        - balance: bool (défaut: true) - équilibrer la difficulté attendue
+    """
+    admin_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    
+    try:
+        count = int(data.get('count', 20))
+    except (TypeError, ValueError):
+        return error_response("count invalide", 400)
+    
+    result, error = ExamFormService.generate_forms(count, admin_id, bool(data.get('balance', True)))
+    
+    if error:
+        return error_response(error, 400)
+    
+    return jsonify({
+        'success': True,
+        'message': f"{count} cahier(s) généré(s)",
+        'data': result
+    }), 201
+
+
+# ============================================
+# ANALYSE DES ITEMS
+# ============================================
+
+@bp.route('/admin/item-analysis/run', methods=['POST'])
+@admin_required()
+def admin_run_item_analysis():
+    """Recalcule difficulté, discrimination, distracteurs et KR-20 sur les tentatives terminées"""
+    admin_id = int(get_jwt_identity())
+    result, error = ItemAnalysisService.run(admin_id)
+    
+    if error:
+        return error_response(error, 400)
+    
+    return jsonify({
+        'success': True,
+        'message': f"{result['items_count']} question(s) analysée(s)",
+        'data': result
+    }), 201
+
+
+@bp.route('/admin/item-analysis', methods=['GET'])
+@admin_required()
+def admin_get_item_analysis():
+    """
+    Résultats de la dernière analyse des items
+    
+    Query params:
+        - format: json|csv (défaut: json)
+    """
+    import io
+    import csv
+    from flask import Response
+    
+    export_format = request.args.get('format', 'json').lower()
+    result, error = ItemAnalysisService.get_report()
+    
+    if export_format == 'json':
+        return jsonify({'success': True, 'data': result})
+    
+    if export_format == 'csv':
+        headers = ['ID', 'Texte', 'Catégorie', 'Difficulté', 'Réponse correcte', 'Réponses',
+                   'Bonnes réponses', 'p-value', 'Point-bisériale',
+                   'Option A', 'Option B', 'Option C', 'Option D', 'Sans réponse']
+        
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(headers)
+        for q in result['questions']:
+            writer.writerow([
+                q['question_id'], q['text'], q['category'], q['difficulty'], q['correct_answer'],
+                q['responses'], q['correct'], q['p_value'], q['point_biserial'],
+                *q['option_counts'], q['unanswered']
+            ])
+        
+        return Response(
+            output.getvalue(),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=analyse_items.csv'}
+        )
+    
+    return error_response("Format non supporté. Utilisez json ou csv.", 400)
+
+
 # ============================================
 # ANTI-TRICHE
 # ============================================
@@ -271,8 +422,6 @@ def report_cheat_event():
         - event_type: string (tab_switch, fullscreen_exit, copy_attempt, right_click)
         - timestamp: string ISO (optionnel)
     """
-    from app.models import QCMAttempt
-    
     user_id = int(get_jwt_identity())
     data = request.get_json() or {}
     
@@ -286,34 +435,15 @@ def report_cheat_event():
     if event_type not in valid_events:
         return error_response(f"event_type invalide. Valeurs acceptées: {', '.join(valid_events)}", 400)
     
-    # Vérifier que la tentative appartient au candidat
-    from app.models import User
-    user = User.query.get(user_id)
-    if not user or not user.candidate:
-        return error_response("Candidat non trouvé", 404)
-    
-    attempt = QCMAttempt.query.filter_by(
-        id=attempt_id,
-        candidate_id=user.candidate.id
-    ).first()
-    
-    if not attempt:
-        return error_response("Tentative non trouvée", 404)
-    
-    if attempt.status != 'in_progress':
-        return error_response("La tentative n'est plus en cours", 400)
+    result, error = QCMService.report_cheat_event(user_id, attempt_id, event_type)
     
-    # Enregistrer l'événement
-    attempt.add_cheat_event(event_type)
-    db.session.commit()
+    if error:
+        status_code = 404 if error in ("Candidat non trouvé", "Tentative non trouvée") else 400
+        return error_response(error, status_code)
     
     return jsonify({
         'success': True,
-        'data': {
-            'tab_switches': attempt.tab_switches or 0,
-            'fullscreen_exits': attempt.fullscreen_exits or 0,
-            'is_flagged': attempt.is_flagged or False
-        }
+        'data': result
     })
 
 
@@ -337,10 +467,10 @@ def admin_export_questions():
     
     export_format = request.args.get('format', 'json').lower()
     
-    questions = Question.query.order_by(Question.id).all()
-    questions_data = [q.to_dict(include_answer=True) for q in questions]
-    
     if export_format == 'json':
+        questions = Question.query.order_by(Question.id).all()
+        questions_data = [q.to_dict(include_answer=True) for q in questions]
+        
         # Export JSON propre (pas d'enveloppe API, juste les données)
         output = json_lib.dumps(questions_data, indent=2, ensure_ascii=False)
         return Response(
@@ -350,48 +480,10 @@ def admin_export_questions():
         )
     
     elif export_format == 'xlsx':
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Questions"
-        
-        headers = ['ID', 'Texte', 'Option A', 'Option B', 'Option C', 'Option D',
-                    'Réponse correcte', 'Catégorie', 'Difficulté', 'Actif',
-                    'Fois affichée', 'Fois correcte', 'Taux réussite']
-        
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="206080", end_color="206080", fill_type="solid")
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
-        
-        for row_idx, q in enumerate(questions, 2):
-            ws.cell(row=row_idx, column=1, value=q.id)
-            ws.cell(row=row_idx, column=2, value=q.text)
-            ws.cell(row=row_idx, column=3, value=q.option_a)
-            ws.cell(row=row_idx, column=4, value=q.option_b)
-            ws.cell(row=row_idx, column=5, value=q.option_c)
-            ws.cell(row=row_idx, column=6, value=q.option_d)
-            ws.cell(row=row_idx, column=7, value=q.correct_answer)
-            ws.cell(row=row_idx, column=8, value=q.category)
-            ws.cell(row=row_idx, column=9, value=q.difficulty)
-            ws.cell(row=row_idx, column=10, value='Oui' if q.is_active else 'Non')
-            ws.cell(row=row_idx, column=11, value=q.times_shown)
-            ws.cell(row=row_idx, column=12, value=q.times_correct)
-            ws.cell(row=row_idx, column=13, value=q.success_rate)
-        
-        for col in ws.columns:
-            max_length = max(len(str(cell.value or '')) for cell in col)
-            ws.column_dimensions[col[0].column_letter].width = min(max_length + 2, 50)
+        from app.utils.spreadsheet import write_xlsx
         
         output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        write_xlsx(output, "Questions", QUESTION_EXPORT_HEADERS, QCMAdminService.iter_question_rows())
         
         return Response(
             output.getvalue(),
@@ -409,137 +501,33 @@ def admin_import_questions():
     Importe des questions en masse
     
     Body: multipart/form-data
-        - file: fichier JSON ou Excel (.json, .xlsx, .xls)
+        - file: fichier JSON, JSON lines, CSV ou Excel (.json, .jsonl, .csv, .xlsx)
+        - dry_run: "true" pour obtenir le rapport sans rien importer
     
     Format JSON attendu: array de {text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty}
-    Format Excel attendu: colonnes text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty
-    """
-    import json as json_lib
-    from app.models import Question, AuditLog
+    Format CSV/Excel attendu: colonnes text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty
     
+    Les questions dont le texte (normalisé) existe déjà dans la banque ou plus
+    haut dans le fichier sont ignorées et listées dans `duplicates`.
+    """
     admin_id = int(get_jwt_identity())
     
     if 'file' not in request.files:
         return error_response("Aucun fichier envoyé", 400)
     
-    file = request.files['file']
-    filename = file.filename.lower()
-    
-    questions_data = []
-    
-    try:
-        if filename.endswith('.json'):
-            content = file.read().decode('utf-8')
-            questions_data = json_lib.loads(content)
-            if not isinstance(questions_data, list):
-                return error_response("Le JSON doit contenir un tableau de questions", 400)
-        
-        elif filename.endswith(('.xlsx', '.xls')):
-            from openpyxl import load_workbook
-            import io
-            
-            wb = load_workbook(io.BytesIO(file.read()))
-            ws = wb.active
-            
-            # Lire les en-têtes de la première ligne
-            headers = [str(cell.value or '').strip().lower() for cell in ws[1]]
-            
-            required = ['text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'category', 'difficulty']
-            
-            # Mapper les colonnes
-            col_map = {}
-            for req in required:
-                for idx, h in enumerate(headers):
-                    if h == req or h.replace(' ', '_') == req:
-                        col_map[req] = idx
-                        break
-            
-            missing_cols = [r for r in required if r not in col_map]
-            if missing_cols:
-                return error_response(f"Colonnes manquantes dans Excel: {', '.join(missing_cols)}", 400)
-            
-            for row in ws.iter_rows(min_row=2, values_only=False):
-                values = [cell.value for cell in row]
-                if not values[col_map['text']]:
-                    continue
-                questions_data.append({
-                    req: values[col_map[req]] for req in required
-                })
-        
-        else:
-            return error_response("Format non supporté. Utilisez .json, .xlsx ou .xls", 400)
-        
-    except Exception as e:
-        return error_response(f"Erreur de lecture du fichier: {str(e)}", 400)
+    dry_run = str(request.form.get('dry_run', request.args.get('dry_run', ''))).lower() in ('1', 'true', 'yes')
+    result, error = QuestionImportService.import_file(request.files['file'], admin_id, dry_run)
     
-    # Valider et importer
-    imported = 0
-    errors = []
-    valid_categories = ['Logique', 'Algorithmique', 'Mathématiques', 'IA', 'Culture Générale']
-    valid_difficulties = ['easy', 'medium', 'hard']
+    if error:
+        return error_response(error, 400)
     
-    for idx, q in enumerate(questions_data, 1):
-        row_errors = []
-        
-        if not q.get('text'):
-            row_errors.append("Texte manquant")
-        if not q.get('option_a'):
-            row_errors.append("Option A manquante")
-        if not q.get('option_b'):
-            row_errors.append("Option B manquante")
-        if not q.get('option_c'):
-            row_errors.append("Option C manquante")
-        if not q.get('option_d'):
-            row_errors.append("Option D manquante")
-        
-        try:
-            correct = int(q.get('correct_answer', -1))
-            if correct not in (0, 1, 2, 3):
-                row_errors.append("correct_answer doit être 0, 1, 2 ou 3")
-        except (ValueError, TypeError):
-            row_errors.append("correct_answer invalide")
-            correct = -1
-        
-        category = str(q.get('category', '')).strip()
-        difficulty = str(q.get('difficulty', 'medium')).strip().lower()
-        
-        if difficulty not in valid_difficulties:
-            row_errors.append(f"Difficulté invalide: {difficulty}")
-        
-        if row_errors:
-            errors.append({'row': idx, 'errors': row_errors})
-            continue
-        
-        question = Question(
-            text=str(q['text']).strip(),
-            option_a=str(q['option_a']).strip(),
-            option_b=str(q['option_b']).strip(),
-            option_c=str(q['option_c']).strip(),
-            option_d=str(q['option_d']).strip(),
-            correct_answer=correct,
-            category=category if category else 'Logique',
-            difficulty=difficulty,
-            created_by=admin_id,
-            is_active=True
-        )
-        db.session.add(question)
-        imported += 1
-    
-    if imported > 0:
-        AuditLog.log(
-            user_id=admin_id,
-            action='import_questions',
-            entity_type='question',
-            details=f"{imported} questions importées"
-        )
-        db.session.commit()
+    if dry_run:
+        message = f"{result['valid']} question(s) importable(s) (simulation)"
+    else:
+        message = f"{result['imported']} question(s) importée(s)"
     
     return jsonify({
         'success': True,
-        'message': f"{imported} question(s) importée(s)",
-        'data': {
-            'imported': imported,
-            'errors': errors,
-            'total_in_file': len(questions_data)
-        }
+        'message': message,
+        'data': result
     })
@@ -1,21 +1,19 @@
 """
 Routes pour le classement anonymisé
 """
-import hashlib
 from flask import Blueprint, request, jsonify
-from app import db
-from app.models import Candidate
+from app.services.leaderboard_service import (
+    LeaderboardService,
+    RANKINGS_CACHE_SECONDS,
+    LEADERBOARD_PAGE_MAX
+)
+from app.services.leaderboard_aggregate_service import LeaderboardAggregateService
 from app.utils import error_response
+from app.utils.http_cache import cached_response
 
 bp = Blueprint('rankings', __name__)
 
 
-def generate_candidate_hash(candidate_id):
-    """Génère un hash court pour anonymiser le candidat"""
-    hash_input = f"olympiades_ia_benin_{candidate_id}_2026"
-    return hashlib.sha256(hash_input.encode()).hexdigest()[:6]
-
-
 @bp.route('', methods=['GET'])
 def get_rankings():
     """
@@ -27,57 +25,35 @@ def get_rankings():
     """
     region = request.args.get('region', '').strip() or None
     limit = request.args.get('limit', 100, type=int)
-    limit = min(limit, 500)  # Max 500
-    
-    # Query des candidats avec un score QCM
-    query = db.session.query(
-        Candidate.id,
-        Candidate.region,
-        Candidate.qcm_score,
-        Candidate.school_name
-    ).filter(
-        Candidate.qcm_score.isnot(None),
-        Candidate.status.in_(['validated', 'submitted'])
-    )
-    
-    if region:
-        query = query.filter(Candidate.region == region)
+    limit = max(1, min(limit, 500))  # Max 500
     
-    # Trier par score décroissant
-    query = query.order_by(Candidate.qcm_score.desc())
-    
-    results = query.limit(limit).all()
-    
-    # Construire le classement anonymisé
-    rankings = []
-    for rank, (cand_id, cand_region, score, school) in enumerate(results, 1):
-        rankings.append({
-            'rank': rank,
-            'region': cand_region or 'Non spécifié',
-            'score': round(score, 1) if score else 0,
-            'candidate_id_hash': generate_candidate_hash(cand_id),
-            'school': school[:30] + '...' if school and len(school) > 30 else school
-        })
+    # Réponse sérialisée en cache, invalidée à chaque nouveau score
+    payload = LeaderboardService.get_rankings(region, limit)
+    return cached_response(payload, RANKINGS_CACHE_SECONDS)
+
+
+@bp.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """
+    Classement complet paginé (rangs calculés en base, ex aequo au même rang)
     
-    # Statistiques globales
-    total_with_score = Candidate.query.filter(
-        Candidate.qcm_score.isnot(None)
-    ).count()
+    Query params:
+        - cursor: curseur renvoyé par la page précédente (optionnel)
+        - limit: taille de page (défaut: 50, max 200)
+        - region: filtrer par région (optionnel)
+    """
+    cursor = request.args.get('cursor', '').strip() or None
+    region = request.args.get('region', '').strip() or None
+    limit = request.args.get('limit', 50, type=int)
+    limit = max(1, min(limit, LEADERBOARD_PAGE_MAX))
     
-    avg_score = db.session.query(db.func.avg(Candidate.qcm_score)).filter(
-        Candidate.qcm_score.isnot(None)
-    ).scalar() or 0
+    data, error = LeaderboardService.get_page(cursor, limit, region)
+    if error:
+        return error_response(error, 400)
     
     return jsonify({
         'success': True,
-        'data': {
-            'rankings': rankings,
-            'stats': {
-                'total_candidates': total_with_score,
-                'average_score': round(avg_score, 1),
-                'filtered_region': region
-            }
-        }
+        'data': data
     })
 
 
@@ -94,32 +70,15 @@ def get_my_rank():
     if not candidate_hash or len(candidate_hash) != 6:
         return error_response("Hash invalide (6 caractères requis)", 400)
     
-    # Récupérer seulement les IDs et scores (léger)
-    candidates = db.session.query(
-        Candidate.id,
-        Candidate.qcm_score,
-        Candidate.region
-    ).filter(
-        Candidate.qcm_score.isnot(None),
-        Candidate.status.in_(['validated', 'submitted'])
-    ).order_by(Candidate.qcm_score.desc()).all()
-    
-    total = len(candidates)
+    # Hash indexé + classement matérialisé (pas de parcours des candidats)
+    data, error = LeaderboardService.get_rank(candidate_hash)
+    if error:
+        return error_response(error, 404)
     
-    for rank, (cand_id, score, region) in enumerate(candidates, 1):
-        if generate_candidate_hash(cand_id) == candidate_hash:
-            return jsonify({
-                'success': True,
-                'data': {
-                    'rank': rank,
-                    'total': total,
-                    'score': round(score, 1),
-                    'region': region or 'Non spécifié',
-                    'percentile': round((total - rank + 1) / total * 100, 1)
-                }
-            })
-    
-    return error_response("Candidat non trouvé", 404)
+    return jsonify({
+        'success': True,
+        'data': data
+    })
 
 
 @bp.route('/by-region', methods=['GET'])
@@ -127,26 +86,23 @@ def get_rankings_by_region():
     """
     Retourne les statistiques par région
     """
-    # Statistiques par région
-    region_stats = db.session.query(
-        Candidate.region,
-        db.func.count(Candidate.id).label('count'),
-        db.func.avg(Candidate.qcm_score).label('avg_score'),
-        db.func.max(Candidate.qcm_score).label('max_score')
-    ).filter(
-        Candidate.qcm_score.isnot(None)
-    ).group_by(Candidate.region).order_by(db.desc('avg_score')).all()
-    
-    regions = []
-    for region, count, avg, max_score in region_stats:
-        regions.append({
-            'region': region or 'Non spécifié',
-            'candidates_count': count,
-            'average_score': round(avg, 1) if avg else 0,
-            'best_score': round(max_score, 1) if max_score else 0
-        })
-    
-    return jsonify({
-        'success': True,
-        'data': regions
-    })
+    payload = LeaderboardAggregateService.get_cached('region')
+    return cached_response(payload, RANKINGS_CACHE_SECONDS)
+
+
+@bp.route('/by-school', methods=['GET'])
+def get_rankings_by_school():
+    """
+    Retourne les statistiques par école (écoles référencées)
+    """
+    payload = LeaderboardAggregateService.get_cached('school')
+    return cached_response(payload, RANKINGS_CACHE_SECONDS)
+
+
+@bp.route('/by-class-level', methods=['GET'])
+def get_rankings_by_class_level():
+    """
+    Retourne les statistiques par classe
+    """
+    payload = LeaderboardAggregateService.get_cached('class_level')
+    return cached_response(payload, RANKINGS_CACHE_SECONDS)
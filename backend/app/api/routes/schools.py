@@ -5,8 +5,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import AuditLog
+from app.services.reference_data_service import ReferenceDataService, REFERENCE_CACHE_SECONDS
 from app.services.school_service import SchoolService
 from app.utils import error_response, admin_required
+from app.utils.http_cache import cached_response
 
 bp = Blueprint('schools', __name__)
 
@@ -27,7 +29,7 @@ def search_schools():
     
     return jsonify({
         'success': True,
-        'data': [s.to_dict() for s in schools]
+        'data': schools
     })
 
 
@@ -36,12 +38,8 @@ def get_regions():
     """
     Liste des régions/départements disponibles - Public
     """
-    regions = SchoolService.get_regions()
-    
-    return jsonify({
-        'success': True,
-        'data': regions
-    })
+    entry = ReferenceDataService.get('regions')
+    return cached_response(entry.payload, REFERENCE_CACHE_SECONDS, entry.last_modified)
 
 
 @bp.route('/admin', methods=['GET'])
@@ -222,8 +220,9 @@ def import_schools():
         action='import_schools',
         entity_type='school',
         entity_id=0,
-        details=f"Importés: {result['imported']}, Erreurs: {len(result['errors'])}"
+        details=f"Importés: {result['imported']}, Doublons: {len(result['duplicates'])}, Erreurs: {len(result['errors'])}"
     )
+    db.session.commit()
     
     return jsonify({
         'success': True,
@@ -1,10 +1,10 @@
 """
 Routes de statistiques avancées
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from app.services.stats_service import StatsService
 from app.models import Candidate
-from app.utils import admin_required
+from app.utils import admin_required, error_response
 
 bp = Blueprint('stats', __name__)
 
@@ -49,6 +49,27 @@ def get_score_distribution():
     return jsonify({'success': True, 'data': result})
 
 
+@bp.route('/qcm/histogram', methods=['GET'])
+@admin_required()
+def get_score_histogram():
+    """
+    Histogramme des scores QCM avec quantiles
+    
+    Query params:
+        - bins: nombre de tranches (défaut: 10) ou bornes "0,50,80,100"
+        - region, gender, class_level: filtres (optionnels)
+    """
+    result, error = StatsService.get_score_histogram(
+        bins=request.args.get('bins'),
+        region=request.args.get('region', '').strip() or None,
+        gender=request.args.get('gender', '').strip() or None,
+        class_level=request.args.get('class_level', '').strip() or None
+    )
+    if error:
+        return error_response(error, 400)
+    return jsonify({'success': True, 'data': result})
+
+
 @bp.route('/qcm/performance', methods=['GET'])
 @admin_required()
 def get_qcm_performance():
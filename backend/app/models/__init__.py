@@ -11,6 +11,14 @@ from app.models.audit_log import AuditLog
 from app.models.static_page import StaticPage
 from app.models.school import School
 from app.models.notification import Notification
+from app.models.question_stat_delta import QuestionStatDelta
+from app.models.attempt_answer import AttemptAnswer
+from app.models.exam_form import ExamForm
+from app.models.leaderboard_aggregate import LeaderboardAggregate
+from app.models.stats_rollup import StatsRollup, StatsRollupDelta
+from app.models.item_analysis import ItemAnalysisRun, QuestionItemStat
+from app.models.export_job import ExportJob
+from app.models.cache_version import CacheVersion
 
 # Exporter tous les modèles
 __all__ = [
@@ -26,5 +34,15 @@ __all__ = [
     'AuditLog',
     'StaticPage',
     'School',
-    'Notification'
+    'Notification',
+    'QuestionStatDelta',
+    'AttemptAnswer',
+    'ExamForm',
+    'LeaderboardAggregate',
+    'StatsRollup',
+    'StatsRollupDelta',
+    'ItemAnalysisRun',
+    'QuestionItemStat',
+    'ExportJob',
+    'CacheVersion'
 ]
@@ -0,0 +1,44 @@
+"""
+Modèle AttemptAnswer - Réponse individuelle d'une tentative QCM
+"""
+from datetime import datetime
+from app import db
+
+
+class AttemptAnswer(db.Model):
+    """
+    Une ligne par (tentative, position) : écrite par upsert à chaque réponse
+    
+    Optionnel (QCM_ANSWER_ROWS_ENABLED). Pendant l'épreuve, ces lignes font
+    foi ; à la soumission elles sont scellées dans les colonnes compactes de
+    QCMAttempt et conservées pour l'analyse des items.
+    """
+    __tablename__ = 'attempt_answers'
+    __table_args__ = (
+        db.Index('ix_attempt_answers_question_answer', 'question_id', 'answer'),
+    )
+    
+    attempt_id = db.Column(db.Integer, db.ForeignKey('qcm_attempts.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.SmallInteger, primary_key=True)  # index dans la tentative
+    question_id = db.Column(db.Integer, nullable=False)
+    
+    answer = db.Column(db.SmallInteger, nullable=False, default=-1)  # -1 = réponse effacée
+    client_ts = db.Column(db.BigInteger, nullable=False, default=0)  # horodatage client (ms), last-write-wins
+    
+    # Date de la dernière écriture et délai depuis le début de la tentative
+    answered_at = db.Column(db.DateTime, default=datetime.utcnow)
+    elapsed_seconds = db.Column(db.Integer)
+    
+    def to_dict(self):
+        """Convertit en dictionnaire"""
+        return {
+            'attempt_id': self.attempt_id,
+            'position': self.position,
+            'question_id': self.question_id,
+            'answer': self.answer,
+            'answered_at': self.answered_at.isoformat() if self.answered_at else None,
+            'elapsed_seconds': self.elapsed_seconds
+        }
+    
+    def __repr__(self):
+        return f'<AttemptAnswer {self.attempt_id}#{self.position}={self.answer}>'
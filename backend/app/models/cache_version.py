@@ -0,0 +1,22 @@
+"""
+Modèle CacheVersion - Versions partagées des caches locaux (sans Redis)
+"""
+from datetime import datetime
+from app import db
+
+
+class CacheVersion(db.Model):
+    """
+    Compteur de version d'un namespace de cache (app.utils.cache)
+    
+    Utilisé quand Redis est absent : chaque worker relit la version au plus
+    une fois par check_interval et recalcule son cache quand elle change.
+    """
+    __tablename__ = 'cache_versions'
+    
+    namespace = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.namespace}={self.version}>'
@@ -66,6 +66,7 @@ class Candidate(db.Model):
     # === QCM ===
     qcm_score = db.Column(db.Float, index=True)
     qcm_completed_at = db.Column(db.DateTime)
+    public_hash = db.Column(db.String(6), index=True)  # Identifiant anonyme du classement
     
     # === Dates ===
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -161,3 +162,12 @@ class Candidate(db.Model):
     
     def __repr__(self):
         return f'<Candidate {self.full_name}>'
+
+
+# Pagination keyset du classement (voir LeaderboardService.get_page)
+db.Index(
+    'ix_candidates_leaderboard',
+    Candidate.qcm_score.desc(),
+    Candidate.qcm_completed_at,
+    Candidate.id
+)
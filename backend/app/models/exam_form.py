@@ -0,0 +1,62 @@
+"""
+Modèle ExamForm - Cahier de questions pré-généré
+"""
+from datetime import datetime
+from app import db
+from app.utils.packing import pack_ints, unpack_ints
+
+
+class ExamForm(db.Model):
+    """
+    Sélection de questions figée avant l'ouverture de l'épreuve
+    
+    Les cahiers sont générés par un administrateur (ExamFormService) selon la
+    répartition easy/medium/hard des paramètres ; start_qcm n'a plus qu'à en
+    attribuer un.
+    """
+    __tablename__ = 'exam_forms'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Questions : int32 little-endian par question
+    question_ids_packed = db.Column(db.LargeBinary, nullable=False)
+    total_questions = db.Column(db.Integer, nullable=False)
+    
+    # Répartition utilisée à la génération (un cahier n'est servi que si elle
+    # correspond toujours aux paramètres)
+    easy_count = db.Column(db.Integer, nullable=False, default=0)
+    medium_count = db.Column(db.Integer, nullable=False, default=0)
+    hard_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Taux de réussite moyen attendu des questions (%)
+    expected_success_rate = db.Column(db.Float)
+    
+    is_active = db.Column(db.Boolean, default=True, index=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    
+    def get_question_ids_list(self):
+        """Retourne la liste des IDs de questions"""
+        return list(unpack_ints('i', self.question_ids_packed))
+    
+    def set_question_ids(self, question_ids_list):
+        """Enregistre les IDs des questions"""
+        self.question_ids_packed = pack_ints('i', question_ids_list)
+        self.total_questions = len(question_ids_list)
+    
+    def to_dict(self):
+        """Convertit en dictionnaire"""
+        return {
+            'id': self.id,
+            'total_questions': self.total_questions,
+            'easy_count': self.easy_count,
+            'medium_count': self.medium_count,
+            'hard_count': self.hard_count,
+            'expected_success_rate': self.expected_success_rate,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ExamForm {self.id} ({self.total_questions} questions)>'
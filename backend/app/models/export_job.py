@@ -0,0 +1,71 @@
+"""
+Modèle ExportJob - Export de fichier construit en arrière-plan
+"""
+import json
+from datetime import datetime
+from app import db
+
+
+class ExportJob(db.Model):
+    """
+    Export demandé par un administrateur (voir ExportJobService)
+    
+    Le fichier est construit par un thread de fond, puis stocké via
+    FileService ; l'administrateur le télécharge une fois l'export terminé.
+    """
+    __tablename__ = 'export_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # candidates, questions
+    format = db.Column(db.String(10), nullable=False)  # csv, xlsx
+    filters = db.Column(db.Text)  # JSON
+    
+    status = db.Column(db.String(20), default='pending', nullable=False, index=True)  # pending, running, completed, failed
+    rows_total = db.Column(db.Integer)
+    rows_done = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text)
+    
+    # Fichier produit (chemin relatif FileService)
+    file_path = db.Column(db.String(500))
+    file_name = db.Column(db.String(200))
+    file_size = db.Column(db.Integer)
+    
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # dernière progression enregistrée
+    completed_at = db.Column(db.DateTime)
+    
+    @property
+    def progress(self):
+        """Avancement en % (None tant que le total n'est pas connu)"""
+        if self.status == 'completed':
+            return 100.0
+        if not self.rows_total:
+            return None
+        return round(min(self.rows_done or 0, self.rows_total) / self.rows_total * 100, 1)
+    
+    def get_filters(self):
+        return json.loads(self.filters) if self.filters else {}
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'format': self.format,
+            'filters': self.get_filters(),
+            'status': self.status,
+            'rows_total': self.rows_total,
+            'rows_done': self.rows_done,
+            'progress': self.progress,
+            'error': self.error,
+            'file_name': self.file_name,
+            'file_size': self.file_size,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.kind}.{self.format} {self.status}>'
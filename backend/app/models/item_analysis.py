@@ -0,0 +1,80 @@
+"""
+Modèles ItemAnalysisRun / QuestionItemStat - Analyse des items du QCM
+"""
+import json
+from datetime import datetime
+from app import db
+
+
+class ItemAnalysisRun(db.Model):
+    """
+    Exécution de l'analyse des items (indicateurs au niveau de l'épreuve)
+    """
+    __tablename__ = 'item_analysis_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    attempts_count = db.Column(db.Integer, nullable=False, default=0)
+    items_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Nombre de bonnes réponses par tentative
+    mean_total = db.Column(db.Float)
+    std_total = db.Column(db.Float)
+    
+    # Fidélité KR-20 (toutes tentatives, et par cahier pré-généré)
+    kr20 = db.Column(db.Float)
+    kr20_by_form = db.Column(db.Text)  # JSON {form_id: {attempts, kr20}}
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'attempts_count': self.attempts_count,
+            'items_count': self.items_count,
+            'mean_total': self.mean_total,
+            'std_total': self.std_total,
+            'kr20': self.kr20,
+            'kr20_by_form': json.loads(self.kr20_by_form) if self.kr20_by_form else {},
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ItemAnalysisRun {self.id} n={self.attempts_count}>'
+
+
+class QuestionItemStat(db.Model):
+    """
+    Indicateurs d'une question issus de la dernière analyse
+    """
+    __tablename__ = 'question_item_stats'
+    
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('item_analysis_runs.id'))
+    
+    responses = db.Column(db.Integer, nullable=False, default=0)  # fois posée
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    p_value = db.Column(db.Float)  # difficulté : taux de réussite (0-1)
+    point_biserial = db.Column(db.Float)  # discrimination (corrélation item / reste du test)
+    
+    # Fréquence de chaque option (A-D) et des absences de réponse
+    option_counts = db.Column(db.String(100))  # JSON [a, b, c, d]
+    unanswered = db.Column(db.Integer, nullable=False, default=0)
+    
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        counts = json.loads(self.option_counts) if self.option_counts else [0, 0, 0, 0]
+        return {
+            'responses': self.responses,
+            'correct': self.correct,
+            'p_value': self.p_value,
+            'point_biserial': self.point_biserial,
+            'option_counts': counts,
+            'option_rates': [round(c / self.responses, 4) if self.responses else 0 for c in counts],
+            'unanswered': self.unanswered,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<QuestionItemStat q{self.question_id} p={self.p_value}>'
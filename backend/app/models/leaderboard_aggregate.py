@@ -0,0 +1,48 @@
+"""
+Modèle LeaderboardAggregate - Statistiques de classement précalculées par groupe
+"""
+from datetime import datetime
+from app import db
+
+
+class LeaderboardAggregate(db.Model):
+    """
+    Statistiques des scores d'un groupe de candidats (région, école, classe)
+    
+    Chaque écriture de score incrémente `dirty_version` des groupes du
+    candidat ; la tâche de rafraîchissement ne recalcule que les groupes
+    dont `dirty_version` dépasse `refreshed_version`.
+    """
+    __tablename__ = 'leaderboard_aggregates'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'group_key', name='uq_leaderboard_aggregates_scope_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)  # region, school, class_level
+    group_key = db.Column(db.String(200), nullable=False)  # '' = non spécifié
+    label = db.Column(db.String(200))
+    region = db.Column(db.String(100))  # Département de l'école (scope school)
+    
+    candidates_count = db.Column(db.Integer, nullable=False, default=0)
+    average_score = db.Column(db.Float)
+    best_score = db.Column(db.Float)
+    median_score = db.Column(db.Float)
+    p90_score = db.Column(db.Float)
+    
+    dirty_version = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'label': self.label or 'Non spécifié',
+            'candidates_count': self.candidates_count,
+            'average_score': round(self.average_score, 1) if self.average_score else 0,
+            'best_score': round(self.best_score, 1) if self.best_score else 0,
+            'median_score': round(self.median_score, 1) if self.median_score else 0,
+            'p90_score': round(self.p90_score, 1) if self.p90_score else 0
+        }
+    
+    def __repr__(self):
+        return f'<LeaderboardAggregate {self.scope}:{self.group_key}>'
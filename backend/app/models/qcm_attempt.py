@@ -1,8 +1,10 @@
 """
 Modèle QCMAttempt - Tentative de passage du QCM
 """
+from array import array
 from datetime import datetime
 from app import db
+from app.utils.packing import pack_ints, unpack_ints
 import json
 
 
@@ -28,12 +30,23 @@ class QCMAttempt(db.Model):
     # Statut
     status = db.Column(db.String(20), default='in_progress', index=True)  # in_progress, completed, expired
     
-    # Questions posées (IDs séparés par virgule)
-    question_ids = db.Column(db.Text)  # "1,5,12,8,..." 
+    # Cahier pré-généré attribué (None = tirage à la volée)
+    form_id = db.Column(db.Integer, db.ForeignKey('exam_forms.id'), index=True)
+    
+    # Questions posées : int32 little-endian par question
+    question_ids_packed = db.Column(db.LargeBinary)
+    
+    # Réponses données : int8 par question (-1 = pas répondu)
+    answers_packed = db.Column(db.LargeBinary)
     
-    # Réponses données (indices séparés par virgule, -1 = pas répondu)
+    # Ancien format texte, lu tant que la ligne n'est pas convertie
+    # (voir migrate_qcm_attempts_packed.py)
+    question_ids = db.Column(db.Text)  # "1,5,12,8,..." 
     answers = db.Column(db.Text)  # "0,2,1,-1,3,..."
     
+    # Horodatage client (ms) de la dernière écriture de chaque réponse (last-write-wins)
+    answer_timestamps = db.Column(db.Text)  # "0,1718000000000,..."
+    
     # === Anti-triche ===
     tab_switches = db.Column(db.Integer, default=0)       # Nombre de changements d'onglet
     fullscreen_exits = db.Column(db.Integer, default=0)   # Nombre de sorties plein écran
@@ -68,21 +81,112 @@ class QCMAttempt(db.Model):
         remaining = (self.time_limit_minutes * 60) - elapsed
         return max(0, int(remaining))
     
+    def _decoded(self, packed_attr, text_attr, typecode):
+        """
+        Décode une colonne compacte (ou l'ancien texte), une fois par valeur
+        
+        Le résultat est mis en cache sur l'instance tant que la colonne
+        n'est pas remplacée (nouvelle valeur chargée ou écrite).
+        """
+        raw = getattr(self, packed_attr)
+        source = raw if raw is not None else getattr(self, text_attr)
+        cache = self.__dict__.setdefault('_decoded_cache', {})
+        cached = cache.get(packed_attr)
+        if cached is not None and cached[0] is source:
+            return cached[1]
+        
+        if raw is not None:
+            values = unpack_ints(typecode, raw)
+        elif source:
+            values = array(typecode, [int(v) for v in source.split(',')])
+        else:
+            values = array(typecode)
+        cache[packed_attr] = (source, values)
+        return values
+    
+    def _encode(self, packed_attr, text_attr, typecode, values):
+        """Écrit une colonne compacte et abandonne l'ancien texte"""
+        values = array(typecode, values)
+        raw = pack_ints(typecode, values)
+        setattr(self, packed_attr, raw)
+        setattr(self, text_attr, None)
+        self.__dict__.setdefault('_decoded_cache', {})[packed_attr] = (raw, values)
+    
+    @property
+    def question_id_array(self):
+        """IDs des questions (array int32, lecture seule)"""
+        return self._decoded('question_ids_packed', 'question_ids', 'i')
+    
+    @property
+    def answer_array(self):
+        """Réponses (array int8, lecture seule)"""
+        return self._decoded('answers_packed', 'answers', 'b')
+    
     def get_question_ids_list(self):
         """Retourne la liste des IDs de questions"""
-        if not self.question_ids:
-            return []
-        return [int(qid) for qid in self.question_ids.split(',')]
+        return list(self.question_id_array)
+    
+    def set_question_ids(self, question_ids_list):
+        """Enregistre les IDs des questions"""
+        self._encode('question_ids_packed', 'question_ids', 'i', question_ids_list)
     
     def get_answers_list(self):
         """Retourne la liste des réponses"""
-        if not self.answers:
-            return []
-        return [int(a) for a in self.answers.split(',')]
+        return list(self.answer_array)
     
     def set_answers(self, answers_list):
         """Enregistre les réponses"""
-        self.answers = ','.join(str(a) for a in answers_list)
+        self._encode('answers_packed', 'answers', 'b', answers_list)
+    
+    def get_answer_timestamps_list(self):
+        """Retourne l'horodatage client de chaque réponse (0 = jamais écrite)"""
+        count = len(self.answer_array)
+        if not self.answer_timestamps:
+            return [0] * count
+        stamps = [int(ts) for ts in self.answer_timestamps.split(',')]
+        return (stamps + [0] * count)[:count]
+    
+    def set_answer_timestamps(self, timestamps_list):
+        """Enregistre l'horodatage client de chaque réponse"""
+        self.answer_timestamps = ','.join(str(ts) for ts in timestamps_list)
+    
+    @staticmethod
+    def is_valid_answer(answer_index):
+        """Réponse enregistrable : -1 (pas répondu) ou une option 0-3"""
+        return -1 <= answer_index <= 3
+    
+    @staticmethod
+    def merge_answer_changes(answers, stamps, changes):
+        """
+        Applique des changements de réponses en last-write-wins (listes modifiées en place)
+        
+        Args:
+            answers: liste des réponses courantes
+            stamps: horodatage client de chaque réponse
+            changes: liste de (question_index, answer_index, client_ts) ;
+                     client_ts None = écriture inconditionnelle (horodatage conservé)
+        
+        Returns:
+            tuple: (nombre appliqué, nombre ignoré car plus ancien)
+        """
+        applied = 0
+        stale = 0
+        for question_index, answer_index, client_ts in sorted(changes, key=lambda c: c[2] or 0):
+            if client_ts is None:
+                answers[question_index] = answer_index
+                applied += 1
+            elif client_ts > stamps[question_index]:
+                answers[question_index] = answer_index
+                stamps[question_index] = client_ts
+                applied += 1
+            else:
+                stale += 1
+        return applied, stale
+    
+    @staticmethod
+    def is_suspicious(tab_switches, fullscreen_exits):
+        """Seuils de signalement anti-triche"""
+        return (tab_switches or 0) >= 3 or (fullscreen_exits or 0) >= 2
     
     def get_cheat_events(self):
         """Retourne la liste des événements de triche"""
@@ -109,7 +213,15 @@ class QCMAttempt(db.Model):
             self.fullscreen_exits = (self.fullscreen_exits or 0) + 1
         
         # Flaguer si seuils dépassés
-        if (self.tab_switches or 0) >= 3 or (self.fullscreen_exits or 0) >= 2:
+        if QCMAttempt.is_suspicious(self.tab_switches, self.fullscreen_exits):
+            self.is_flagged = True
+    
+    def set_cheat_state(self, events, tab_switches, fullscreen_exits):
+        """Remplace l'état anti-triche (recopie depuis l'état chaud Redis)"""
+        self.cheat_events = json.dumps(events) if events else None
+        self.tab_switches = tab_switches
+        self.fullscreen_exits = fullscreen_exits
+        if QCMAttempt.is_suspicious(tab_switches, fullscreen_exits):
             self.is_flagged = True
     
     def to_dict(self, include_cheat_info=False):
@@ -1,8 +1,11 @@
 """
 Modèle QCMSettings - Paramètres du QCM
 """
+from collections import namedtuple
 from datetime import datetime
+from flask import has_app_context
 from app import db
+from app.utils.cache import VersionedCache
 
 
 class QCMSettings(db.Model):
@@ -63,12 +66,68 @@ class QCMSettings(db.Model):
             'is_open': self.is_open
         }
     
+    @classmethod
+    def get_cached(cls):
+        """
+        Paramètres en lecture seule, depuis le cache du worker
+        
+        Ne lit la base qu'après une modification (version partagée) et n'écrit
+        jamais. Hors app context, retourne la dernière copie connue (ou les
+        valeurs par défaut).
+        """
+        if not has_app_context():
+            return _settings_cache.peek() or SettingsSnapshot.defaults()
+        return _settings_cache.get()
+    
+    @classmethod
+    def invalidate_cache(cls):
+        """Invalide la copie en cache dans tous les workers (après commit)"""
+        _settings_cache.invalidate()
+    
+    def snapshot(self):
+        """Copie immuable des paramètres"""
+        return SettingsSnapshot(*(getattr(self, field) for field in SettingsSnapshot._fields))
+    
     @classmethod
     def get_settings(cls):
-        """Récupère les paramètres (crée si n'existe pas)"""
+        """Récupère les paramètres pour modification (crée si n'existe pas)"""
         settings = cls.query.first()
         if not settings:
             settings = cls()
             db.session.add(settings)
             db.session.commit()
         return settings
+
+
+class SettingsSnapshot(namedtuple('SettingsSnapshot', [
+    'duration_minutes', 'total_questions', 'passing_score',
+    'easy_count', 'medium_count', 'hard_count',
+    'randomize_questions', 'randomize_options', 'show_score_immediately',
+    'open_date', 'close_date', 'updated_at'
+])):
+    """Copie immuable de QCMSettings, partageable entre requêtes et threads"""
+    
+    __slots__ = ()
+    
+    is_open = QCMSettings.is_open
+    to_dict = QCMSettings.to_dict
+    
+    @classmethod
+    def defaults(cls):
+        """Valeurs par défaut des colonnes (aucune ligne en base)"""
+        columns = QCMSettings.__table__.c
+        return cls(*(
+            columns[field].default.arg
+            if columns[field].default is not None and not columns[field].default.is_callable
+            else None
+            for field in cls._fields
+        ))
+
+
+def _load_settings():
+    """Charge les paramètres sans jamais les créer"""
+    settings = QCMSettings.query.first()
+    return settings.snapshot() if settings else SettingsSnapshot.defaults()
+
+
+_settings_cache = VersionedCache('qcm_settings', _load_settings)
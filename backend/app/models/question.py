@@ -1,10 +1,22 @@
 """
 Modèle Question - Banque de questions QCM
 """
+import hashlib
+import unicodedata
 from datetime import datetime
 from app import db
 
 
+def question_text_hash(text):
+    """
+    Empreinte du texte normalisé (Unicode NFKC, casse et espaces ignorés)
+    
+    Sert à détecter les doublons de la banque, notamment à l'import.
+    """
+    normalized = ' '.join(unicodedata.normalize('NFKC', str(text or '')).casefold().split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
 class Question(db.Model):
     """
     Question du QCM avec ses options
@@ -15,6 +27,7 @@ class Question(db.Model):
     
     # Contenu
     text = db.Column(db.Text, nullable=False)
+    text_hash = db.Column(db.String(40), index=True)  # question_text_hash(text)
     
     # Options (stockées en JSON)
     option_a = db.Column(db.String(500), nullable=False)
@@ -41,6 +54,11 @@ class Question(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     
+    @db.validates('text')
+    def _update_text_hash(self, key, text):
+        self.text_hash = question_text_hash(text)
+        return text
+    
     @property
     def options(self):
         """Retourne les options sous forme de liste"""
@@ -48,10 +66,10 @@ class Question(db.Model):
     
     @property
     def success_rate(self):
-        """Taux de réussite de la question"""
-        if self.times_shown == 0:
+        """Taux de réussite de la question (compteurs agrégés en différé)"""
+        if not self.times_shown:
             return 0
-        return round((self.times_correct / self.times_shown) * 100, 1)
+        return round(((self.times_correct or 0) / self.times_shown) * 100, 1)
     
     def check_answer(self, answer_index):
         """Vérifie si la réponse est correcte"""
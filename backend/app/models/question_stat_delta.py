@@ -0,0 +1,27 @@
+"""
+Modèle QuestionStatDelta - Statistiques de questions en attente d'agrégation
+"""
+from datetime import datetime
+from app import db
+
+
+class QuestionStatDelta(db.Model):
+    """
+    Contribution d'une soumission aux statistiques d'une question
+    
+    Table en ajout seul : la soumission n'écrit jamais dans `questions`.
+    Les lignes sont consommées et additionnées dans `times_shown` /
+    `times_correct` par la tâche d'agrégation (QuestionStatsService).
+    """
+    __tablename__ = 'question_stat_deltas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Pas de clé étrangère : une question supprimée ne bloque pas l'historique
+    question_id = db.Column(db.Integer, nullable=False, index=True)
+    shown = db.Column(db.Integer, nullable=False, default=1)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<QuestionStatDelta q{self.question_id} +{self.shown}/{self.correct}>'
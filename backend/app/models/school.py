@@ -1,10 +1,23 @@
 """
 Modèle School - Établissements scolaires
 """
+import unicodedata
 from datetime import datetime
 from app import db
 
 
+def school_key(value):
+    """Clé de comparaison d'un nom ou d'une ville (casse et espaces ignorés)"""
+    return ' '.join(str(value or '').casefold().split())
+
+
+def school_search_key(value):
+    """Forme de recherche : sans accents ni ponctuation, en minuscules ("Lycée Béhanzin" -> "lycee behanzin")"""
+    decomposed = unicodedata.normalize('NFKD', str(value or '').casefold())
+    letters = ''.join(c if c.isalnum() else ' ' for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(letters.split())
+
+
 class School(db.Model):
     """
     Établissement scolaire (lycée, collège)
@@ -17,6 +30,14 @@ class School(db.Model):
     region = db.Column(db.String(100), index=True)  # Département
     type = db.Column(db.String(50))  # public, privé, confessionnel
     
+    # Clés normalisées (school_key) : un établissement par couple nom / ville
+    name_key = db.Column(db.String(200))
+    city_key = db.Column(db.String(100), nullable=False, default='')
+    
+    # Formes de recherche (school_search_key) : autocomplétion
+    search_name = db.Column(db.String(200))
+    search_city = db.Column(db.String(100))
+    
     # Statut
     is_active = db.Column(db.Boolean, default=True)
     
@@ -27,6 +48,18 @@ class School(db.Model):
     # Relation avec les candidats
     candidates = db.relationship('Candidate', backref='school', lazy='dynamic')
     
+    @db.validates('name')
+    def _update_name_key(self, key, name):
+        self.name_key = school_key(name)
+        self.search_name = school_search_key(name)
+        return name
+    
+    @db.validates('city')
+    def _update_city_key(self, key, city):
+        self.city_key = school_key(city)
+        self.search_city = school_search_key(city)
+        return city
+    
     def to_dict(self):
         """Convertit en dictionnaire"""
         return {
@@ -40,3 +73,21 @@ class School(db.Model):
     
     def __repr__(self):
         return f'<School {self.name}>'
+
+
+# Unicité nom / ville (import groupé en ON CONFLICT DO NOTHING)
+db.Index('uq_schools_name_city_key', School.name_key, School.city_key, unique=True)
+
+# Autocomplétion sous PostgreSQL : index trigrammes (extension pg_trgm, voir SchoolSearchService)
+db.event.listen(
+    School.__table__, 'before_create',
+    db.DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql')
+)
+db.Index(
+    'ix_schools_search_name_trgm', School.search_name,
+    postgresql_using='gin', postgresql_ops={'search_name': 'gin_trgm_ops'}
+)
+db.Index(
+    'ix_schools_search_city_trgm', School.search_city,
+    postgresql_using='gin', postgresql_ops={'search_city': 'gin_trgm_ops'}
+)
@@ -0,0 +1,62 @@
+"""
+Modèles StatsRollup et StatsRollupDelta - Compteurs de candidats précalculés par dimension
+"""
+from datetime import datetime
+from app import db
+
+
+class StatsRollup(db.Model):
+    """
+    Nombre de candidats par (jour d'inscription, région, genre, classe, statut)
+    
+    Alimenté par les deltas de `stats_rollup_deltas` (StatsRollupService) ;
+    les statistiques admin lisent ces quelques lignes au lieu de parcourir
+    `candidates`. Les dimensions absentes
+    valent '' (une contrainte unique ne considère pas NULL comme égal).
+    """
+    __tablename__ = 'stats_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'region', 'gender', 'class_level', 'status', name='uq_stats_rollups_dimensions'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    region = db.Column(db.String(100), nullable=False, default='')
+    gender = db.Column(db.String(1), nullable=False, default='')
+    class_level = db.Column(db.String(20), nullable=False, default='')
+    status = db.Column(db.String(20), nullable=False, default='')
+    
+    candidates_count = db.Column(db.Integer, nullable=False, default=0)
+    scored_count = db.Column(db.Integer, nullable=False, default=0)  # avec un score QCM
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<StatsRollup {self.day} {self.region}/{self.gender}/{self.class_level}/{self.status}: {self.candidates_count}>'
+
+
+class StatsRollupDelta(db.Model):
+    """
+    Variation des compteurs en attente d'agrégation
+    
+    Table en ajout seul, écrite dans la transaction qui modifie les
+    candidats : aucune ligne partagée de `stats_rollups` n'y est verrouillée.
+    Les lignes sont consommées et additionnées dans `stats_rollups` par
+    StatsRollupService.fold_deltas.
+    """
+    __tablename__ = 'stats_rollup_deltas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    region = db.Column(db.String(100), nullable=False, default='')
+    gender = db.Column(db.String(1), nullable=False, default='')
+    class_level = db.Column(db.String(20), nullable=False, default='')
+    status = db.Column(db.String(20), nullable=False, default='')
+    
+    candidates_count = db.Column(db.Integer, nullable=False, default=0)
+    scored_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StatsRollupDelta {self.day} {self.region}/{self.gender}/{self.class_level}/{self.status}: {self.candidates_count:+d}>'
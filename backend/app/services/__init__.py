@@ -7,6 +7,7 @@ from app.services.qcm_service import QCMService, QCMAdminService
 from app.services.content_service import ContentService
 from app.services.stats_service import StatsService
 from app.services.email_service import EmailService
+from app.services.stats_rollup_service import StatsRollupService
 
 __all__ = [
     'AuthService', 
@@ -15,5 +16,6 @@ __all__ = [
     'QCMAdminService',
     'ContentService',
     'StatsService',
-    'EmailService'
+    'EmailService',
+    'StatsRollupService'
 ]
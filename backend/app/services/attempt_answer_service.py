@@ -0,0 +1,226 @@
+"""
+Réponses QCM normalisées (table attempt_answers)
+
+Quand QCM_ANSWER_ROWS_ENABLED est actif (et sans état chaud Redis),
+chaque réponse est un upsert d'une seule ligne au lieu d'une réécriture
+de toute la tentative. À la soumission ou à l'expiration, la tentative est
+« scellée » : les lignes sont recopiées dans les colonnes compactes de
+QCMAttempt (lectures rapides) et complétées pour que l'analyse des items
+dispose de toutes les réponses, quel que soit le chemin d'écriture utilisé.
+"""
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import AttemptAnswer, QCMAttempt
+from app.utils.orm import insert_for
+
+SUPPORTED_DIALECTS = ('postgresql', 'sqlite')
+
+
+class AttemptAnswerService:
+    """Écriture, scellement et analyse des réponses individuelles"""
+    
+    @staticmethod
+    def enabled():
+        """Vrai si les réponses sont écrites ligne par ligne"""
+        return (
+            current_app.config.get('QCM_ANSWER_ROWS_ENABLED', False)
+            and db.session.get_bind().dialect.name in SUPPORTED_DIALECTS
+        )
+    
+    @staticmethod
+    def upsert(attempt, changes):
+        """
+        Écrit des changements de réponses (sans commit)
+        
+        Args:
+            attempt: tentative en cours
+            changes: liste de (position, réponse, client_ts) ;
+                     client_ts None = écriture inconditionnelle
+        
+        Returns:
+            tuple: (nombre appliqué, nombre ignoré car plus ancien)
+        
+        Raises:
+            ValueError: position ou réponse hors bornes (la ligne ferait
+                        échouer le scellement de la tentative)
+        """
+        total = len(attempt.answer_array)
+        for position, answer, _ in changes:
+            if not 0 <= position < total or not QCMAttempt.is_valid_answer(answer):
+                raise ValueError(f"Changement de réponse invalide: ({position}, {answer})")
+        
+        now = datetime.utcnow()
+        elapsed = int((now - attempt.started_at).total_seconds())
+        question_ids = attempt.question_id_array
+        
+        # Un seul changement par position (le plus récent) : ON CONFLICT ne
+        # peut toucher deux fois la même ligne dans une instruction
+        latest = {}
+        for change in sorted(changes, key=lambda c: c[2] or 0):
+            latest[change[0]] = change
+        
+        applied = 0
+        for timestamped in (False, True):
+            rows = [
+                {
+                    'attempt_id': attempt.id,
+                    'position': position,
+                    'question_id': question_ids[position],
+                    'answer': answer,
+                    'client_ts': client_ts or 0,
+                    'answered_at': now,
+                    'elapsed_seconds': elapsed
+                }
+                for position, answer, client_ts in latest.values()
+                if (client_ts is not None) == timestamped
+            ]
+            if not rows:
+                continue
+            
+            stmt = insert_for(AttemptAnswer).values(rows)
+            update = {
+                'answer': stmt.excluded.answer,
+                'answered_at': stmt.excluded.answered_at,
+                'elapsed_seconds': stmt.excluded.elapsed_seconds
+            }
+            if timestamped:
+                # Last-write-wins arbitré par la base
+                update['client_ts'] = stmt.excluded.client_ts
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['attempt_id', 'position'],
+                    set_=update,
+                    where=stmt.excluded.client_ts > AttemptAnswer.client_ts
+                )
+            else:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['attempt_id', 'position'],
+                    set_=update
+                )
+            applied += len(db.session.execute(stmt.returning(AttemptAnswer.position)).all())
+        
+        return applied, len(changes) - applied
+    
+    @staticmethod
+    def overlay(attempt):
+        """
+        Reporte les lignes de réponses sur les colonnes compactes (sans commit)
+        
+        Last-write-wins, comme merge_answer_changes : une ligne ne remplace
+        la colonne que si elle n'est pas plus ancienne (la colonne peut
+        porter une réponse plus récente recopiée depuis l'état chaud Redis).
+        
+        Returns:
+            set: positions dont la ligne est à jour
+        """
+        rows = db.session.query(
+            AttemptAnswer.position, AttemptAnswer.answer, AttemptAnswer.client_ts
+        ).filter(AttemptAnswer.attempt_id == attempt.id).all()
+        if not rows:
+            return set()
+        
+        answers = attempt.get_answers_list()
+        stamps = attempt.get_answer_timestamps_list()
+        current = set()
+        for position, answer, client_ts in rows:
+            # Lignes hors bornes (écrites avant validation) : ignorées
+            if position >= len(answers) or not QCMAttempt.is_valid_answer(answer):
+                continue
+            client_ts = client_ts or 0
+            if client_ts >= stamps[position]:
+                answers[position] = answer
+                stamps[position] = client_ts
+                current.add(position)
+        attempt.set_answers(answers)
+        attempt.set_answer_timestamps(stamps)
+        return current
+    
+    @staticmethod
+    def seal(attempt):
+        """
+        Scelle la tentative avant clôture (sans commit)
+        
+        Les lignes sont recopiées dans les colonnes compactes ; les réponses
+        qui n'existaient qu'en colonne, ou y sont plus récentes (état chaud
+        Redis), sont écrites en lignes pour l'analyse des items.
+        """
+        if not AttemptAnswerService.enabled():
+            return
+        
+        current = AttemptAnswerService.overlay(attempt)
+        now = datetime.utcnow()
+        question_ids = attempt.question_id_array
+        stamps = attempt.get_answer_timestamps_list()
+        # Un horodatage sans ligne à jour : réponse plus récente en colonne (effacement compris)
+        rows = [
+            {
+                'attempt_id': attempt.id,
+                'position': position,
+                'question_id': question_ids[position],
+                'answer': answer,
+                'client_ts': stamps[position],
+                'answered_at': now,
+                'elapsed_seconds': None
+            }
+            for position, answer in enumerate(attempt.answer_array)
+            if position not in current and (answer != -1 or stamps[position])
+        ]
+        if rows:
+            stmt = insert_for(AttemptAnswer).values(rows)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['attempt_id', 'position'],
+                set_={
+                    'answer': stmt.excluded.answer,
+                    'client_ts': stmt.excluded.client_ts,
+                    'answered_at': stmt.excluded.answered_at,
+                    'elapsed_seconds': stmt.excluded.elapsed_seconds
+                }
+            ))
+    
+    @staticmethod
+    def get_answer_distribution(question_ids=None):
+        """
+        Répartition des réponses et délai moyen par question (tentatives terminées)
+        
+        Returns:
+            dict: {question_id: {'answers': {0..3: n}, 'unanswered', 'responses', 'avg_seconds'}}
+        """
+        query = db.session.query(
+            AttemptAnswer.question_id,
+            AttemptAnswer.answer,
+            db.func.count(),
+            db.func.avg(AttemptAnswer.elapsed_seconds),
+            db.func.count(AttemptAnswer.elapsed_seconds)
+        ).join(
+            QCMAttempt, QCMAttempt.id == AttemptAnswer.attempt_id
+        ).filter(QCMAttempt.status == 'completed')
+        
+        if question_ids:
+            query = query.filter(AttemptAnswer.question_id.in_(question_ids))
+        
+        stats = {}
+        for question_id, answer, count, avg_seconds, timed in query.group_by(
+            AttemptAnswer.question_id, AttemptAnswer.answer
+        ).all():
+            entry = stats.setdefault(question_id, {
+                'answers': {0: 0, 1: 0, 2: 0, 3: 0},
+                'unanswered': 0,
+                'responses': 0,
+                '_seconds': 0.0,
+                '_timed': 0
+            })
+            if answer in entry['answers']:
+                entry['answers'][answer] += count
+                entry['responses'] += count
+            else:
+                entry['unanswered'] += count
+            if timed:
+                entry['_seconds'] += float(avg_seconds) * timed
+                entry['_timed'] += timed
+        
+        for entry in stats.values():
+            seconds = entry.pop('_seconds')
+            timed = entry.pop('_timed')
+            entry['avg_seconds'] = round(seconds / timed, 1) if timed else None
+        
+        return stats
@@ -0,0 +1,324 @@
+"""
+État chaud des tentatives QCM en cours (Redis) avec écriture différée
+
+Pendant l'épreuve, les réponses et les événements anti-triche d'une tentative
+`in_progress` changent sans cesse, mais seul l'état final compte en base.
+Quand Redis est disponible, cet état vit dans Redis et n'est recopié dans
+`qcm_attempts` que :
+  - périodiquement (thread de flush dans chaque worker),
+  - à la soumission,
+  - à l'expiration.
+
+Sans Redis (ou si QCM_HOT_STATE_ENABLED=false), QCMService garde le chemin
+d'écriture direct en base. Une erreur Redis en cours de requête bascule le
+worker sur ce chemin pendant UNAVAILABLE_COOLDOWN secondes ; à la recopie,
+une réponse écrite en base entre-temps (horodatage plus récent) l'emporte
+sur l'état Redis resté en retard.
+
+Clés utilisées (toutes avec TTL = durée de l'épreuve + marge) :
+  qcm_attempt:<id>:meta     hash  user_id, started_at, time_limit_minutes,
+                                  total_questions, tab_switches, fullscreen_exits
+  qcm_attempt:<id>:answers  hash  index -> "réponse:horodatage_client"
+  qcm_attempt:<id>:events   list  événements anti-triche (JSON)
+  qcm_attempts:dirty        set   tentatives à recopier en base
+"""
+import json
+import logging
+import time
+from datetime import datetime
+from flask import current_app
+from app import db, get_redis_client
+from app.models import QCMAttempt
+from app.services.attempt_answer_service import AttemptAnswerService
+from app.utils.scheduler import ensure_periodic_task
+
+logger = logging.getLogger(__name__)
+
+DIRTY_SET_KEY = 'qcm_attempts:dirty'
+STATE_TTL_MARGIN = 3600  # secondes conservées après la fin théorique de l'épreuve
+FLUSH_BATCH_SIZE = 100
+
+# Après une erreur Redis, l'état chaud est ignoré par le worker pendant ce délai (secondes)
+UNAVAILABLE_COOLDOWN = 30
+
+_unavailable_until = 0.0
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_timestamp(dt):
+    """datetime UTC naïf -> secondes epoch"""
+    return (dt - _EPOCH).total_seconds()
+
+
+class AttemptStateStore:
+    """
+    Accès Redis à l'état chaud des tentatives
+    
+    Le client est injecté pour pouvoir être remplacé par fakeredis en test.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+    
+    # ─── Accès ───────────────────────────────────────────
+    
+    @staticmethod
+    def get():
+        """Retourne le store si l'état chaud est activé et Redis disponible, sinon None"""
+        if not current_app.config.get('QCM_HOT_STATE_ENABLED', True):
+            return None
+        client = get_redis_client()
+        if not client or time.monotonic() < _unavailable_until:
+            return None
+        
+        ensure_periodic_task(
+            'qcm_attempt_flush',
+            current_app.config.get('QCM_STATE_FLUSH_INTERVAL', 30),
+            AttemptStateService.flush_dirty
+        )
+        return AttemptStateStore(client)
+    
+    @staticmethod
+    def mark_unavailable(error):
+        """Bascule ce worker sur l'écriture directe en base après une erreur Redis"""
+        global _unavailable_until
+        _unavailable_until = time.monotonic() + UNAVAILABLE_COOLDOWN
+        logger.warning(f"État chaud QCM indisponible ({error}), écriture directe en base pendant {UNAVAILABLE_COOLDOWN}s")
+    
+    @staticmethod
+    def _keys(attempt_id):
+        prefix = f"qcm_attempt:{attempt_id}"
+        return f"{prefix}:meta", f"{prefix}:answers", f"{prefix}:events"
+    
+    # ─── Initialisation ──────────────────────────────────
+    
+    def init_attempt(self, attempt, user_id):
+        """Copie l'état courant de la tentative (DB) dans Redis"""
+        meta_key, answers_key, events_key = self._keys(attempt.id)
+        answers = attempt.get_answers_list()
+        stamps = attempt.get_answer_timestamps_list()
+        events = attempt.get_cheat_events()
+        ttl = int(attempt.time_limit_minutes * 60 + STATE_TTL_MARGIN)
+        
+        pipe = self.client.pipeline()
+        pipe.delete(meta_key, answers_key, events_key)
+        pipe.hset(meta_key, mapping={
+            'user_id': user_id,
+            'started_at': _to_timestamp(attempt.started_at),
+            'time_limit_minutes': attempt.time_limit_minutes,
+            'total_questions': len(answers),
+            'tab_switches': attempt.tab_switches or 0,
+            'fullscreen_exits': attempt.fullscreen_exits or 0
+        })
+        if answers:
+            pipe.hset(answers_key, mapping={
+                str(i): f"{a}:{ts}" for i, (a, ts) in enumerate(zip(answers, stamps))
+            })
+        if events:
+            pipe.rpush(events_key, *[json.dumps(e) for e in events])
+        for key in (meta_key, answers_key, events_key):
+            pipe.expire(key, ttl)
+        pipe.execute()
+    
+    def get_meta(self, attempt_id):
+        """Métadonnées de la tentative, ou None si absente de Redis"""
+        meta_key, _, _ = self._keys(attempt_id)
+        meta = self.client.hgetall(meta_key)
+        if not meta:
+            return None
+        return {
+            'user_id': int(meta['user_id']),
+            'started_at': float(meta['started_at']),
+            'time_limit_minutes': int(meta['time_limit_minutes']),
+            'total_questions': int(meta['total_questions']),
+            'tab_switches': int(meta.get('tab_switches', 0)),
+            'fullscreen_exits': int(meta.get('fullscreen_exits', 0))
+        }
+    
+    @staticmethod
+    def time_remaining_seconds(meta):
+        """Temps restant calculé depuis les métadonnées (même règle que QCMAttempt)"""
+        elapsed = _to_timestamp(datetime.utcnow()) - meta['started_at']
+        return max(0, int(meta['time_limit_minutes'] * 60 - elapsed))
+    
+    @staticmethod
+    def is_expired(meta):
+        """Vérifie si le temps est écoulé"""
+        elapsed = _to_timestamp(datetime.utcnow()) - meta['started_at']
+        return elapsed > meta['time_limit_minutes'] * 60
+    
+    # ─── Réponses ────────────────────────────────────────
+    
+    def get_answers(self, attempt_id, total_questions):
+        """Retourne (réponses, horodatages) depuis Redis"""
+        _, answers_key, _ = self._keys(attempt_id)
+        return self._decode_answers(self.client.hgetall(answers_key), total_questions)
+    
+    @staticmethod
+    def _decode_answers(raw, total_questions):
+        answers = [-1] * total_questions
+        stamps = [0] * total_questions
+        for index, value in raw.items():
+            index = int(index)
+            if 0 <= index < total_questions:
+                answer, ts = value.split(':')
+                answers[index] = int(answer)
+                stamps[index] = int(ts)
+        return answers, stamps
+    
+    def apply_answers(self, attempt_id, changes, total_questions):
+        """
+        Applique des changements en last-write-wins, de façon atomique (WATCH/MULTI)
+        
+        Returns:
+            tuple: (appliqués, ignorés) ou None si l'état n'existe plus (tentative close)
+        """
+        meta_key, answers_key, _ = self._keys(attempt_id)
+        outcome = {}
+        
+        def _transaction(pipe):
+            if not pipe.exists(meta_key):
+                outcome['missing'] = True
+                return
+            answers, stamps = self._decode_answers(pipe.hgetall(answers_key), total_questions)
+            before = list(zip(answers, stamps))
+            applied, stale = QCMAttempt.merge_answer_changes(answers, stamps, changes)
+            
+            updates = {
+                str(i): f"{a}:{ts}"
+                for i, (a, ts) in enumerate(zip(answers, stamps))
+                if (a, ts) != before[i]
+            }
+            pipe.multi()
+            if updates:
+                pipe.hset(answers_key, mapping=updates)
+                pipe.sadd(DIRTY_SET_KEY, attempt_id)
+            outcome['result'] = (applied, stale)
+        
+        self.client.transaction(_transaction, meta_key, answers_key)
+        if outcome.get('missing'):
+            return None
+        return outcome['result']
+    
+    # ─── Anti-triche ─────────────────────────────────────
+    
+    def add_cheat_event(self, attempt_id, event_type):
+        """Enregistre un événement anti-triche, retourne les compteurs à jour"""
+        meta_key, _, events_key = self._keys(attempt_id)
+        ttl = self.client.ttl(meta_key)
+        
+        pipe = self.client.pipeline()
+        pipe.rpush(events_key, json.dumps({
+            'type': event_type,
+            'timestamp': datetime.utcnow().isoformat()
+        }))
+        if ttl and ttl > 0:
+            pipe.expire(events_key, ttl)
+        if event_type == 'tab_switch':
+            pipe.hincrby(meta_key, 'tab_switches', 1)
+        elif event_type == 'fullscreen_exit':
+            pipe.hincrby(meta_key, 'fullscreen_exits', 1)
+        pipe.hmget(meta_key, 'tab_switches', 'fullscreen_exits')
+        pipe.sadd(DIRTY_SET_KEY, attempt_id)
+        results = pipe.execute()
+        
+        tab_switches, fullscreen_exits = (int(v or 0) for v in results[-2])
+        return {
+            'tab_switches': tab_switches,
+            'fullscreen_exits': fullscreen_exits,
+            'is_flagged': QCMAttempt.is_suspicious(tab_switches, fullscreen_exits)
+        }
+    
+    # ─── Recopie en base ─────────────────────────────────
+    
+    def sync_into(self, attempt):
+        """
+        Recopie l'état Redis dans l'objet QCMAttempt (sans commit)
+        
+        Réponse par réponse, la base garde la valeur dont l'horodatage
+        client est strictement plus récent que celui de Redis.
+        
+        Returns:
+            bool: True si un état Redis existait
+        """
+        meta = self.get_meta(attempt.id)
+        if not meta:
+            return False
+        
+        _, _, events_key = self._keys(attempt.id)
+        answers, stamps = self.get_answers(attempt.id, meta['total_questions'])
+        events = [json.loads(e) for e in self.client.lrange(events_key, 0, -1)]
+        
+        # Réponses écrites en base pendant une indisponibilité de Redis
+        db_stamps = attempt.get_answer_timestamps_list()
+        if any(db_stamps):
+            db_answers = attempt.get_answers_list()
+            for i in range(min(len(answers), len(db_answers))):
+                if db_stamps[i] > stamps[i]:
+                    answers[i], stamps[i] = db_answers[i], db_stamps[i]
+        
+        attempt.set_answers(answers)
+        attempt.set_answer_timestamps(stamps)
+        attempt.set_cheat_state(events, meta['tab_switches'], meta['fullscreen_exits'])
+        return True
+    
+    def discard(self, attempt_id):
+        """Supprime l'état chaud (après recopie finale)"""
+        pipe = self.client.pipeline()
+        pipe.delete(*self._keys(attempt_id))
+        pipe.srem(DIRTY_SET_KEY, attempt_id)
+        pipe.execute()
+    
+    def pop_dirty(self, count=FLUSH_BATCH_SIZE):
+        """Retire et retourne des IDs de tentatives à recopier"""
+        return [int(i) for i in (self.client.spop(DIRTY_SET_KEY, count) or [])]
+
+
+class AttemptStateService:
+    """Écriture différée de l'état chaud vers qcm_attempts"""
+    
+    @staticmethod
+    def flush_dirty():
+        """Recopie en base les tentatives modifiées depuis le dernier flush (tâche périodique)"""
+        client = get_redis_client()
+        if not client:
+            return 0
+        
+        store = AttemptStateStore(client)
+        flushed = 0
+        while True:
+            attempt_ids = store.pop_dirty()
+            if not attempt_ids:
+                break
+            
+            try:
+                # Les tentatives verrouillées sont en cours de soumission : on les laisse
+                attempts = QCMAttempt.query.filter(
+                    QCMAttempt.id.in_(attempt_ids)
+                ).with_for_update(skip_locked=True).all()
+                
+                # Supprimés de Redis seulement une fois le commit réussi
+                closed = []
+                for attempt in attempts:
+                    if attempt.status != 'in_progress':
+                        # Tentative close par un autre chemin : l'état Redis n'a plus cours
+                        closed.append(attempt.id)
+                        continue
+                    store.sync_into(attempt)
+                    if attempt.is_expired:
+                        AttemptAnswerService.seal(attempt)
+                        attempt.status = 'expired'
+                        closed.append(attempt.id)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                client.sadd(DIRTY_SET_KEY, *attempt_ids)
+                raise
+            for attempt_id in closed:
+                store.discard(attempt_id)
+            flushed += len(attempts)
+        
+        if flushed:
+            logger.info(f"État chaud QCM: {flushed} tentative(s) recopiée(s) en base")
+        return flushed
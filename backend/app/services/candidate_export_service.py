@@ -0,0 +1,140 @@
+"""
+Export des candidats en flux (CSV / XLSX)
+
+Les lignes sont lues par lots via un curseur côté serveur (yield_per), sans
+objets ORM : une seule requête, email de l'utilisateur joint. La mémoire
+reste constante quel que soit le nombre de candidats.
+"""
+import csv
+import io
+import tempfile
+from app import db
+from app.models import User, Candidate
+from app.services.candidate_service import CandidateService
+from app.utils.spreadsheet import write_xlsx
+
+EXPORT_BATCH_SIZE = 1000
+
+# Lignes CSV regroupées par morceau envoyé au client
+CSV_CHUNK_ROWS = 200
+
+# Lecture du classeur XLSX terminé
+XLSX_CHUNK_BYTES = 64 * 1024
+
+# Au-delà, le classeur en cours d'écriture passe de la mémoire au disque
+XLSX_SPOOL_BYTES = 4 * 1024 * 1024
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+EXPORT_HEADERS = [
+    'ID', 'Prénom', 'Nom', 'Email', 'Genre', 'Date de naissance',
+    'Téléphone', 'Ville', 'Région', 'École', 'Classe',
+    'Moyenne T1', 'Moyenne T2', 'Moyenne T3', 'Moyenne Générale',
+    'Moyenne Maths', 'Moyenne Sciences',
+    'Statut', 'Score QCM', 'Date inscription'
+]
+
+
+def _average(*values):
+    """Moyenne des trimestres renseignés (comme Candidate.average_score)"""
+    averages = [v for v in values if v is not None]
+    if not averages:
+        return None
+    return round(sum(averages) / len(averages), 2)
+
+
+class CandidateExportService:
+    """Export des candidats sans chargement complet en mémoire"""
+    
+    @staticmethod
+    def count(filters=None):
+        """Nombre de candidats exportés avec ces filtres"""
+        query = db.session.query(db.func.count(Candidate.id)).join(User, User.id == Candidate.user_id)
+        return CandidateService.apply_filters(query, filters, user_joined=True).scalar()
+    
+    @staticmethod
+    def iter_rows(filters=None):
+        """
+        Lignes d'export (une liste par candidat), dans l'ordre de la liste admin
+        
+        Args:
+            filters: mêmes filtres que CandidateService.get_all
+        """
+        query = db.session.query(
+            Candidate.id, Candidate.first_name, Candidate.last_name, User.email,
+            Candidate.gender, Candidate.birth_date, Candidate.phone, Candidate.city,
+            Candidate.region, Candidate.school_name, Candidate.class_level,
+            Candidate.average_t1, Candidate.average_t2, Candidate.average_t3,
+            Candidate.math_average, Candidate.science_average,
+            Candidate.status, Candidate.qcm_score, Candidate.created_at
+        ).join(User, User.id == Candidate.user_id)
+        
+        query = CandidateService.apply_filters(query, filters, user_joined=True)
+        query = query.order_by(Candidate.created_at.desc(), Candidate.id.desc())
+        
+        for (candidate_id, first_name, last_name, email, gender, birth_date, phone, city,
+             region, school_name, class_level, t1, t2, t3, math_average, science_average,
+             status, qcm_score, created_at) in query.yield_per(EXPORT_BATCH_SIZE):
+            yield [
+                candidate_id, first_name, last_name, email, gender,
+                birth_date.isoformat() if birth_date else None,
+                phone, city, region, school_name, class_level,
+                t1, t2, t3, _average(t1, t2, t3),
+                math_average, science_average,
+                status, qcm_score,
+                created_at.isoformat() if created_at else None
+            ]
+    
+    @staticmethod
+    def iter_csv(filters=None):
+        """Génère le CSV par morceaux (en-tête envoyé immédiatement)"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        
+        writer.writerow(EXPORT_HEADERS)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+        
+        pending = 0
+        for row in CandidateExportService.iter_rows(filters):
+            writer.writerow(row)
+            pending += 1
+            if pending == CSV_CHUNK_ROWS:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+                pending = 0
+        
+        if pending:
+            yield output.getvalue()
+    
+    @staticmethod
+    def write_xlsx(filters, fileobj, rows=None):
+        """
+        Écrit le classeur dans `fileobj` (mode write-only d'openpyxl, ligne par ligne)
+        
+        Args:
+            rows: lignes à écrire (défaut: iter_rows(filters)), p. ex. enveloppées pour suivre la progression
+        """
+        if rows is None:
+            rows = CandidateExportService.iter_rows(filters)
+        return write_xlsx(fileobj, "Candidats", EXPORT_HEADERS, rows, max_width=30)
+    
+    @staticmethod
+    def iter_xlsx(filters=None):
+        """
+        Génère le classeur XLSX par morceaux
+        
+        Un XLSX est une archive zip : il ne peut être envoyé qu'une fois écrit.
+        Il est construit dans un fichier temporaire (mémoire puis disque au-delà
+        de XLSX_SPOOL_BYTES), puis relu par blocs.
+        """
+        with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as fileobj:
+            CandidateExportService.write_xlsx(filters, fileobj)
+            fileobj.seek(0)
+            while True:
+                chunk = fileobj.read(XLSX_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
@@ -4,6 +4,19 @@ Service de gestion des candidats
 from datetime import datetime, date
 from app import db
 from app.models import User, Candidate, AuditLog
+from app.services.stats_service import StatsService
+
+# Filtres de la liste admin (et de l'export des candidats) -> conversion
+CANDIDATE_FILTERS = {
+    'status': str,
+    'region': str,
+    'gender': str,
+    'class_level': str,
+    'search': str,
+    'score_min': float,
+    'score_max': float,
+    'has_score': str
+}
 
 
 class CandidateService:
@@ -145,17 +158,34 @@ class CandidateService:
     # === ADMIN ===
     
     @staticmethod
-    def get_all(filters=None, page=1, per_page=20):
+    def parse_filters(raw):
         """
-        Récupère tous les candidats avec filtres et pagination
+        Filtres reconnus et convertis (valeurs vides ou invalides ignorées)
         
         Args:
-            filters: dict avec status, region, search, score_min, score_max
-            page: numéro de page
-            per_page: éléments par page
+            raw: paramètres de requête ou dict JSON
         """
-        query = Candidate.query
+        filters = {}
+        for name, convert in CANDIDATE_FILTERS.items():
+            value = raw.get(name)
+            if value is None or value == '':
+                continue
+            try:
+                filters[name] = convert(value)
+            except (TypeError, ValueError):
+                continue
+        return filters
+        
+    @staticmethod
+    def apply_filters(query, filters, user_joined=False):
+        """
+        Applique les filtres de la liste admin à une requête sur les candidats
         
+        Args:
+            query: requête portant sur Candidate
+            filters: dict avec status, region, gender, class_level, search, score_min, score_max, has_score
+            user_joined: la requête joint déjà User (recherche par email)
+        """
         if filters:
             if filters.get('status'):
                 query = query.filter(Candidate.status == filters['status'])
@@ -171,7 +201,9 @@ class CandidateService:
             
             if filters.get('search'):
                 search = f"%{filters['search']}%"
-                query = query.join(User).filter(
+                if not user_joined:
+                    query = query.join(User)
+                query = query.filter(
                     db.or_(
                         Candidate.first_name.ilike(search),
                         Candidate.last_name.ilike(search),
@@ -192,6 +224,20 @@ class CandidateService:
                 elif filters['has_score'] == 'no':
                     query = query.filter(Candidate.qcm_score.is_(None))
         
+        return query
+    
+    @staticmethod
+    def get_all(filters=None, page=1, per_page=20):
+        """
+        Récupère tous les candidats avec filtres et pagination
+        
+        Args:
+            filters: dict avec status, region, search, score_min, score_max
+            page: numéro de page
+            per_page: éléments par page
+        """
+        query = CandidateService.apply_filters(Candidate.query, filters)
+        
         # Tri par date de création décroissante
         query = query.order_by(Candidate.created_at.desc())
         
@@ -320,35 +366,14 @@ class CandidateService:
     @staticmethod
     def get_stats():
         """Statistiques globales des candidats"""
-        total = Candidate.query.count()
-        by_status = {
-            'draft': Candidate.query.filter_by(status='draft').count(),
-            'submitted': Candidate.query.filter_by(status='submitted').count(),
-            'validated': Candidate.query.filter_by(status='validated').count(),
-            'rejected': Candidate.query.filter_by(status='rejected').count()
-        }
-        by_gender = {
-            'M': Candidate.query.filter_by(gender='M').count(),
-            'F': Candidate.query.filter_by(gender='F').count()
-        }
-        
-        # Par région
-        regions = db.session.query(
-            Candidate.region, db.func.count(Candidate.id)
-        ).group_by(Candidate.region).all()
-        by_region = {r[0] or 'Non renseigné': r[1] for r in regions}
-        
-        # Avec score QCM
-        with_score = Candidate.query.filter(Candidate.qcm_score.isnot(None)).count()
-        
-        # Score moyen
-        avg_score = db.session.query(db.func.avg(Candidate.qcm_score)).scalar()
+        candidates = StatsService.get_counters()['candidates']
+        avg_score = candidates['average_qcm_score']
         
         return {
-            'total': total,
-            'by_status': by_status,
-            'by_gender': by_gender,
-            'by_region': by_region,
-            'with_qcm_score': with_score,
+            'total': candidates['total'],
+            'by_status': dict(candidates['by_status']),
+            'by_gender': dict(candidates['by_gender']),
+            'by_region': {entry['region']: entry['total'] for entry in candidates['by_region']},
+            'with_qcm_score': candidates['with_qcm_score'],
             'average_qcm_score': round(avg_score, 2) if avg_score else None
         }, None
@@ -4,6 +4,7 @@ Service de gestion du contenu (News, FAQ, Timeline, Partners)
 from datetime import datetime
 from app import db
 from app.models import News, FAQ, TimelinePhase, Partner, AuditLog
+from app.services.reference_data_service import ReferenceDataService
 
 
 class ContentService:
@@ -47,6 +48,7 @@ class ContentService:
         
         db.session.add(news)
         db.session.commit()
+        ReferenceDataService.invalidate('news')
         return news.to_dict(), None
     
     @staticmethod
@@ -64,6 +66,7 @@ class ContentService:
             news.published_at = datetime.utcnow()
         
         db.session.commit()
+        ReferenceDataService.invalidate('news')
         return news.to_dict(), None
     
     @staticmethod
@@ -74,6 +77,7 @@ class ContentService:
             return None, "Actualité non trouvée"
         db.session.delete(news)
         db.session.commit()
+        ReferenceDataService.invalidate('news')
         return {'deleted': True}, None
     
     # ============================================
@@ -104,6 +108,7 @@ class ContentService:
         )
         db.session.add(faq)
         db.session.commit()
+        ReferenceDataService.invalidate('faqs')
         return faq.to_dict(), None
     
     @staticmethod
@@ -118,6 +123,7 @@ class ContentService:
                 setattr(faq, field, data[field])
         
         db.session.commit()
+        ReferenceDataService.invalidate('faqs')
         return faq.to_dict(), None
     
     @staticmethod
@@ -128,6 +134,7 @@ class ContentService:
             return None, "FAQ non trouvée"
         db.session.delete(faq)
         db.session.commit()
+        ReferenceDataService.invalidate('faqs')
         return {'deleted': True}, None
     
     # ============================================
@@ -153,6 +160,7 @@ class ContentService:
         )
         db.session.add(phase)
         db.session.commit()
+        ReferenceDataService.invalidate('timeline')
         return phase.to_dict(), None
     
     @staticmethod
@@ -172,6 +180,7 @@ class ContentService:
             phase.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data['end_date'] else None
         
         db.session.commit()
+        ReferenceDataService.invalidate('timeline')
         return phase.to_dict(), None
     
     @staticmethod
@@ -182,6 +191,7 @@ class ContentService:
             return None, "Phase non trouvée"
         db.session.delete(phase)
         db.session.commit()
+        ReferenceDataService.invalidate('timeline')
         return {'deleted': True}, None
     
     # ============================================
@@ -213,6 +223,7 @@ class ContentService:
         )
         db.session.add(partner)
         db.session.commit()
+        ReferenceDataService.invalidate('partners')
         return partner.to_dict(), None
     
     @staticmethod
@@ -236,6 +247,7 @@ class ContentService:
             partner.is_active = data['is_active']
         
         db.session.commit()
+        ReferenceDataService.invalidate('partners')
         return partner.to_dict(), None
     
     @staticmethod
@@ -246,4 +258,5 @@ class ContentService:
             return None, "Partenaire non trouvé"
         db.session.delete(partner)
         db.session.commit()
+        ReferenceDataService.invalidate('partners')
         return {'deleted': True}, None
@@ -0,0 +1,202 @@
+"""
+Cahiers de questions pré-générés (exam forms)
+
+Un administrateur génère N cahiers avant l'ouverture de l'épreuve, selon la
+répartition easy/medium/hard des paramètres, éventuellement équilibrés pour
+que leur taux de réussite attendu soit comparable. Au démarrage d'un QCM,
+start_qcm se contente d'attribuer un cahier au hasard (O(1), sans tirage).
+"""
+import random
+from collections import namedtuple
+from app import db
+from app.models import ExamForm, Question, QCMSettings, AuditLog
+from app.services.question_bank_service import QuestionBankService, DIFFICULTIES
+from app.utils.cache import VersionedCache
+from app.utils.packing import unpack_ints
+
+MAX_FORMS = 500
+PICK_ATTEMPTS = 3
+
+# Taux de réussite supposé (%) tant qu'une question a été trop peu posée
+MIN_SHOWN_FOR_RATE = 10
+DIFFICULTY_PRIOR = {'easy': 70.0, 'medium': 50.0, 'hard': 30.0}
+
+# Essais d'échange de questions par cahier lors de l'équilibrage
+BALANCE_ROUNDS = 60
+
+FormEntry = namedtuple('FormEntry', ['id', 'question_ids', 'counts'])
+
+
+def _load_forms():
+    """Charge les cahiers actifs (IDs décodés une fois par version)"""
+    rows = db.session.query(
+        ExamForm.id,
+        ExamForm.question_ids_packed,
+        ExamForm.easy_count,
+        ExamForm.medium_count,
+        ExamForm.hard_count
+    ).filter(
+        ExamForm.is_active == True
+    ).order_by(ExamForm.id).all()
+    
+    return tuple(
+        FormEntry(form_id, tuple(unpack_ints('i', packed)), (easy, medium, hard))
+        for form_id, packed, easy, medium, hard in rows
+    )
+
+
+_forms_cache = VersionedCache('exam_forms', _load_forms)
+
+
+class ExamFormService:
+    """Génération et attribution des cahiers"""
+    
+    @staticmethod
+    def pick_form(settings):
+        """
+        Attribue un cahier actif au hasard
+        
+        Returns:
+            FormEntry, ou None si aucun cahier compatible (tirage à la volée)
+        """
+        forms = _forms_cache.get()
+        if not forms:
+            return None
+        
+        counts = (settings.easy_count or 0, settings.medium_count or 0, settings.hard_count or 0)
+        active = QuestionBankService.get_snapshot().entries
+        for _ in range(PICK_ATTEMPTS):
+            form = random.choice(forms)
+            # Cahier périmé : répartition modifiée ou question désactivée depuis
+            if form.counts == counts and all(qid in active for qid in form.question_ids):
+                return form
+        return None
+    
+    @staticmethod
+    def get_forms():
+        """Liste les cahiers actifs"""
+        forms = ExamForm.query.filter_by(is_active=True).order_by(ExamForm.id).all()
+        rates = [f.expected_success_rate for f in forms if f.expected_success_rate is not None]
+        return {
+            'forms': [f.to_dict() for f in forms],
+            'total': len(forms),
+            'success_rate_spread': round(max(rates) - min(rates), 2) if rates else None
+        }, None
+    
+    @staticmethod
+    def _expected_rates(snapshot):
+        """Taux de réussite attendu (%) de chaque question active"""
+        rows = db.session.query(
+            Question.id, Question.times_shown, Question.times_correct
+        ).filter(Question.id.in_(list(snapshot.entries))).all()
+        
+        rates = {}
+        for qid, shown, correct in rows:
+            if (shown or 0) >= MIN_SHOWN_FOR_RATE:
+                rates[qid] = (correct or 0) / shown * 100
+            else:
+                rates[qid] = DIFFICULTY_PRIOR.get(snapshot.entries[qid].difficulty, 50.0)
+        return rates
+    
+    @staticmethod
+    def _balance(forms, pools, rates):
+        """
+        Rapproche le taux attendu de chaque cahier de la moyenne générale
+        
+        Échanges aléatoires d'une question contre une autre de même difficulté,
+        acceptés seulement s'ils réduisent l'écart (modifie `forms` en place).
+        """
+        total = sum(len(ids) for ids in forms[0].values())
+        target = sum(
+            len(forms[0][difficulty]) * sum(rates[q] for q in pool) / len(pool)
+            for difficulty, pool in pools.items() if pool
+        )
+        tiers = [d for d in DIFFICULTIES if 0 < len(forms[0][d]) < len(pools[d])]
+        if not tiers:
+            return
+        
+        for form in forms:
+            current = sum(rates[q] for ids in form.values() for q in ids)
+            for _ in range(BALANCE_ROUNDS):
+                # Écart moyen toléré : 0,5 point de pourcentage
+                if abs(current - target) < 0.5 * total:
+                    break
+                difficulty = random.choice(tiers)
+                ids = form[difficulty]
+                position = random.randrange(len(ids))
+                replacement = random.choice(pools[difficulty])
+                if replacement in ids:
+                    continue
+                candidate = current - rates[ids[position]] + rates[replacement]
+                if abs(candidate - target) < abs(current - target):
+                    ids[position] = replacement
+                    current = candidate
+    
+    @staticmethod
+    def generate_forms(count, admin_id, balance=True):
+        """
+        Génère `count` cahiers et remplace les cahiers actifs
+        
+        Args:
+            count: nombre de cahiers
+            admin_id: auteur
+            balance: équilibrer le taux de réussite attendu entre cahiers
+        """
+        if not 1 <= count <= MAX_FORMS:
+            return None, f"Nombre de cahiers invalide (1 à {MAX_FORMS})"
+        
+        settings = QCMSettings.get_cached()
+        snapshot = QuestionBankService.get_snapshot()
+        wanted = {
+            'easy': settings.easy_count or 0,
+            'medium': settings.medium_count or 0,
+            'hard': settings.hard_count or 0
+        }
+        if not sum(wanted.values()):
+            return None, "La répartition des questions est vide"
+        
+        pools = {}
+        for difficulty, needed in wanted.items():
+            pools[difficulty] = snapshot.by_difficulty.get(difficulty, ())
+            if len(pools[difficulty]) < needed:
+                return None, f"Pas assez de questions {difficulty} ({len(pools[difficulty])}/{needed})"
+        
+        forms = [
+            {difficulty: random.sample(pools[difficulty], needed) for difficulty, needed in wanted.items()}
+            for _ in range(count)
+        ]
+        
+        rates = ExamFormService._expected_rates(snapshot)
+        if balance:
+            ExamFormService._balance(forms, pools, rates)
+        
+        # Les anciens cahiers restent liés aux tentatives qui les ont utilisés
+        ExamForm.query.filter_by(is_active=True).update({'is_active': False})
+        
+        created = []
+        for form in forms:
+            question_ids = [qid for difficulty in DIFFICULTIES for qid in form[difficulty]]
+            exam_form = ExamForm(
+                easy_count=wanted['easy'],
+                medium_count=wanted['medium'],
+                hard_count=wanted['hard'],
+                expected_success_rate=round(sum(rates[q] for q in question_ids) / len(question_ids), 2),
+                is_active=True,
+                created_by=admin_id
+            )
+            exam_form.set_question_ids(question_ids)
+            created.append(exam_form)
+        
+        db.session.add_all(created)
+        
+        AuditLog.log(
+            user_id=admin_id,
+            action='generate_exam_forms',
+            entity_type='exam_form',
+            details=f"{count} cahier(s), équilibrage: {'oui' if balance else 'non'}"
+        )
+        
+        db.session.commit()
+        _forms_cache.invalidate()
+        
+        return ExamFormService.get_forms()[0], None
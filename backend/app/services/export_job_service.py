@@ -0,0 +1,346 @@
+"""
+Exports en arrière-plan
+
+POST /exports crée un ExportJob (pending) et le confie à un pool de threads
+du process. Le thread construit le fichier ligne par ligne (curseur côté
+serveur), enregistre la progression, puis stocke le fichier via FileService
+(disque local privé ou S3). L'administrateur le télécharge ensuite.
+
+Un job n'est exécuté qu'une fois : il est réclamé par un UPDATE conditionnel
+(pending -> running) et clos de même (running -> completed / failed). Une
+tâche périodique, démarrée par la première requête /exports du process,
+relance les jobs restés en attente (process redémarré) et marque en échec
+ceux qui ne progressent plus.
+"""
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import ExportJob, AuditLog
+from app.services.candidate_export_service import (
+    CandidateExportService, EXPORT_HEADERS, XLSX_MIMETYPE, XLSX_SPOOL_BYTES
+)
+from app.services.candidate_service import CandidateService
+from app.services.qcm_service import QCMAdminService, QUESTION_EXPORT_HEADERS
+from app.services.file_service import FileService
+from app.utils.scheduler import ensure_periodic_task
+from app.utils.spreadsheet import write_xlsx
+
+logger = logging.getLogger(__name__)
+
+# Progression enregistrée toutes les N lignes
+PROGRESS_EVERY_ROWS = 1000
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'xlsx': XLSX_MIMETYPE}
+
+ExportKind = namedtuple('ExportKind', ['headers', 'count', 'rows', 'sheet', 'file_stem', 'max_width'])
+
+EXPORT_KINDS = {
+    'candidates': ExportKind(
+        EXPORT_HEADERS,
+        CandidateExportService.count,
+        CandidateExportService.iter_rows,
+        'Candidats', 'candidats_olympiades', 30
+    ),
+    'questions': ExportKind(
+        QUESTION_EXPORT_HEADERS,
+        lambda filters: QCMAdminService.count_questions(),
+        lambda filters: QCMAdminService.iter_question_rows(),
+        'Questions', 'questions_olympiades', 50
+    )
+}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+# Jobs exécutés par un thread de ce process : vivants même sans progression
+# enregistrée (SQLite), la tâche de reprise ne les marque pas en échec
+_running_jobs = set()
+_running_lock = threading.Lock()
+
+
+def _get_executor():
+    """Pool de threads borné, recréé après un fork (gunicorn --preload)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('EXPORT_JOB_WORKERS', 2),
+                thread_name_prefix='export-job'
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _submit(job_id):
+    app = current_app._get_current_object()
+    _get_executor().submit(_run_job, app, job_id)
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        ExportJobService.process(job_id)
+
+
+def _record_progress(job_id, rows_done):
+    """
+    Enregistre la progression sur une connexion à part
+    
+    La session du job garde le curseur de lecture ouvert : un commit le
+    fermerait. Sous SQLite, un lecteur actif bloque l'écriture d'une autre
+    connexion : la progression n'y est connue qu'à la fin, et seul le
+    process qui exécute le job sait qu'il est vivant (_running_jobs).
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                db.update(ExportJob).where(ExportJob.id == job_id).values(
+                    rows_done=rows_done, heartbeat_at=datetime.utcnow()
+                )
+            )
+    except Exception as e:
+        logger.warning(f"Export {job_id}: progression non enregistrée ({e})")
+
+
+class _TrackedRows:
+    """Itère sur les lignes en comptant, avec enregistrement périodique de la progression"""
+    
+    def __init__(self, rows, job_id):
+        self.rows = rows
+        self.job_id = job_id
+        self.count = 0
+    
+    def __iter__(self):
+        for row in self.rows:
+            yield row
+            self.count += 1
+            if self.count % PROGRESS_EVERY_ROWS == 0:
+                _record_progress(self.job_id, self.count)
+
+
+def _write_csv(fileobj, headers, rows):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    text.flush()
+    text.detach()
+
+
+class ExportJobService:
+    """Création, exécution et téléchargement des exports"""
+    
+    @staticmethod
+    def create(kind, export_format, filters, admin_id):
+        """
+        Crée un export et le met en file
+        
+        Returns:
+            tuple: (job dict, error_message)
+        """
+        if kind not in EXPORT_KINDS:
+            return None, f"Type d'export invalide. Valeurs acceptées: {', '.join(EXPORT_KINDS)}"
+        if export_format not in EXPORT_FORMATS:
+            return None, f"Format non supporté. Valeurs acceptées: {', '.join(EXPORT_FORMATS)}"
+        
+        filters = filters if isinstance(filters, dict) else {}
+        if kind == 'candidates':
+            filters = CandidateService.parse_filters(filters)
+        else:
+            filters = {}
+        
+        job = ExportJob(
+            kind=kind,
+            format=export_format,
+            filters=json.dumps(filters),
+            status='pending',
+            created_by=admin_id
+        )
+        db.session.add(job)
+        db.session.flush()
+        
+        AuditLog.log(
+            user_id=admin_id,
+            action='create_export',
+            entity_type='export_job',
+            entity_id=job.id,
+            details=f"{kind}.{export_format}"
+        )
+        db.session.commit()
+        
+        ExportJobService.ensure_recovery()
+        _submit(job.id)
+        
+        return job.to_dict(), None
+    
+    @staticmethod
+    def process(job_id):
+        """Construit le fichier d'un job en attente (thread de fond)"""
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            db.update(ExportJob).where(
+                ExportJob.id == job_id, ExportJob.status == 'pending'
+            ).values(status='running', started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return  # déjà pris par un autre thread ou process
+        
+        job = ExportJob.query.get(job_id)
+        kind = EXPORT_KINDS[job.kind]
+        filters = job.get_filters()
+        file_name = f"{kind.file_stem}_{now.strftime('%Y%m%d_%H%M')}.{job.format}"
+        
+        with _running_lock:
+            _running_jobs.add(job_id)
+        try:
+            job.rows_total = kind.count(filters)
+            db.session.commit()
+            
+            rows = _TrackedRows(kind.rows(filters), job_id)
+            with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as fileobj:
+                if job.format == 'csv':
+                    _write_csv(fileobj, kind.headers, rows)
+                else:
+                    write_xlsx(fileobj, kind.sheet, kind.headers, rows, max_width=kind.max_width)
+                
+                file_size = fileobj.tell()
+                fileobj.seek(0)
+                file_path, error = FileService.save_export(fileobj, file_name, EXPORT_FORMATS[job.format])
+            
+            if error:
+                raise RuntimeError(error)
+            
+            finished = datetime.utcnow()
+            # Conditionnel : la tâche de reprise a pu marquer le job en échec entre-temps
+            completed = db.session.execute(
+                db.update(ExportJob).where(
+                    ExportJob.id == job_id, ExportJob.status == 'running'
+                ).values(
+                    status='completed',
+                    rows_done=rows.count,
+                    file_path=file_path,
+                    file_name=file_name,
+                    file_size=file_size,
+                    error=None,
+                    completed_at=finished,
+                    heartbeat_at=finished
+                )
+            ).rowcount
+            db.session.commit()
+            if not completed:
+                FileService.delete_export(file_path)
+                logger.warning(f"Export {job_id} terminé après avoir été marqué en échec, fichier supprimé")
+                return
+            logger.info(f"Export {job_id} terminé: {rows.count} ligne(s), {file_size} octets")
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f"Export {job_id} en échec")
+            db.session.execute(
+                db.update(ExportJob).where(
+                    ExportJob.id == job_id, ExportJob.status == 'running'
+                ).values(
+                    status='failed', error=str(e)[:500], completed_at=datetime.utcnow()
+                )
+            )
+            db.session.commit()
+        
+        finally:
+            with _running_lock:
+                _running_jobs.discard(job_id)
+    
+    @staticmethod
+    def ensure_recovery():
+        """Démarre la tâche de reprise dans ce process (à chaque requête /exports)"""
+        ensure_periodic_task(
+            'export_jobs_recovery',
+            current_app.config.get('EXPORT_JOB_STALE_SECONDS', 300),
+            ExportJobService.recover
+        )
+    
+    @staticmethod
+    def recover():
+        """
+        Tâche périodique : relance les jobs en attente depuis trop longtemps
+        (process redémarré avant de les prendre) et marque en échec les jobs
+        en cours qui ne progressent plus
+        """
+        stale = datetime.utcnow() - timedelta(seconds=current_app.config.get('EXPORT_JOB_STALE_SECONDS', 300))
+        with _running_lock:
+            alive = list(_running_jobs)
+        
+        interrupted = db.update(ExportJob).where(
+            ExportJob.status == 'running', ExportJob.heartbeat_at < stale
+        )
+        if alive:
+            interrupted = interrupted.where(ExportJob.id.notin_(alive))
+        db.session.execute(interrupted.values(
+            status='failed', error="Export interrompu", completed_at=datetime.utcnow()
+        ))
+        db.session.commit()
+        
+        pending = db.session.query(ExportJob.id).filter(
+            ExportJob.status == 'pending', ExportJob.created_at < stale
+        ).all()
+        for (job_id,) in pending:
+            _submit(job_id)
+    
+    @staticmethod
+    def get_jobs(limit=50):
+        """Derniers exports"""
+        jobs = ExportJob.query.order_by(ExportJob.id.desc()).limit(limit).all()
+        return [job.to_dict() for job in jobs], None
+    
+    @staticmethod
+    def get_job(job_id):
+        job = ExportJob.query.get(job_id)
+        if not job:
+            return None, "Export non trouvé"
+        return job.to_dict(), None
+    
+    @staticmethod
+    def get_download(job_id):
+        """
+        Returns:
+            tuple: ((file_path, file_name), error_message)
+        """
+        job = ExportJob.query.get(job_id)
+        if not job:
+            return None, "Export non trouvé"
+        if job.status != 'completed' or not job.file_path:
+            return None, "L'export n'est pas terminé"
+        return (job.file_path, job.file_name), None
+    
+    @staticmethod
+    def delete_job(job_id, admin_id):
+        """Supprime un export terminé ou en échec, avec son fichier"""
+        job = ExportJob.query.get(job_id)
+        if not job:
+            return None, "Export non trouvé"
+        if job.status in ('pending', 'running'):
+            return None, "Export en cours"
+        
+        FileService.delete_export(job.file_path)
+        db.session.delete(job)
+        
+        AuditLog.log(
+            user_id=admin_id,
+            action='delete_export',
+            entity_type='export_job',
+            entity_id=job_id
+        )
+        db.session.commit()
+        
+        return {'id': job_id}, None
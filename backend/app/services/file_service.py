@@ -10,6 +10,7 @@ En mode S3, les variables AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY,
 AWS_S3_BUCKET et optionnellement AWS_S3_REGION / AWS_S3_ENDPOINT doivent être définies.
 """
 import os
+import shutil
 import uuid
 from datetime import datetime
 from werkzeug.utils import secure_filename
@@ -253,6 +254,85 @@ class FileService:
         
         return f"/uploads/{relative_path}"
     
+    # ─── Exports (fichiers privés) ────────────────────────
+    
+    @staticmethod
+    def get_export_folder():
+        """Dossier des exports (mode local) : jamais servi par /uploads"""
+        return current_app.config.get('EXPORT_FOLDER', 'exports')
+    
+    @staticmethod
+    def save_export(fileobj, filename, content_type=None):
+        """
+        Stocke un fichier d'export (local ou S3, objet privé)
+        
+        Args:
+            fileobj: fichier binaire positionné au début
+            filename: nom d'origine (pour l'extension)
+            content_type: type MIME
+        
+        Returns:
+            tuple: (relative_path, error_message)
+        """
+        relative_path = f"exports/{FileService.generate_unique_filename(filename)}"
+        
+        if FileService._use_s3():
+            return FileService._upload_to_s3(fileobj, relative_path, content_type)
+        
+        target = os.path.join(FileService.get_export_folder(), os.path.basename(relative_path))
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as out:
+                shutil.copyfileobj(fileobj, out)
+        except OSError as e:
+            return None, f"Erreur écriture export: {str(e)}"
+        
+        return relative_path, None
+    
+    @staticmethod
+    def send_export(relative_path, download_name):
+        """
+        Réponse de téléchargement d'un export
+        
+        S3 : redirection vers une URL signée de courte durée ; local : envoi du fichier.
+        """
+        from flask import redirect, send_file
+        
+        if FileService._use_s3():
+            s3 = FileService._get_s3_client()
+            url = s3.generate_presigned_url(
+                'get_object',
+                Params={
+                    'Bucket': FileService._get_s3_bucket(),
+                    'Key': relative_path,
+                    'ResponseContentDisposition': f'attachment; filename={download_name}'
+                },
+                ExpiresIn=300
+            )
+            return redirect(url)
+        
+        target = os.path.join(FileService.get_export_folder(), os.path.basename(relative_path))
+        return send_file(os.path.abspath(target), as_attachment=True, download_name=download_name)
+    
+    @staticmethod
+    def delete_export(relative_path):
+        """Supprime un fichier d'export (local ou S3)"""
+        if not relative_path:
+            return False
+        
+        if FileService._use_s3():
+            return FileService._delete_from_s3(relative_path)
+        
+        target = os.path.join(FileService.get_export_folder(), os.path.basename(relative_path))
+        try:
+            if os.path.exists(target):
+                os.remove(target)
+                return True
+        except OSError as e:
+            print(f"Erreur suppression export: {e}")
+        
+        return False
+    
     @staticmethod
     def file_exists(relative_path):
         """Vérifie si un fichier existe"""
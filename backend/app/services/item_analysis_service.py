@@ -0,0 +1,286 @@
+"""
+Analyse des items de la banque de questions
+
+Parcourt les tentatives terminées par lots (yield_per) et accumule, dans des
+tableaux plats indexés par question (module `array`), de quoi calculer :
+  - la difficulté (p-value, taux de réussite) ;
+  - la discrimination (point-bisériale corrigée : corrélation entre la
+    réussite à l'item et le score sur les autres items de la tentative) ;
+  - la fréquence de chaque option (analyse des distracteurs) ;
+  - la fidélité KR-20 de l'épreuve, globale et par cahier pré-généré.
+
+Les résultats sont enregistrés par question (question_item_stats), avec un
+résumé de l'exécution (item_analysis_runs).
+"""
+import json
+import logging
+import math
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import inspect
+from app import db
+from app.models import Question, QCMAttempt, AuditLog, ItemAnalysisRun, QuestionItemStat
+from app.services.scoring_service import AnswerKey, lookup_entries, score_answers, NO_CATEGORY
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_BATCH_SIZE = 1000
+
+# Options A-D + emplacement « sans réponse » par question
+SLOTS = 5
+UNANSWERED_SLOT = 4
+
+# Tentatives minimales pour un KR-20 par cahier
+MIN_FORM_ATTEMPTS = 30
+
+# Vrai une fois la table question_item_stats vue dans ce process
+_stats_table_ready = False
+
+
+def _stats_table_exists():
+    """
+    Vrai si les tables d'analyse existent (créées par run_item_analysis.py)
+    
+    Vérifié avant la requête : sur PostgreSQL, une requête en échec
+    annulerait la transaction de l'appelant.
+    """
+    global _stats_table_ready
+    if not _stats_table_ready:
+        _stats_table_ready = inspect(db.engine).has_table(QuestionItemStat.__tablename__)
+    return _stats_table_ready
+
+
+class _ItemAccumulator:
+    """Sommes par question dans des tableaux parallèles (une case par question rencontrée)"""
+    
+    def __init__(self):
+        self.index = {}  # question_id -> position dans les tableaux
+        self.responses = array('l')
+        self.correct = array('l')
+        self.rest_sum = array('d')  # somme des scores « reste du test »
+        self.rest_sq_sum = array('d')
+        self.rest_correct_sum = array('d')  # idem, parmi les bonnes réponses
+        self.options = array('l')  # SLOTS cases par question
+    
+    def slot(self, question_id):
+        position = self.index.get(question_id)
+        if position is None:
+            position = self.index[question_id] = len(self.responses)
+            for column in (self.responses, self.correct):
+                column.append(0)
+            for column in (self.rest_sum, self.rest_sq_sum, self.rest_correct_sum):
+                column.append(0.0)
+            self.options.extend([0] * SLOTS)
+        return position
+    
+    def add(self, key, result):
+        """Ajoute une tentative corrigée"""
+        total = result.correct_count
+        for question_id, category, correct, answer in zip(
+            key.question_ids, key.category_codes, result.correct, result.answers
+        ):
+            if category == NO_CATEGORY:
+                continue  # question supprimée
+            i = self.slot(question_id)
+            rest = total - correct
+            self.responses[i] += 1
+            self.correct[i] += correct
+            self.rest_sum[i] += rest
+            self.rest_sq_sum[i] += rest * rest
+            if correct:
+                self.rest_correct_sum[i] += rest
+            self.options[i * SLOTS + (answer if 0 <= answer < 4 else UNANSWERED_SLOT)] += 1
+    
+    def point_biserial(self, i):
+        """Corrélation point-bisériale item / reste du test (None si indéfinie)"""
+        n, n1 = self.responses[i], self.correct[i]
+        if n1 == 0 or n1 == n:
+            return None
+        mean = self.rest_sum[i] / n
+        variance = self.rest_sq_sum[i] / n - mean * mean
+        if variance <= 1e-12:
+            return None
+        mean_correct = self.rest_correct_sum[i] / n1
+        mean_wrong = (self.rest_sum[i] - self.rest_correct_sum[i]) / (n - n1)
+        p = n1 / n
+        return (mean_correct - mean_wrong) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+
+
+class _ScoreMoments:
+    """Moyenne et variance des scores totaux (nombre de bonnes réponses)"""
+    
+    def __init__(self):
+        self.count = 0
+        self.items = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+    
+    def add(self, items, total):
+        self.count += 1
+        self.items += items
+        self.total += total
+        self.total_sq += total * total
+    
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+    
+    @property
+    def variance(self):
+        if not self.count:
+            return None
+        return max(self.total_sq / self.count - self.mean ** 2, 0.0)
+
+
+def _kr20(items, sum_pq, variance):
+    """KR-20 = k/(k-1) * (1 - somme(p*q) / variance des scores)"""
+    if items is None or items <= 1 or not variance:
+        return None
+    return items / (items - 1) * (1 - sum_pq / variance)
+
+
+def _rounded(value, digits=4):
+    return round(value, digits) if value is not None else None
+
+
+class ItemAnalysisService:
+    """Calcul et lecture de l'analyse des items"""
+    
+    @staticmethod
+    def run(admin_id=None):
+        """
+        Analyse toutes les tentatives terminées et remplace les résultats précédents
+        
+        Returns:
+            tuple: (dict résumé, error_message)
+        """
+        entries = lookup_entries([qid for (qid,) in db.session.query(Question.id)])
+        
+        items = _ItemAccumulator()
+        moments = _ScoreMoments()
+        form_moments = defaultdict(_ScoreMoments)
+        form_correct = defaultdict(lambda: defaultdict(int))  # form_id -> {question_id: réussites}
+        
+        attempts = QCMAttempt.query.options(
+            db.load_only(QCMAttempt.id, QCMAttempt.form_id,
+                         QCMAttempt.question_ids_packed, QCMAttempt.answers_packed,
+                         QCMAttempt.question_ids, QCMAttempt.answers)
+        ).filter(
+            QCMAttempt.status == 'completed'
+        ).order_by(QCMAttempt.id).yield_per(ANALYSIS_BATCH_SIZE)
+        
+        for attempt in attempts:
+            key = AnswerKey.build(attempt.question_id_array, entries)
+            present = len(key) - key.category_codes.count(NO_CATEGORY)
+            if not present:
+                continue
+            result = score_answers(key, attempt.answer_array)
+            items.add(key, result)
+            moments.add(present, result.correct_count)
+            if attempt.form_id:
+                form_moments[attempt.form_id].add(present, result.correct_count)
+                counts = form_correct[attempt.form_id]
+                for question_id, category, correct in zip(key.question_ids, key.category_codes, result.correct):
+                    if category != NO_CATEGORY:
+                        counts[question_id] += correct
+        
+        if not moments.count:
+            return None, "Aucune tentative terminée à analyser"
+        
+        # KR-20 global : somme des p*q des items de chaque tentative, en moyenne
+        # (les tentatives n'ont pas toutes les mêmes questions)
+        p_values = [c / n for c, n in zip(items.correct, items.responses)]
+        mean_sum_pq = sum(n * p * (1 - p) for n, p in zip(items.responses, p_values)) / moments.count
+        kr20 = _kr20(moments.items / moments.count, mean_sum_pq, moments.variance)
+        
+        kr20_by_form = {}
+        for form_id, form in form_moments.items():
+            if form.count < MIN_FORM_ATTEMPTS:
+                continue
+            sum_pq = sum(
+                (correct / form.count) * (1 - correct / form.count)
+                for correct in form_correct[form_id].values()
+            )
+            kr20_by_form[str(form_id)] = {
+                'attempts': form.count,
+                'kr20': _rounded(_kr20(form.items / form.count, sum_pq, form.variance))
+            }
+        
+        run = ItemAnalysisRun(
+            attempts_count=moments.count,
+            items_count=len(items.index),
+            mean_total=_rounded(moments.mean),
+            std_total=_rounded(math.sqrt(moments.variance)),
+            kr20=_rounded(kr20),
+            kr20_by_form=json.dumps(kr20_by_form),
+            created_by=admin_id
+        )
+        db.session.add(run)
+        db.session.flush()
+        
+        now = datetime.utcnow()
+        QuestionItemStat.query.delete()
+        db.session.execute(db.insert(QuestionItemStat), [
+            {
+                'question_id': question_id,
+                'run_id': run.id,
+                'responses': items.responses[i],
+                'correct': items.correct[i],
+                'p_value': _rounded(p_values[i]),
+                'point_biserial': _rounded(items.point_biserial(i)),
+                'option_counts': json.dumps(list(items.options[i * SLOTS:i * SLOTS + 4])),
+                'unanswered': items.options[i * SLOTS + UNANSWERED_SLOT],
+                'computed_at': now
+            }
+            for question_id, i in items.index.items()
+        ])
+        
+        AuditLog.log(
+            user_id=admin_id,
+            action='run_item_analysis',
+            entity_type='item_analysis_run',
+            entity_id=run.id,
+            details=f"{moments.count} tentative(s), {len(items.index)} question(s), KR-20: {run.kr20}"
+        )
+        db.session.commit()
+        
+        logger.info(f"Analyse des items: {moments.count} tentative(s), {len(items.index)} question(s)")
+        return run.to_dict(), None
+    
+    @staticmethod
+    def get_item_stats(question_ids):
+        """Indicateurs enregistrés de questions données : {question_id: dict}"""
+        if not question_ids or not _stats_table_exists():
+            return {}
+        rows = QuestionItemStat.query.filter(QuestionItemStat.question_id.in_(list(question_ids))).all()
+        return {row.question_id: row.to_dict() for row in rows}
+    
+    @staticmethod
+    def get_report():
+        """Dernière exécution et indicateurs de toutes les questions analysées"""
+        if not _stats_table_exists():
+            return {'run': None, 'questions': []}, None
+        
+        run = ItemAnalysisRun.query.order_by(ItemAnalysisRun.id.desc()).first()
+        rows = db.session.query(QuestionItemStat, Question).join(
+            Question, Question.id == QuestionItemStat.question_id
+        ).order_by(Question.id).all()
+        
+        questions = []
+        for stat, question in rows:
+            entry = stat.to_dict()
+            entry.update({
+                'question_id': question.id,
+                'text': question.text,
+                'category': question.category,
+                'difficulty': question.difficulty,
+                'correct_answer': question.correct_answer,
+                'is_active': question.is_active
+            })
+            questions.append(entry)
+        
+        return {
+            'run': run.to_dict() if run else None,
+            'questions': questions
+        }, None
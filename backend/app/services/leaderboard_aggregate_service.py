@@ -0,0 +1,286 @@
+"""
+Classements agrégés par région, école et classe
+
+Les statistiques de chaque groupe (nombre, moyenne, meilleur score,
+médiane, 90e centile) sont stockées dans `leaderboard_aggregates`.
+Une écriture de score ne fait que marquer les groupes du candidat
+(upsert d'un compteur, après le commit de la soumission). Les changements de
+statut, région, école ou classe d'un candidat classé (et de nom ou région
+d'une école) marquent, dans leur propre flush, les groupes quittés et
+rejoints. Une tâche périodique recalcule uniquement les groupes marqués.
+Les endpoints lisent la table (une ligne par groupe), sérialisée en cache
+comme les autres classements publics.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, inspect
+from app import db
+from app.models import Candidate, LeaderboardAggregate, School
+from app.services.leaderboard_service import (
+    ranked_filters, RANKED_STATUSES, RANKINGS_CACHE_NAMESPACE, RANKINGS_CACHE_SECONDS
+)
+from app.utils.cache import VersionedCache, bump_version
+from app.utils.http_cache import build_payload
+from app.utils.orm import insert_for, previous_values, track_previous_values
+from app.utils.scheduler import ensure_periodic_task
+from app.utils.stats import quantile
+
+logger = logging.getLogger(__name__)
+
+# Portée -> colonne de regroupement (les candidats sans école référencée
+# ne figurent pas au classement par école)
+SCOPES = {
+    'region': Candidate.region,
+    'school': Candidate.school_id,
+    'class_level': Candidate.class_level
+}
+
+
+# Attributs du candidat qui déterminent ses groupes de classement
+GROUP_ATTRIBUTES = ('status', 'qcm_score', 'region', 'school_id', 'class_level')
+
+
+def _group_key(value):
+    """Clé texte d'un groupe ('' = non spécifié)"""
+    return '' if value is None else str(value)
+
+
+def _groups_of(region, school_id, class_level):
+    """Groupes (portée, clé) d'un candidat"""
+    groups = {('region', _group_key(region)), ('class_level', _group_key(class_level))}
+    if school_id is not None:
+        groups.add(('school', _group_key(school_id)))
+    return groups
+
+
+def _ranked_groups(status, qcm_score, region, school_id, class_level):
+    """Groupes d'un état de candidat (values = GROUP_ATTRIBUTES), vide s'il n'est pas classé"""
+    if qcm_score is None or status not in RANKED_STATUSES:
+        return set()
+    return _groups_of(region, school_id, class_level)
+
+
+def _load_scope(scope):
+    """Sérialise le classement d'une portée"""
+    return build_payload(LeaderboardAggregateService.get_scope(scope))
+
+
+_aggregates_cache = VersionedCache(RANKINGS_CACHE_NAMESPACE, _load_scope, check_interval=RANKINGS_CACHE_SECONDS)
+
+
+def _ensure_refresh_task():
+    ensure_periodic_task(
+        'leaderboard_aggregates',
+        current_app.config.get('LEADERBOARD_AGGREGATE_INTERVAL', 30),
+        LeaderboardAggregateService.refresh_stale
+    )
+
+
+def _mark(connection, groups):
+    """Upsert des marques de groupes (connexion de la transaction en cours)"""
+    stmt = insert_for(LeaderboardAggregate, connection).values([
+        {'scope': scope, 'group_key': key, 'candidates_count': 0, 'dirty_version': 1, 'refreshed_version': 0}
+        for scope, key in sorted(groups)
+    ])
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=['scope', 'group_key'],
+        set_={'dirty_version': LeaderboardAggregate.dirty_version + 1}
+    ))
+
+
+# Sur un candidat expiré, l'historique du flush ne connaîtrait pas le groupe quitté
+track_previous_values(Candidate, GROUP_ATTRIBUTES)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_group_changes(session, flush_context):
+    """
+    Marque les groupes quittés ou rejoints par un candidat classé
+    
+    Les changements de qcm_score seuls sont laissés à
+    LeaderboardService.refresh, appelé après le commit de la soumission :
+    aucune ligne partagée n'est écrite dans cette transaction-là.
+    """
+    groups = set()
+    
+    for obj in session.dirty:
+        if isinstance(obj, Candidate):
+            state = inspect(obj)
+            changed = [name for name in GROUP_ATTRIBUTES if state.attrs[name].history.has_changes()]
+            if not changed or changed == ['qcm_score']:
+                continue
+            groups |= _ranked_groups(*previous_values(obj, GROUP_ATTRIBUTES))
+            groups |= _ranked_groups(*(getattr(obj, name) for name in GROUP_ATTRIBUTES))
+        elif isinstance(obj, School) and obj.id is not None:
+            state = inspect(obj)
+            # Libellé et région affichés dans le classement par école
+            if state.attrs['name'].history.has_changes() or state.attrs['region'].history.has_changes():
+                groups.add(('school', _group_key(obj.id)))
+    
+    for obj in session.deleted:
+        if isinstance(obj, Candidate):
+            groups |= _ranked_groups(*previous_values(obj, GROUP_ATTRIBUTES))
+    
+    if groups:
+        _mark(session.connection(), groups)
+        _ensure_refresh_task()
+
+
+class LeaderboardAggregateService:
+    """Maintenance et lecture des classements par groupe"""
+    
+    @staticmethod
+    def mark_groups(rows):
+        """
+        Marque à recalculer les groupes de candidats dont le score a changé
+        
+        Args:
+            rows: lignes portant region, school_id et class_level
+        """
+        groups = set()
+        for row in rows:
+            groups |= _groups_of(row.region, row.school_id, row.class_level)
+        if not groups:
+            return
+        
+        _ensure_refresh_task()
+        _mark(db.session.connection(), groups)
+        db.session.commit()
+    
+    @staticmethod
+    def refresh_stale():
+        """
+        Recalcule les groupes marqués (tâche périodique)
+        
+        Un groupe re-marqué pendant le calcul garde une version en avance et
+        sera recalculé au passage suivant.
+        
+        Returns:
+            int: nombre de groupes recalculés
+        """
+        stale = db.session.query(
+            LeaderboardAggregate.id,
+            LeaderboardAggregate.scope,
+            LeaderboardAggregate.group_key,
+            LeaderboardAggregate.dirty_version
+        ).filter(
+            LeaderboardAggregate.dirty_version > LeaderboardAggregate.refreshed_version
+        ).all()
+        if not stale:
+            return 0
+        
+        keys_by_scope = defaultdict(set)
+        for _, scope, key, _ in stale:
+            keys_by_scope[scope].add(key)
+        
+        # Une requête par portée, scores triés pour les quantiles
+        scores = defaultdict(list)
+        for scope, keys in keys_by_scope.items():
+            column = SCOPES[scope]
+            values = [int(k) if scope == 'school' else k for k in keys if k]
+            conditions = [column.in_(values)] if values else []
+            if '' in keys:
+                conditions.append(column.is_(None))
+            rows = db.session.query(column, Candidate.qcm_score).filter(
+                *ranked_filters(), db.or_(*conditions)
+            ).order_by(Candidate.qcm_score)
+            for value, score in rows:
+                scores[(scope, _group_key(value))].append(score)
+        
+        schools = {}
+        if keys_by_scope.get('school'):
+            schools = {
+                str(school_id): (name, region)
+                for school_id, name, region in db.session.query(School.id, School.name, School.region).filter(
+                    School.id.in_([int(k) for k in keys_by_scope['school']])
+                )
+            }
+        
+        now = datetime.utcnow()
+        updates = []
+        for aggregate_id, scope, key, version in stale:
+            group_scores = scores.get((scope, key), [])
+            label, region = (schools.get(key, (None, None)) if scope == 'school' else (key or None, None))
+            updates.append({
+                'b_id': aggregate_id,
+                'b_version': version,
+                'label': label,
+                'region': region,
+                'candidates_count': len(group_scores),
+                'average_score': sum(group_scores) / len(group_scores) if group_scores else None,
+                'best_score': group_scores[-1] if group_scores else None,
+                'median_score': quantile(group_scores, 0.5) if group_scores else None,
+                'p90_score': quantile(group_scores, 0.9) if group_scores else None,
+                'refreshed_version': version,
+                'updated_at': now
+            })
+        
+        table = LeaderboardAggregate.__table__
+        db.session.execute(
+            db.update(table).where(
+                table.c.id == db.bindparam('b_id'),
+                table.c.dirty_version == db.bindparam('b_version')
+            ).values(
+                label=db.bindparam('label'),
+                region=db.bindparam('region'),
+                candidates_count=db.bindparam('candidates_count'),
+                average_score=db.bindparam('average_score'),
+                best_score=db.bindparam('best_score'),
+                median_score=db.bindparam('median_score'),
+                p90_score=db.bindparam('p90_score'),
+                refreshed_version=db.bindparam('refreshed_version'),
+                updated_at=db.bindparam('updated_at')
+            ),
+            updates
+        )
+        db.session.commit()
+        bump_version(RANKINGS_CACHE_NAMESPACE)
+        
+        logger.info(f"Classements agrégés: {len(updates)} groupe(s) recalculé(s)")
+        return len(updates)
+    
+    @staticmethod
+    def rebuild():
+        """Marque tous les groupes (existants et présents en base) puis les recalcule"""
+        LeaderboardAggregate.query.update(
+            {'dirty_version': LeaderboardAggregate.dirty_version + 1},
+            synchronize_session=False
+        )
+        db.session.commit()
+        
+        groups = db.session.query(
+            Candidate.region, Candidate.school_id, Candidate.class_level
+        ).filter(*ranked_filters()).distinct().all()
+        LeaderboardAggregateService.mark_groups(groups)
+        return LeaderboardAggregateService.refresh_stale()
+    
+    @staticmethod
+    def get_scope(scope):
+        """Groupes d'une portée, par moyenne décroissante"""
+        rows = LeaderboardAggregate.query.filter(
+            LeaderboardAggregate.scope == scope,
+            LeaderboardAggregate.candidates_count > 0
+        ).order_by(LeaderboardAggregate.average_score.desc()).all()
+        
+        # Table jamais remplie (base existante) : construction initiale
+        if not rows and not db.session.query(LeaderboardAggregate.query.exists()).scalar():
+            if LeaderboardAggregateService.rebuild():
+                return LeaderboardAggregateService.get_scope(scope)
+        
+        data = []
+        for row in rows:
+            entry = row.to_dict()
+            label = entry.pop('label')
+            if scope == 'school':
+                entry.update({'school_id': int(row.group_key), 'school': label, 'region': row.region or 'Non spécifié'})
+            else:
+                entry[scope] = label
+            data.append(entry)
+        return data
+    
+    @staticmethod
+    def get_cached(scope):
+        """Réponse sérialisée d'une portée (CachedPayload)"""
+        return _aggregates_cache.get(scope)
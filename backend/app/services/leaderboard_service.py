@@ -0,0 +1,447 @@
+"""
+Classement matérialisé (rang et percentile en O(log n))
+
+Le classement des candidats notés est maintenu incrémentalement dans un
+sorted set Redis à chaque écriture de `Candidate.qcm_score` (soumission,
+recorrection). Le hash public de chaque candidat est stocké dans la colonne
+indexée `candidates.public_hash`. Sans Redis, le rang est calculé par un
+comptage sur l'index `qcm_score`.
+
+Les réponses publiques (top N, classements par groupe) sont sérialisées une
+fois par version du namespace de cache 'rankings' ; chaque nouveau score
+incrémente cette version, relue au plus toutes les RANKINGS_CACHE_SECONDS.
+
+Le classement complet est paginé par curseur (keyset) sur
+(qcm_score DESC, qcm_completed_at ASC, id ASC) : une page profonde coûte
+autant que la première. Les rangs (compétition « 1224 » et dense « 1223 »)
+sont ancrés par une seule agrégation sur l'index de score.
+
+Clés Redis :
+  leaderboard:scores   zset  candidate_id -> qcm_score
+  leaderboard:built    str   présent une fois le zset construit en entier
+"""
+import base64
+import hashlib
+import json
+import logging
+from datetime import datetime
+from app import db, get_redis_client
+from app.models import Candidate
+from app.utils.cache import VersionedCache, bump_version
+from app.utils.http_cache import build_payload
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_KEY = 'leaderboard:scores'
+BUILT_KEY = 'leaderboard:built'
+REBUILD_LOCK_KEY = 'leaderboard:rebuild_lock'
+REBUILD_CHUNK = 1000
+
+# Statuts figurant au classement
+RANKED_STATUSES = ('validated', 'submitted')
+
+# Fraîcheur maximale des classements publics (cache serveur et Cache-Control)
+RANKINGS_CACHE_NAMESPACE = 'rankings'
+RANKINGS_CACHE_SECONDS = 15
+
+LEADERBOARD_PAGE_MAX = 200
+
+
+def generate_candidate_hash(candidate_id):
+    """Génère un hash court pour anonymiser le candidat"""
+    hash_input = f"olympiades_ia_benin_{candidate_id}_2026"
+    return hashlib.sha256(hash_input.encode()).hexdigest()[:6]
+
+
+def ranked_filters():
+    """Critères d'appartenance au classement"""
+    return (
+        Candidate.qcm_score.isnot(None),
+        Candidate.status.in_(RANKED_STATUSES)
+    )
+
+
+def ranking_order():
+    """Ordre total du classement (ex aequo départagés par l'heure de fin puis l'ID)"""
+    return (
+        Candidate.qcm_score.desc(),
+        Candidate.qcm_completed_at.asc().nullslast(),
+        Candidate.id.asc()
+    )
+
+
+def encode_cursor(score, completed_at, candidate_id, rank, dense_rank, position):
+    """Curseur opaque désignant la dernière ligne d'une page et son rang"""
+    raw = json.dumps([
+        score, completed_at.isoformat() if completed_at else None, candidate_id,
+        rank, dense_rank, position
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retourne (score, completed_at, id, rang, rang dense, position), ou None si le curseur est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        score, completed_at, candidate_id, rank, dense_rank, position = json.loads(raw)
+        return (
+            float(score),
+            datetime.fromisoformat(completed_at) if completed_at else None,
+            int(candidate_id),
+            int(rank),
+            int(dense_rank),
+            int(position)
+        )
+    except (ValueError, TypeError):
+        return None
+
+
+def _after_cursor(score, completed_at, candidate_id):
+    """Condition keyset : lignes situées après le curseur dans ranking_order()"""
+    if completed_at is None:
+        # Les heures de fin absentes sont triées en dernier
+        same_score = db.and_(Candidate.qcm_completed_at.is_(None), Candidate.id > candidate_id)
+    else:
+        same_score = db.or_(
+            Candidate.qcm_completed_at > completed_at,
+            Candidate.qcm_completed_at.is_(None),
+            db.and_(Candidate.qcm_completed_at == completed_at, Candidate.id > candidate_id)
+        )
+    return db.or_(
+        Candidate.qcm_score < score,
+        db.and_(Candidate.qcm_score == score, same_score)
+    )
+
+
+def assign_ranks(scores, previous=None, rank=0, dense=0, position=0):
+    """
+    Rangs de compétition et rangs denses d'une suite de scores triés
+    
+    Args:
+        scores: scores décroissants (une page)
+        previous: score de la dernière ligne de la page précédente (None = début)
+        rank, dense: rangs de cette dernière ligne
+        position: nombre de lignes des pages précédentes
+    
+    Returns:
+        list: (rang, rang dense) pour chaque score
+    """
+    ranks = []
+    for score in scores:
+        position += 1
+        if score != previous:
+            rank = position
+            dense += 1
+        ranks.append((rank, dense))
+        previous = score
+    return ranks
+
+
+def _count_ranked(region=None):
+    """Nombre de candidats classés (dans la région)"""
+    query = Candidate.query.filter(*ranked_filters())
+    if region:
+        query = query.filter(Candidate.region == region)
+    return query.count()
+
+
+def _load_rankings(key):
+    """Calcule et sérialise le top N (clé (région, limite))"""
+    return build_payload(LeaderboardService.compute_rankings(*key))
+
+
+# Un seul recalcul par clé et par worker à chaque changement de version
+_rankings_cache = VersionedCache(
+    RANKINGS_CACHE_NAMESPACE, _load_rankings,
+    check_interval=RANKINGS_CACHE_SECONDS, max_entries=256
+)
+
+# Total des pages du classement complet, même fraîcheur que les classements
+_totals_cache = VersionedCache(
+    RANKINGS_CACHE_NAMESPACE, _count_ranked,
+    check_interval=RANKINGS_CACHE_SECONDS, max_entries=256
+)
+
+
+class LeaderboardService:
+    """Maintenance et lecture du classement"""
+    
+    @staticmethod
+    def _client():
+        """Client Redis si le classement y est construit (le construit au besoin), sinon None"""
+        client = get_redis_client()
+        if not client:
+            return None
+        try:
+            if client.exists(BUILT_KEY):
+                return client
+            # Un seul worker reconstruit, les autres passent par la base en attendant
+            if client.set(REBUILD_LOCK_KEY, 1, nx=True, ex=60):
+                try:
+                    LeaderboardService.rebuild()
+                finally:
+                    client.delete(REBUILD_LOCK_KEY)
+                return client
+        except Exception as e:
+            logger.warning(f"Classement Redis indisponible: {e}")
+        return None
+    
+    @staticmethod
+    def backfill_hashes():
+        """Renseigne public_hash des candidats notés qui n'en ont pas encore"""
+        missing = db.session.query(Candidate.id).filter(
+            Candidate.qcm_score.isnot(None),
+            Candidate.public_hash.is_(None)
+        ).all()
+        if not missing:
+            return 0
+        
+        db.session.execute(db.update(Candidate), [
+            {'id': cand_id, 'public_hash': generate_candidate_hash(cand_id)}
+            for (cand_id,) in missing
+        ])
+        db.session.commit()
+        return len(missing)
+    
+    @staticmethod
+    def rebuild():
+        """Reconstruit entièrement le sorted set depuis la base"""
+        client = get_redis_client()
+        LeaderboardService.backfill_hashes()
+        if not client:
+            return 0
+        
+        rows = db.session.query(Candidate.id, Candidate.qcm_score).filter(*ranked_filters()).all()
+        
+        # Construction dans une clé temporaire puis RENAME atomique
+        temp_key = f"{LEADERBOARD_KEY}:rebuild"
+        pipe = client.pipeline()
+        pipe.delete(temp_key)
+        for start in range(0, len(rows), REBUILD_CHUNK):
+            pipe.zadd(temp_key, {str(cand_id): score for cand_id, score in rows[start:start + REBUILD_CHUNK]})
+        if rows:
+            pipe.rename(temp_key, LEADERBOARD_KEY)
+        else:
+            pipe.delete(LEADERBOARD_KEY)
+        pipe.set(BUILT_KEY, 1)
+        pipe.execute()
+        
+        logger.info(f"Classement reconstruit: {len(rows)} candidat(s)")
+        return len(rows)
+    
+    @staticmethod
+    def refresh(candidate_ids):
+        """
+        Répercute les scores/statuts actuels de candidats dans le classement
+        
+        À appeler après le commit qui a modifié leur qcm_score.
+        """
+        if not candidate_ids:
+            return
+        
+        rows = db.session.query(
+            Candidate.id,
+            Candidate.qcm_score,
+            Candidate.status,
+            Candidate.region,
+            Candidate.school_id,
+            Candidate.class_level
+        ).filter(Candidate.id.in_(list(candidate_ids))).all()
+        
+        from app.services.leaderboard_aggregate_service import LeaderboardAggregateService
+        LeaderboardAggregateService.mark_groups(rows)
+        
+        # Pas de vidage local : les workers relisent la version au plus
+        # toutes les RANKINGS_CACHE_SECONDS, les soumissions ne déclenchent
+        # donc pas un recalcul chacune
+        bump_version(RANKINGS_CACHE_NAMESPACE)
+        
+        client = get_redis_client()
+        if not client:
+            return
+        
+        try:
+            # Pas encore construit : la reconstruction complète les inclura
+            if not client.exists(BUILT_KEY):
+                return
+            pipe = client.pipeline()
+            for cand_id, score, status, *_ in rows:
+                if score is not None and status in RANKED_STATUSES:
+                    pipe.zadd(LEADERBOARD_KEY, {str(cand_id): score})
+                else:
+                    pipe.zrem(LEADERBOARD_KEY, str(cand_id))
+            pipe.execute()
+        except Exception as e:
+            # Le classement Redis est désormais faux : forcer une reconstruction
+            logger.warning(f"Mise à jour du classement impossible: {e}")
+            try:
+                client.delete(BUILT_KEY)
+            except Exception:
+                pass
+    
+    @staticmethod
+    def get_rank(candidate_hash):
+        """
+        Rang, total et percentile d'un candidat à partir de son hash public
+        
+        Returns:
+            tuple: (dict, error_message)
+        """
+        def _lookup():
+            return db.session.query(
+                Candidate.id, Candidate.qcm_score, Candidate.region
+            ).filter(
+                Candidate.public_hash == candidate_hash,
+                *ranked_filters()
+            ).order_by(Candidate.qcm_score.desc()).first()
+        
+        row = _lookup()
+        if not row and LeaderboardService.backfill_hashes():
+            row = _lookup()
+        if not row:
+            return None, "Candidat non trouvé"
+        
+        cand_id, score, region = row
+        
+        higher = total = None
+        client = LeaderboardService._client()
+        if client:
+            try:
+                pipe = client.pipeline()
+                pipe.zcount(LEADERBOARD_KEY, f"({score}", '+inf')
+                pipe.zcard(LEADERBOARD_KEY)
+                higher, total = pipe.execute()
+            except Exception as e:
+                logger.warning(f"Lecture du classement Redis impossible: {e}")
+                higher = total = None
+        
+        if total is None:
+            higher = Candidate.query.filter(*ranked_filters(), Candidate.qcm_score > score).count()
+            total = Candidate.query.filter(*ranked_filters()).count()
+        
+        rank = higher + 1
+        return {
+            'rank': rank,
+            'total': total,
+            'score': round(score, 1),
+            'region': region or 'Non spécifié',
+            'percentile': round((total - rank + 1) / total * 100, 1)
+        }, None
+    
+    @staticmethod
+    def compute_rankings(region=None, limit=100):
+        """Top `limit` anonymisé et statistiques globales (2 requêtes)"""
+        query = db.session.query(
+            Candidate.id,
+            Candidate.region,
+            Candidate.qcm_score,
+            Candidate.school_name,
+            Candidate.public_hash
+        ).filter(*ranked_filters())
+        
+        if region:
+            query = query.filter(Candidate.region == region)
+        
+        results = query.order_by(*ranking_order()).limit(limit).all()
+        
+        # Ex aequo au même rang (la page commence au premier du classement)
+        ranks = assign_ranks([row.qcm_score for row in results])
+        
+        rankings = []
+        for (rank, _), (cand_id, cand_region, score, school, public_hash) in zip(ranks, results):
+            rankings.append({
+                'rank': rank,
+                'region': cand_region or 'Non spécifié',
+                'score': round(score, 1) if score else 0,
+                'candidate_id_hash': public_hash or generate_candidate_hash(cand_id),
+                'school': school[:30] + '...' if school and len(school) > 30 else school
+            })
+        
+        # Statistiques globales en une requête
+        total_with_score, avg_score = db.session.query(
+            db.func.count(Candidate.qcm_score),
+            db.func.avg(Candidate.qcm_score)
+        ).filter(Candidate.qcm_score.isnot(None)).one()
+        
+        return {
+            'rankings': rankings,
+            'stats': {
+                'total_candidates': total_with_score,
+                'average_score': round(avg_score or 0, 1),
+                'filtered_region': region
+            }
+        }
+    
+    @staticmethod
+    def get_rankings(region=None, limit=100):
+        """Réponse sérialisée du classement (CachedPayload)"""
+        return _rankings_cache.get((region, limit))
+    
+    @staticmethod
+    def get_page(cursor=None, limit=50, region=None):
+        """
+        Page du classement complet (pagination par curseur)
+        
+        Une requête par page : le curseur porte le rang de sa dernière
+        ligne, d'où repartent les rangs de la page suivante ; le total vient
+        du cache des classements (même fraîcheur que le top N).
+        
+        Returns:
+            tuple: (dict, error_message)
+        """
+        query = db.session.query(
+            Candidate.id,
+            Candidate.region,
+            Candidate.qcm_score,
+            Candidate.qcm_completed_at,
+            Candidate.school_name,
+            Candidate.public_hash
+        ).filter(*ranked_filters())
+        
+        if region:
+            query = query.filter(Candidate.region == region)
+        
+        previous, rank, dense, position = None, 0, 0, 0
+        if cursor:
+            decoded = decode_cursor(cursor)
+            if not decoded:
+                return None, "Curseur invalide"
+            query = query.filter(_after_cursor(*decoded[:3]))
+            previous = decoded[0]
+            rank, dense, position = decoded[3:]
+        
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        rows = query.order_by(*ranking_order()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        ranks = assign_ranks([row.qcm_score for row in rows], previous, rank, dense, position)
+        # Le total en cache peut retarder de quelques secondes sur les pages servies
+        total = max(_totals_cache.get(region), position + len(rows))
+        
+        entries = []
+        for (rank, dense_rank), row in zip(ranks, rows):
+            entries.append({
+                'rank': rank,
+                'dense_rank': dense_rank,
+                'percentile': round((total - rank + 1) / total * 100, 1),
+                'region': row.region or 'Non spécifié',
+                'score': round(row.qcm_score, 1),
+                'candidate_id_hash': row.public_hash or generate_candidate_hash(row.id),
+                'school': row.school_name[:30] + '...' if row.school_name and len(row.school_name) > 30 else row.school_name
+            })
+        
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                last.qcm_score, last.qcm_completed_at, last.id,
+                *ranks[-1], position + len(rows)
+            )
+        return {
+            'entries': entries,
+            'total': total,
+            'limit': limit,
+            'region': region,
+            'next_cursor': next_cursor
+        }, None
@@ -3,23 +3,93 @@ Service de gestion du QCM
 """
 from datetime import datetime
 import random
+from flask import g, has_request_context
+from redis.exceptions import RedisError
 from app import db
 from app.models import Candidate, Question, QCMAttempt, QCMSettings, AuditLog
+from app.services.question_bank_service import QuestionBankService
+from app.services.exam_form_service import ExamFormService
+from app.services.attempt_state_service import AttemptStateStore
+from app.services.attempt_answer_service import AttemptAnswerService
+from app.services.scoring_service import AnswerKey, ScoringService, score_answers
+from app.services.question_stats_service import QuestionStatsService
+from app.services.leaderboard_service import LeaderboardService, generate_candidate_hash
+from app.services.stats_service import StatsService
+from app.services.item_analysis_service import ItemAnalysisService
+
+
+class QCMEligibility:
+    """
+    Situation d'un candidat vis-à-vis du QCM
+    
+    Regroupe le candidat, sa dernière tentative en cours, sa dernière
+    tentative terminée et les paramètres, chargés en deux requêtes.
+    """
+    
+    __slots__ = ('candidate', 'in_progress', 'completed', 'settings')
+    
+    def __init__(self, candidate, in_progress, completed, settings):
+        self.candidate = candidate
+        self.in_progress = in_progress
+        self.completed = completed
+        self.settings = settings
 
 
 class QCMService:
     """Gère le passage du QCM"""
     
+    # Nombre max de changements acceptés par lot de réponses
+    MAX_BATCH_CHANGES = 200
+    
     @staticmethod
     def get_settings():
         """Récupère les paramètres du QCM"""
-        settings = QCMSettings.get_settings()
+        settings = QCMSettings.get_cached()
         return settings.to_dict(), None
     
+    @staticmethod
+    def get_eligibility(user_id):
+        """
+        Résout la situation QCM du candidat, une seule fois par requête HTTP
+        
+        Returns:
+            QCMEligibility (candidate à None si pas de profil candidat)
+        """
+        memo = g.setdefault('qcm_eligibility', {}) if has_request_context() else {}
+        if user_id not in memo:
+            memo[user_id] = QCMService._resolve_eligibility(user_id)
+        return memo[user_id]
+    
+    @staticmethod
+    def _resolve_eligibility(user_id):
+        """Charge candidat et tentatives (une jointure) puis les paramètres"""
+        rows = db.session.query(Candidate, QCMAttempt).outerjoin(
+            QCMAttempt,
+            db.and_(
+                QCMAttempt.candidate_id == Candidate.id,
+                QCMAttempt.status.in_(('in_progress', 'completed'))
+            )
+        ).filter(
+            Candidate.user_id == user_id
+        ).order_by(QCMAttempt.id.desc()).all()
+        
+        candidate = rows[0][0] if rows else None
+        in_progress = next((a for _, a in rows if a and a.status == 'in_progress'), None)
+        completed = next((a for _, a in rows if a and a.status == 'completed'), None)
+        
+        return QCMEligibility(candidate, in_progress, completed, QCMSettings.get_cached())
+    
+    @staticmethod
+    def _forget_eligibility(user_id):
+        """Oublie la situation mémorisée après un changement de tentative"""
+        if has_request_context():
+            g.get('qcm_eligibility', {}).pop(user_id, None)
+    
     @staticmethod
     def can_start_qcm(user_id):
         """Vérifie si le candidat peut passer le QCM"""
-        candidate = Candidate.query.filter_by(user_id=user_id).first()
+        eligibility = QCMService.get_eligibility(user_id)
+        candidate = eligibility.candidate
         
         if not candidate:
             return False, "Profil candidat non trouvé"
@@ -29,31 +99,23 @@ class QCMService:
             return False, "Votre candidature doit être validée pour passer le QCM"
         
         # Vérifier s'il a déjà passé le QCM
-        existing = QCMAttempt.query.filter_by(
-            candidate_id=candidate.id,
-            status='completed'
-        ).first()
-        
-        if existing:
+        if eligibility.completed:
             return False, "Vous avez déjà passé le QCM"
         
         # Vérifier s'il a une tentative en cours
-        in_progress = QCMAttempt.query.filter_by(
-            candidate_id=candidate.id,
-            status='in_progress'
-        ).first()
+        in_progress = eligibility.in_progress
         
         if in_progress:
             if in_progress.is_expired:
                 # Marquer comme expiré
-                in_progress.status = 'expired'
-                db.session.commit()
+                QCMService._expire_attempt(in_progress)
+                eligibility.in_progress = None
                 return False, "Votre temps est écoulé. Le QCM a été clôturé."
             else:
                 return True, "Tentative en cours"
         
         # Vérifier si le QCM est ouvert
-        settings = QCMSettings.get_settings()
+        settings = eligibility.settings
         if not settings.is_open:
             return False, "Le QCM n'est pas ouvert actuellement"
         
@@ -67,35 +129,55 @@ class QCMService:
         if not can_start:
             return None, message
         
-        candidate = Candidate.query.filter_by(user_id=user_id).first()
-        settings = QCMSettings.get_settings()
+        eligibility = QCMService.get_eligibility(user_id)
+        candidate = eligibility.candidate
+        settings = eligibility.settings
         
-        # Vérifier s'il y a une tentative en cours
-        existing = QCMAttempt.query.filter_by(
-            candidate_id=candidate.id,
-            status='in_progress'
-        ).first()
+        # Tentative en cours (déjà vérifiée non expirée par can_start_qcm)
+        existing = eligibility.in_progress
         
         if existing and not existing.is_expired:
             # Retourner la tentative existante
-            questions = Question.query.filter(
-                Question.id.in_(existing.get_question_ids_list())
-            ).all()
+            ordered_questions = QCMService._load_questions(existing.get_question_ids_list())
             
-            # Respecter l'ordre original
-            question_map = {q.id: q for q in questions}
-            ordered_questions = [question_map[qid] for qid in existing.get_question_ids_list()]
+            # Les réponses les plus récentes peuvent n'exister qu'en lignes ou dans l'état chaud
+            if AttemptAnswerService.enabled():
+                AttemptAnswerService.overlay(existing)
+            answers = existing.get_answers_list()
+            store = AttemptStateStore.get()
+            if store:
+                try:
+                    if store.get_meta(existing.id):
+                        answers, _ = store.get_answers(existing.id, len(answers))
+                except RedisError as e:
+                    AttemptStateStore.mark_unavailable(e)
             
             return {
                 'attempt_id': existing.id,
                 'time_remaining_seconds': existing.time_remaining_seconds,
                 'total_questions': existing.total_questions,
                 'questions': [q.to_dict(include_answer=False) for q in ordered_questions],
-                'answers': existing.get_answers_list()
+                'answers': answers
             }, None
         
-        # Sélectionner les questions aléatoirement
-        questions = QCMService._select_questions(settings)
+        # Attribuer un cahier pré-généré ; à défaut, tirage à la volée (snapshot)
+        form = ExamFormService.pick_form(settings)
+        if form:
+            question_ids = list(form.question_ids)
+            if settings.randomize_questions:
+                random.shuffle(question_ids)
+        else:
+            question_ids = QCMService._select_questions(settings)
+        
+        questions = QCMService._load_questions(question_ids)
+        
+        # Snapshot en retard sur la base (question supprimée ou désactivée depuis) :
+        # on le recharge et on refait le tirage plutôt que de poser moins de questions
+        if len(questions) < len(question_ids) or not all(q.is_active for q in questions):
+            QuestionBankService.invalidate()
+            form = None
+            question_ids = QCMService._select_questions(settings)
+            questions = QCMService._load_questions(question_ids)
         
         if len(questions) < settings.total_questions:
             return None, f"Pas assez de questions disponibles ({len(questions)}/{settings.total_questions})"
@@ -105,10 +187,11 @@ class QCMService:
             candidate_id=candidate.id,
             time_limit_minutes=settings.duration_minutes,
             total_questions=len(questions),
-            question_ids=','.join(str(q.id) for q in questions),
-            answers=','.join(['-1'] * len(questions)),  # -1 = pas répondu
-            status='in_progress'
+            status='in_progress',
+            form_id=form.id if form else None
         )
+        attempt.set_question_ids([q.id for q in questions])
+        attempt.set_answers([-1] * len(questions))  # -1 = pas répondu
         
         db.session.add(attempt)
         
@@ -121,6 +204,15 @@ class QCMService:
         )
         
         db.session.commit()
+        QCMService._forget_eligibility(user_id)
+        
+        store = AttemptStateStore.get()
+        if store:
+            # Sinon initialisé au premier accès (_get_hot_attempt)
+            try:
+                store.init_attempt(attempt, user_id)
+            except RedisError as e:
+                AttemptStateStore.mark_unavailable(e)
         
         return {
             'attempt_id': attempt.id,
@@ -132,31 +224,146 @@ class QCMService:
     
     @staticmethod
     def _select_questions(settings):
-        """Sélectionne les questions selon les paramètres"""
-        questions = []
-        
-        # Par difficulté
-        easy = Question.query.filter_by(difficulty='easy', is_active=True).all()
-        medium = Question.query.filter_by(difficulty='medium', is_active=True).all()
-        hard = Question.query.filter_by(difficulty='hard', is_active=True).all()
+        """Sélectionne les IDs de questions selon les paramètres"""
+        return QuestionBankService.select_question_ids(settings)
+    
+    @staticmethod
+    def _load_questions(question_ids):
+        """Charge les questions par clé primaire, dans l'ordre donné"""
+        if not question_ids:
+            return []
+        questions = Question.query.filter(Question.id.in_(question_ids)).all()
+        question_map = {q.id: q for q in questions}
+        return [question_map[qid] for qid in question_ids if qid in question_map]
+    
+    @staticmethod
+    def _expire_attempt(attempt, store=None):
+        """Clôture une tentative expirée, après recopie de son état chaud"""
+        store = store or AttemptStateStore.get()
+        if store:
+            store = QCMService._sync_hot_state(store, attempt)
+        AttemptAnswerService.seal(attempt)
+        attempt.status = 'expired'
+        db.session.commit()
+        if store:
+            QCMService._discard_hot_state(store, attempt.id)
+    
+    @staticmethod
+    def _sync_hot_state(store, attempt):
+        """
+        Recopie l'état chaud dans la tentative avant clôture
         
-        if settings.randomize_questions:
-            random.shuffle(easy)
-            random.shuffle(medium)
-            random.shuffle(hard)
+        Returns:
+            le store, ou None si Redis est indisponible (la base fait foi)
+        """
+        try:
+            store.sync_into(attempt)
+            return store
+        except RedisError as e:
+            AttemptStateStore.mark_unavailable(e)
+            return None
+    
+    @staticmethod
+    def _discard_hot_state(store, attempt_id):
+        """Supprime l'état chaud d'une tentative close (à défaut, il expire avec son TTL)"""
+        try:
+            store.discard(attempt_id)
+        except RedisError as e:
+            AttemptStateStore.mark_unavailable(e)
+    
+    @staticmethod
+    def _get_hot_attempt(store, user_id, attempt_id):
+        """
+        Retourne les métadonnées Redis d'une tentative en cours du candidat
+        
+        L'état chaud est initialisé depuis la base au premier accès (redémarrage,
+        tentative démarrée sans Redis...). Une tentative expirée est clôturée.
+        
+        Returns:
+            tuple: (meta, error_message)
+        """
+        meta = store.get_meta(attempt_id)
+        
+        if meta is None:
+            candidate = Candidate.query.filter_by(user_id=user_id).first()
+            if not candidate:
+                return None, "Candidat non trouvé"
+            
+            attempt = QCMAttempt.query.filter_by(
+                id=attempt_id,
+                candidate_id=candidate.id,
+                status='in_progress'
+            ).first()
+            
+            if not attempt:
+                return None, "Tentative non trouvée ou déjà terminée"
+            
+            if attempt.is_expired:
+                QCMService._expire_attempt(attempt, store)
+                return None, "Temps écoulé"
+            
+            if AttemptAnswerService.enabled():
+                AttemptAnswerService.overlay(attempt)
+            store.init_attempt(attempt, user_id)
+            meta = store.get_meta(attempt_id)
         
-        questions.extend(easy[:settings.easy_count])
-        questions.extend(medium[:settings.medium_count])
-        questions.extend(hard[:settings.hard_count])
+        elif meta['user_id'] != user_id:
+            return None, "Tentative non trouvée ou déjà terminée"
         
-        if settings.randomize_questions:
-            random.shuffle(questions)
+        if store.is_expired(meta):
+            attempt = QCMAttempt.query.get(attempt_id)
+            if attempt and attempt.status == 'in_progress':
+                QCMService._expire_attempt(attempt, store)
+            else:
+                store.discard(attempt_id)
+            return None, "Temps écoulé"
         
-        return questions
+        return meta, None
+    
+    @staticmethod
+    def _validate_answer_changes(changes, total_questions):
+        """Vérifie les index d'un lot de changements, retourne un message d'erreur ou None"""
+        for question_index, answer_index, _ in changes:
+            if not 0 <= question_index < total_questions:
+                return "Index de question invalide"
+            if not QCMAttempt.is_valid_answer(answer_index):
+                return "Index de réponse invalide"
+        return None
     
     @staticmethod
     def save_answer(user_id, attempt_id, question_index, answer_index):
         """Sauvegarde une réponse"""
+        try:
+            question_index = int(question_index)
+            answer_index = int(answer_index)
+        except (TypeError, ValueError):
+            return None, "Index de question ou de réponse invalide"
+        change = [(question_index, answer_index, None)]
+        
+        store = AttemptStateStore.get()
+        if store:
+            try:
+                meta, error = QCMService._get_hot_attempt(store, user_id, attempt_id)
+                if error:
+                    return None, error
+                
+                error = QCMService._validate_answer_changes(change, meta['total_questions'])
+                if error:
+                    return None, error
+                
+                if store.apply_answers(attempt_id, change, meta['total_questions']) is None:
+                    return None, "Tentative non trouvée ou déjà terminée"
+                
+                return {
+                    'saved': True,
+                    'question_index': question_index,
+                    'answer_index': answer_index,
+                    'time_remaining_seconds': store.time_remaining_seconds(meta)
+                }, None
+            except RedisError as e:
+                # Redis tombé en cours de route : écriture directe en base
+                AttemptStateStore.mark_unavailable(e)
+        
         candidate = Candidate.query.filter_by(user_id=user_id).first()
         if not candidate:
             return None, "Candidat non trouvé"
@@ -171,25 +378,127 @@ class QCMService:
             return None, "Tentative non trouvée ou déjà terminée"
         
         if attempt.is_expired:
-            attempt.status = 'expired'
-            db.session.commit()
+            QCMService._expire_attempt(attempt)
             return None, "Temps écoulé"
         
-        # Mettre à jour la réponse
+        # Mettre à jour la réponse (index vérifiés avant l'encodage int8)
         answers = attempt.get_answers_list()
-        if 0 <= question_index < len(answers):
+        error = QCMService._validate_answer_changes(change, len(answers))
+        if error:
+            return None, error
+        
+        if AttemptAnswerService.enabled():
+            AttemptAnswerService.upsert(attempt, change)
+        else:
             answers[question_index] = answer_index
             attempt.set_answers(answers)
-            db.session.commit()
-            
-            return {
-                'saved': True,
-                'question_index': question_index,
-                'answer_index': answer_index,
-                'time_remaining_seconds': attempt.time_remaining_seconds
-            }, None
+        db.session.commit()
         
-        return None, "Index de question invalide"
+        return {
+            'saved': True,
+            'question_index': question_index,
+            'answer_index': answer_index,
+            'time_remaining_seconds': attempt.time_remaining_seconds
+        }, None
+    
+    @staticmethod
+    def save_answers_batch(user_id, attempt_id, changes):
+        """
+        Sauvegarde un lot de réponses en une seule écriture
+        
+        Chaque changement porte l'horodatage client de la saisie : une réponse
+        n'est remplacée que par un changement plus récent (last-write-wins),
+        ce qui rend les renvois tardifs ou en double sans effet.
+        
+        Args:
+            changes: liste de dicts {question_index, answer_index, client_ts}
+        """
+        if not isinstance(changes, list) or not changes:
+            return None, "Liste de changements requise"
+        if len(changes) > QCMService.MAX_BATCH_CHANGES:
+            return None, f"Trop de changements (max {QCMService.MAX_BATCH_CHANGES})"
+        
+        parsed = []
+        for change in changes:
+            try:
+                parsed.append((
+                    int(change['question_index']),
+                    int(change['answer_index']),
+                    int(change['client_ts'])
+                ))
+            except (KeyError, TypeError, ValueError):
+                return None, "Chaque changement requiert question_index, answer_index et client_ts"
+        
+        store = AttemptStateStore.get()
+        if store:
+            try:
+                meta, error = QCMService._get_hot_attempt(store, user_id, attempt_id)
+                if error:
+                    return None, error
+                
+                error = QCMService._validate_answer_changes(parsed, meta['total_questions'])
+                if error:
+                    return None, error
+                
+                result = store.apply_answers(attempt_id, parsed, meta['total_questions'])
+                if result is None:
+                    return None, "Tentative non trouvée ou déjà terminée"
+                
+                applied, stale = result
+                return {
+                    'saved': True,
+                    'applied': applied,
+                    'stale': stale,
+                    'time_remaining_seconds': store.time_remaining_seconds(meta)
+                }, None
+            except RedisError as e:
+                AttemptStateStore.mark_unavailable(e)
+        
+        candidate = Candidate.query.filter_by(user_id=user_id).first()
+        if not candidate:
+            return None, "Candidat non trouvé"
+        
+        rows_enabled = AttemptAnswerService.enabled()
+        query = QCMAttempt.query.filter_by(
+            id=attempt_id,
+            candidate_id=candidate.id,
+            status='in_progress'
+        )
+        if not rows_enabled:
+            # Verrou de ligne : deux lots concurrents ne peuvent pas s'écraser
+            query = query.with_for_update()
+        attempt = query.first()
+        
+        if not attempt:
+            return None, "Tentative non trouvée ou déjà terminée"
+        
+        if attempt.is_expired:
+            QCMService._expire_attempt(attempt)
+            return None, "Temps écoulé"
+        
+        error = QCMService._validate_answer_changes(parsed, len(attempt.answer_array))
+        if error:
+            db.session.rollback()
+            return None, error
+        
+        if rows_enabled:
+            # Upsert des seules lignes modifiées, last-write-wins arbitré par la base
+            applied, stale = AttemptAnswerService.upsert(attempt, parsed)
+        else:
+            answers = attempt.get_answers_list()
+            stamps = attempt.get_answer_timestamps_list()
+            applied, stale = QCMAttempt.merge_answer_changes(answers, stamps, parsed)
+            if applied:
+                attempt.set_answers(answers)
+                attempt.set_answer_timestamps(stamps)
+        db.session.commit()
+        
+        return {
+            'saved': True,
+            'applied': applied,
+            'stale': stale,
+            'time_remaining_seconds': attempt.time_remaining_seconds
+        }, None
     
     @staticmethod
     def submit_qcm(user_id, attempt_id):
@@ -198,10 +507,11 @@ class QCMService:
         if not candidate:
             return None, "Candidat non trouvé"
         
+        # Verrou de ligne : empêche une double soumission et le flush concurrent
         attempt = QCMAttempt.query.filter_by(
             id=attempt_id,
             candidate_id=candidate.id
-        ).first()
+        ).with_for_update().first()
         
         if not attempt:
             return None, "Tentative non trouvée"
@@ -209,43 +519,21 @@ class QCMService:
         if attempt.status == 'completed':
             return None, "QCM déjà soumis"
         
-        # Calculer le score
-        questions = Question.query.filter(
-            Question.id.in_(attempt.get_question_ids_list())
-        ).all()
-        question_map = {q.id: q for q in questions}
+        # Recopier les dernières réponses (état chaud, lignes) avant le calcul
+        store = AttemptStateStore.get()
+        if store:
+            store = QCMService._sync_hot_state(store, attempt)
+        AttemptAnswerService.seal(attempt)
         
-        answers = attempt.get_answers_list()
+        # Calculer le score (clé de correction compacte, sans charger les questions)
         question_ids = attempt.get_question_ids_list()
+        key = AnswerKey.build(question_ids)
+        result = score_answers(key, attempt.answer_array)
+        score = result.score
+        correct_count = result.correct_count
         
-        correct_count = 0
-        results = []
-        
-        for i, qid in enumerate(question_ids):
-            question = question_map.get(qid)
-            if question:
-                user_answer = answers[i] if i < len(answers) else -1
-                is_correct = question.check_answer(user_answer)
-                
-                if is_correct:
-                    correct_count += 1
-                
-                # Mettre à jour les stats de la question
-                question.times_shown += 1
-                if is_correct:
-                    question.times_correct += 1
-                
-                results.append({
-                    'question_id': qid,
-                    'question_text': question.text,
-                    'user_answer': user_answer,
-                    'correct_answer': question.correct_answer,
-                    'is_correct': is_correct,
-                    'options': question.options
-                })
-        
-        # Calculer le score
-        score = round((correct_count / len(question_ids)) * 100, 2) if question_ids else 0
+        # Stats des questions : ajout seul, agrégées en différé
+        QuestionStatsService.record_attempt(key, result)
         
         # Mettre à jour la tentative
         attempt.status = 'completed'
@@ -256,6 +544,8 @@ class QCMService:
         # Mettre à jour le candidat
         candidate.qcm_score = score
         candidate.qcm_completed_at = datetime.utcnow()
+        if not candidate.public_hash:
+            candidate.public_hash = generate_candidate_hash(candidate.id)
         
         # Log
         AuditLog.log(
@@ -267,6 +557,11 @@ class QCMService:
         )
         
         db.session.commit()
+        QCMService._forget_eligibility(user_id)
+        LeaderboardService.refresh([candidate.id])
+        
+        if store:
+            QCMService._discard_hot_state(store, attempt.id)
         
         # Notification automatique au candidat
         try:
@@ -275,7 +570,24 @@ class QCMService:
         except Exception:
             pass  # Ne pas bloquer si la notification échoue
         
-        settings = QCMSettings.get_settings()
+        settings = QCMSettings.get_cached()
+        
+        # Le détail (textes, options) n'est chargé que s'il est affiché
+        results = None
+        if settings.show_score_immediately:
+            question_map = {q.id: q for q in QCMService._load_questions(question_ids)}
+            results = []
+            for i, qid in enumerate(question_ids):
+                question = question_map.get(qid)
+                if question:
+                    results.append({
+                        'question_id': qid,
+                        'question_text': question.text,
+                        'user_answer': result.answers[i],
+                        'correct_answer': question.correct_answer,
+                        'is_correct': bool(result.correct[i]),
+                        'options': question.options
+                    })
         
         return {
             'score': score,
@@ -284,7 +596,44 @@ class QCMService:
             'passed': score >= settings.passing_score,
             'passing_score': settings.passing_score,
             'duration_minutes': attempt.duration_minutes,
-            'results': results if settings.show_score_immediately else None
+            'results': results
+        }, None
+    
+    @staticmethod
+    def report_cheat_event(user_id, attempt_id, event_type):
+        """Enregistre un événement anti-triche sur la tentative en cours"""
+        store = AttemptStateStore.get()
+        if store:
+            try:
+                meta, error = QCMService._get_hot_attempt(store, user_id, attempt_id)
+                if error:
+                    return None, error
+                return store.add_cheat_event(attempt_id, event_type), None
+            except RedisError as e:
+                AttemptStateStore.mark_unavailable(e)
+        
+        candidate = Candidate.query.filter_by(user_id=user_id).first()
+        if not candidate:
+            return None, "Candidat non trouvé"
+        
+        attempt = QCMAttempt.query.filter_by(
+            id=attempt_id,
+            candidate_id=candidate.id
+        ).first()
+        
+        if not attempt:
+            return None, "Tentative non trouvée"
+        
+        if attempt.status != 'in_progress':
+            return None, "La tentative n'est plus en cours"
+        
+        attempt.add_cheat_event(event_type)
+        db.session.commit()
+        
+        return {
+            'tab_switches': attempt.tab_switches or 0,
+            'fullscreen_exits': attempt.fullscreen_exits or 0,
+            'is_flagged': attempt.is_flagged or False
         }, None
     
     @staticmethod
@@ -302,44 +651,35 @@ class QCMService:
         if not attempt:
             return None, "Aucun QCM complété"
         
-        settings = QCMSettings.get_settings()
+        settings = QCMSettings.get_cached()
         
         # Construire le détail question par question
         question_ids = attempt.get_question_ids_list()
-        user_answers = attempt.get_answers_list()
+        key = AnswerKey.build(question_ids)
+        result = score_answers(key, attempt.answer_array)
         
         details = []
         if question_ids:
-            questions = {q.id: q for q in Question.query.filter(Question.id.in_(question_ids)).all()}
+            questions = {q.id: q for q in QCMService._load_questions(question_ids)}
             
             for idx, qid in enumerate(question_ids):
                 q = questions.get(qid)
                 if not q:
                     continue
                 
-                user_answer = user_answers[idx] if idx < len(user_answers) else -1
-                is_correct = user_answer == q.correct_answer
-                
                 details.append({
                     'question_index': idx + 1,
                     'text': q.text,
                     'options': [q.option_a, q.option_b, q.option_c, q.option_d],
                     'correct_answer': q.correct_answer,
-                    'user_answer': user_answer,
-                    'is_correct': is_correct,
+                    'user_answer': result.answers[idx],
+                    'is_correct': bool(result.correct[idx]),
                     'category': q.category,
                     'difficulty': q.difficulty
                 })
         
-        # Stats par catégorie
-        category_stats = {}
-        for d in details:
-            cat = d['category'] or 'Autre'
-            if cat not in category_stats:
-                category_stats[cat] = {'total': 0, 'correct': 0}
-            category_stats[cat]['total'] += 1
-            if d['is_correct']:
-                category_stats[cat]['correct'] += 1
+        # Stats par catégorie (calculées par le moteur de correction)
+        category_stats = result.category_stats
         
         return {
             'score': attempt.score,
@@ -359,20 +699,17 @@ class QCMService:
     @staticmethod
     def get_attempt_status(user_id):
         """Vérifie le statut de la tentative du candidat"""
-        candidate = Candidate.query.filter_by(user_id=user_id).first()
-        if not candidate:
+        eligibility = QCMService.get_eligibility(user_id)
+        if not eligibility.candidate:
             return None, "Candidat non trouvé"
         
         # Vérifier tentative en cours
-        in_progress = QCMAttempt.query.filter_by(
-            candidate_id=candidate.id,
-            status='in_progress'
-        ).first()
+        in_progress = eligibility.in_progress
         
         if in_progress:
             if in_progress.is_expired:
-                in_progress.status = 'expired'
-                db.session.commit()
+                QCMService._expire_attempt(in_progress)
+                eligibility.in_progress = None
                 return {'status': 'expired', 'can_start': False}, None
             return {
                 'status': 'in_progress',
@@ -382,10 +719,7 @@ class QCMService:
             }, None
         
         # Vérifier si complété
-        completed = QCMAttempt.query.filter_by(
-            candidate_id=candidate.id,
-            status='completed'
-        ).first()
+        completed = eligibility.completed
         
         if completed:
             return {
@@ -394,7 +728,7 @@ class QCMService:
                 'can_start': False
             }, None
         
-        # Peut commencer
+        # Peut commencer (situation déjà résolue, sans nouvelle requête)
         can_start, message = QCMService.can_start_qcm(user_id)
         return {
             'status': 'not_started',
@@ -403,9 +737,40 @@ class QCMService:
         }, None
 
 
+QUESTION_EXPORT_HEADERS = [
+    'ID', 'Texte', 'Option A', 'Option B', 'Option C', 'Option D',
+    'Réponse correcte', 'Catégorie', 'Difficulté', 'Actif',
+    'Fois affichée', 'Fois correcte', 'Taux réussite'
+]
+
+
 class QCMAdminService:
     """Gestion admin du QCM"""
     
+    @staticmethod
+    def count_questions():
+        """Nombre de questions exportées"""
+        return db.session.query(db.func.count(Question.id)).scalar()
+    
+    @staticmethod
+    def iter_question_rows():
+        """Lignes d'export des questions (curseur côté serveur, sans objets ORM)"""
+        query = db.session.query(
+            Question.id, Question.text, Question.option_a, Question.option_b,
+            Question.option_c, Question.option_d, Question.correct_answer,
+            Question.category, Question.difficulty, Question.is_active,
+            Question.times_shown, Question.times_correct
+        ).order_by(Question.id)
+        
+        for row in query.yield_per(1000):
+            shown, correct = row.times_shown, row.times_correct
+            yield [
+                *row[:9],
+                'Oui' if row.is_active else 'Non',
+                shown, correct,
+                round((correct or 0) / shown * 100, 1) if shown else 0
+            ]
+    
     @staticmethod
     def get_all_questions(filters=None, page=1, per_page=20):
         """Liste toutes les questions"""
@@ -424,8 +789,16 @@ class QCMAdminService:
         query = query.order_by(Question.created_at.desc())
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
+        # Indicateurs de la dernière analyse des items (une requête pour la page)
+        item_stats = ItemAnalysisService.get_item_stats([q.id for q in pagination.items])
+        questions = []
+        for q in pagination.items:
+            data = q.to_dict(include_answer=True)
+            data['item_stats'] = item_stats.get(q.id)
+            questions.append(data)
+        
         return {
-            'questions': [q.to_dict(include_answer=True) for q in pagination.items],
+            'questions': questions,
             'total': pagination.total,
             'pages': pagination.pages,
             'current_page': page
@@ -454,6 +827,7 @@ class QCMAdminService:
         
         db.session.add(question)
         db.session.commit()
+        QuestionBankService.invalidate()
         
         return question.to_dict(include_answer=True), None
     
@@ -467,12 +841,24 @@ class QCMAdminService:
         fields = ['text', 'option_a', 'option_b', 'option_c', 'option_d', 
                   'correct_answer', 'category', 'difficulty', 'is_active']
         
+        answer_changed = (
+            'correct_answer' in data
+            and data['correct_answer'] is not None
+            and int(data['correct_answer']) != question.correct_answer
+        )
+        
         for field in fields:
             if field in data:
                 setattr(question, field, data[field])
         
         db.session.commit()
-        return question.to_dict(include_answer=True), None
+        QuestionBankService.invalidate()
+        
+        result = question.to_dict(include_answer=True)
+        if answer_changed:
+            # Recorriger les copies déjà rendues avec la nouvelle bonne réponse
+            result['rescored_attempts'] = ScoringService.rescore_question(question.id)
+        return result, None
     
     @staticmethod
     def delete_question(question_id):
@@ -483,6 +869,7 @@ class QCMAdminService:
         
         db.session.delete(question)
         db.session.commit()
+        QuestionBankService.invalidate()
         return {'deleted': True}, None
     
     @staticmethod
@@ -505,13 +892,15 @@ class QCMAdminService:
         
         settings.updated_by = admin_id
         db.session.commit()
+        QCMSettings.invalidate_cache()
         
         return settings.to_dict(), None
     
     @staticmethod
     def get_qcm_stats():
         """Statistiques du QCM"""
-        total_attempts = QCMAttempt.query.filter_by(status='completed').count()
+        attempts = StatsService.get_counters()['attempts']
+        total_attempts = attempts['completed']
         
         if total_attempts == 0:
             return {
@@ -521,24 +910,17 @@ class QCMAdminService:
                 'average_duration': 0
             }, None
         
-        avg_score = db.session.query(db.func.avg(QCMAttempt.score)).filter(
-            QCMAttempt.status == 'completed'
-        ).scalar() or 0
-        
-        settings = QCMSettings.get_settings()
-        passed = QCMAttempt.query.filter(
-            QCMAttempt.status == 'completed',
-            QCMAttempt.score >= settings.passing_score
-        ).count()
+        # Questions actives : instantané en mémoire, sans requête
+        bank = QuestionBankService.get_snapshot()
         
         return {
             'total_attempts': total_attempts,
-            'average_score': round(avg_score, 2),
-            'pass_rate': round((passed / total_attempts) * 100, 2),
-            'total_questions': Question.query.filter_by(is_active=True).count(),
+            'average_score': round(attempts['average_score'], 2),
+            'pass_rate': round((attempts['passed'] / total_attempts) * 100, 2),
+            'total_questions': bank.count(),
             'by_difficulty': {
-                'easy': Question.query.filter_by(difficulty='easy', is_active=True).count(),
-                'medium': Question.query.filter_by(difficulty='medium', is_active=True).count(),
-                'hard': Question.query.filter_by(difficulty='hard', is_active=True).count()
+                'easy': bank.count('easy'),
+                'medium': bank.count('medium'),
+                'hard': bank.count('hard')
             }
         }, None
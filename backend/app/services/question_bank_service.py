@@ -0,0 +1,98 @@
+"""
+Snapshot en mémoire de la banque de questions actives
+
+Évite de relire toute la table `questions` à chaque démarrage de QCM :
+chaque worker garde une copie compacte (tuples) de la banque active,
+regroupée par difficulté, et ne la recharge que lorsque la version
+partagée change (création, modification, suppression ou import).
+"""
+import random
+from collections import namedtuple
+from types import MappingProxyType
+from app import db
+from app.models import Question
+from app.utils.cache import VersionedCache
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Entrée compacte d'une question (sans texte ni options)
+BankEntry = namedtuple('BankEntry', ['id', 'difficulty', 'category', 'correct_answer'])
+
+
+class QuestionBankSnapshot:
+    """Vue en lecture seule de la banque active à une version donnée"""
+
+    __slots__ = ('entries', 'by_difficulty')
+
+    def __init__(self, entries):
+        self.entries = MappingProxyType({e.id: e for e in entries})
+        self.by_difficulty = MappingProxyType({
+            difficulty: tuple(e.id for e in entries if e.difficulty == difficulty)
+            for difficulty in DIFFICULTIES
+        })
+
+    def count(self, difficulty=None):
+        """Nombre de questions actives (éventuellement par difficulté)"""
+        if difficulty:
+            return len(self.by_difficulty.get(difficulty, ()))
+        return len(self.entries)
+
+
+def _load_snapshot():
+    """Charge la banque active (colonnes légères uniquement)"""
+    rows = db.session.query(
+        Question.id,
+        Question.difficulty,
+        Question.category,
+        Question.correct_answer
+    ).filter(
+        Question.is_active == True
+    ).order_by(Question.id).all()
+
+    return QuestionBankSnapshot([BankEntry(*row) for row in rows])
+
+
+_bank_cache = VersionedCache('question_bank', _load_snapshot)
+
+
+class QuestionBankService:
+    """Accès au snapshot de la banque de questions"""
+
+    @staticmethod
+    def get_snapshot():
+        """Retourne le snapshot courant (rechargé si la banque a changé)"""
+        return _bank_cache.get()
+
+    @staticmethod
+    def invalidate():
+        """Invalide le snapshot dans tous les workers (après commit)"""
+        _bank_cache.invalidate()
+
+    @staticmethod
+    def select_question_ids(settings):
+        """
+        Tire les IDs de questions d'une nouvelle tentative, sans lecture DB
+
+        Args:
+            settings: paramètres QCM (easy_count, medium_count, hard_count, randomize_questions)
+
+        Returns:
+            list: IDs des questions, dans l'ordre de passage
+        """
+        snapshot = QuestionBankService.get_snapshot()
+        selected = []
+
+        for difficulty, count in (('easy', settings.easy_count),
+                                  ('medium', settings.medium_count),
+                                  ('hard', settings.hard_count)):
+            pool = snapshot.by_difficulty.get(difficulty, ())
+            count = min(count or 0, len(pool))
+            if settings.randomize_questions:
+                selected.extend(random.sample(pool, count))
+            else:
+                selected.extend(pool[:count])
+
+        if settings.randomize_questions:
+            random.shuffle(selected)
+
+        return selected
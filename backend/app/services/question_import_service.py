@@ -0,0 +1,243 @@
+"""
+Import en masse de questions
+
+Lecture en flux (XLSX en read-only, CSV, JSON ou JSON lines), validation
+ligne à ligne sans accès base, détection des doublons (dans le fichier et
+contre la banque) par empreinte du texte normalisé, puis une seule
+insertion groupée. En mode dry_run, le rapport complet est renvoyé sans
+rien écrire.
+"""
+import csv
+import io
+import json
+from app import db
+from app.models import Question, AuditLog
+from app.models.question import question_text_hash
+from app.services.question_bank_service import QuestionBankService, DIFFICULTIES
+
+REQUIRED_FIELDS = ('text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'category', 'difficulty')
+OPTION_FIELDS = ('option_a', 'option_b', 'option_c', 'option_d')
+
+MAX_IMPORT_ROWS = 50000
+DEFAULT_CATEGORY = 'Logique'
+
+# Longueurs des colonnes (une valeur trop longue ferait échouer toute l'insertion)
+OPTION_MAX_LENGTH = 500
+CATEGORY_MAX_LENGTH = 50
+
+# Empreintes cherchées par requête lors de la détection des doublons
+HASH_LOOKUP_CHUNK = 1000
+
+
+def _column_map(headers, source):
+    """Position de chaque champ requis dans l'en-tête (insensible à la casse, espaces = _)"""
+    normalized = [str(h or '').strip().lower().replace(' ', '_') for h in headers]
+    col_map = {field: normalized.index(field) for field in REQUIRED_FIELDS if field in normalized}
+    missing = [field for field in REQUIRED_FIELDS if field not in col_map]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {source}: {', '.join(missing)}")
+    return col_map
+
+
+def _iter_table(rows, source):
+    """(numéro de ligne, enregistrement) d'un tableau dont la 1re ligne est l'en-tête"""
+    headers = next(rows, None)
+    if headers is None:
+        return
+    col_map = _column_map(headers, source)
+    for number, values in enumerate(rows, 2):
+        if not any(v not in (None, '') for v in values):
+            continue  # ligne vide
+        yield number, {
+            field: values[index] if index < len(values) else None
+            for field, index in col_map.items()
+        }
+
+
+def _iter_xlsx(stream):
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from _iter_table(wb.active.iter_rows(values_only=True), "Excel")
+    finally:
+        wb.close()
+
+
+def _iter_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    yield from _iter_table(csv.reader(text), "le CSV")
+
+
+def _iter_json(stream):
+    data = json.load(stream)
+    if not isinstance(data, list):
+        raise ValueError("Le JSON doit contenir un tableau de questions")
+    yield from enumerate(data, 1)
+
+
+def _iter_json_lines(stream):
+    for number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), 1):
+        if line.strip():
+            yield number, json.loads(line)
+
+
+PARSERS = {
+    '.xlsx': _iter_xlsx,
+    '.xls': _iter_xlsx,
+    '.csv': _iter_csv,
+    '.json': _iter_json,
+    '.jsonl': _iter_json_lines,
+    '.ndjson': _iter_json_lines
+}
+
+
+def _clean(record):
+    """
+    Valide et normalise un enregistrement
+    
+    Returns:
+        tuple: (ligne à insérer, liste d'erreurs)
+    """
+    if not isinstance(record, dict):
+        return None, ["Enregistrement invalide (objet attendu)"]
+    
+    errors = []
+    text = str(record.get('text') or '').strip()
+    if not text:
+        errors.append("Texte manquant")
+    
+    options = {}
+    for field in OPTION_FIELDS:
+        value = str(record.get(field) if record.get(field) is not None else '').strip()
+        letter = field[-1].upper()
+        if not value:
+            errors.append(f"Option {letter} manquante")
+        elif len(value) > OPTION_MAX_LENGTH:
+            errors.append(f"Option {letter} trop longue ({OPTION_MAX_LENGTH} caractères max)")
+        options[field] = value
+    
+    try:
+        correct = int(record.get('correct_answer', -1))
+        if correct not in (0, 1, 2, 3):
+            errors.append("correct_answer doit être 0, 1, 2 ou 3")
+    except (ValueError, TypeError):
+        errors.append("correct_answer invalide")
+        correct = -1
+    
+    category = str(record.get('category') or '').strip() or DEFAULT_CATEGORY
+    if len(category) > CATEGORY_MAX_LENGTH:
+        errors.append(f"Catégorie trop longue ({CATEGORY_MAX_LENGTH} caractères max)")
+    
+    difficulty = str(record.get('difficulty') or 'medium').strip().lower()
+    if difficulty not in DIFFICULTIES:
+        errors.append(f"Difficulté invalide: {difficulty}")
+    
+    if errors:
+        return None, errors
+    
+    return {
+        'text': text,
+        'text_hash': question_text_hash(text),
+        **options,
+        'correct_answer': correct,
+        'category': category,
+        'difficulty': difficulty
+    }, []
+
+
+class QuestionImportService:
+    """Import de fichiers de questions"""
+    
+    @staticmethod
+    def import_file(file, admin_id, dry_run=False):
+        """
+        Importe un fichier de questions
+        
+        Args:
+            file: FileStorage (.json, .jsonl, .csv, .xlsx)
+            admin_id: auteur
+            dry_run: valider et détecter les doublons sans rien écrire
+        
+        Returns:
+            tuple: (rapport, error_message)
+        """
+        filename = (file.filename or '').lower()
+        extension = filename[filename.rfind('.'):] if '.' in filename else ''
+        parser = PARSERS.get(extension)
+        if parser is None:
+            return None, "Format non supporté. Utilisez .json, .jsonl, .csv ou .xlsx"
+        
+        valid = []
+        errors = []
+        duplicates = []
+        first_rows = {}  # empreinte -> première ligne du fichier
+        total = 0
+        
+        try:
+            for number, record in parser(file.stream):
+                total += 1
+                if total > MAX_IMPORT_ROWS:
+                    return None, f"Fichier trop volumineux ({MAX_IMPORT_ROWS} questions max)"
+                
+                row, row_errors = _clean(record)
+                if row_errors:
+                    errors.append({'row': number, 'errors': row_errors})
+                    continue
+                
+                first = first_rows.get(row['text_hash'])
+                if first is not None:
+                    duplicates.append({'row': number, 'duplicate_of_row': first})
+                    continue
+                first_rows[row['text_hash']] = number
+                valid.append((number, row))
+        except Exception as e:
+            return None, f"Erreur de lecture du fichier: {str(e)}"
+        
+        # Doublons de la banque existante : une requête par lot d'empreintes
+        existing = {}
+        hashes = list(first_rows)
+        for start in range(0, len(hashes), HASH_LOOKUP_CHUNK):
+            existing.update(db.session.query(Question.text_hash, Question.id).filter(
+                Question.text_hash.in_(hashes[start:start + HASH_LOOKUP_CHUNK])
+            ))
+        
+        rows = []
+        for number, row in valid:
+            question_id = existing.get(row['text_hash'])
+            if question_id is not None:
+                duplicates.append({'row': number, 'question_id': question_id})
+            else:
+                rows.append(row)
+        duplicates.sort(key=lambda d: d['row'])
+        
+        report = {
+            'dry_run': dry_run,
+            'total_in_file': total,
+            'valid': len(rows),
+            'imported': 0,
+            'errors': errors,
+            'duplicates': duplicates
+        }
+        
+        if dry_run or not rows:
+            return report, None
+        
+        for row in rows:
+            row['created_by'] = admin_id
+            row['is_active'] = True
+        
+        # Insertion groupée (plusieurs lignes par requête, sans objets ORM)
+        db.session.execute(db.insert(Question), rows)
+        
+        AuditLog.log(
+            user_id=admin_id,
+            action='import_questions',
+            entity_type='question',
+            details=f"{len(rows)} questions importées, {len(duplicates)} doublon(s), {len(errors)} erreur(s)"
+        )
+        db.session.commit()
+        QuestionBankService.invalidate()
+        
+        report['imported'] = len(rows)
+        return report, None
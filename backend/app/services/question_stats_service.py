@@ -0,0 +1,104 @@
+"""
+Statistiques des questions, agrégées en différé
+
+La soumission d'un QCM n'incrémente plus `questions.times_shown` /
+`times_correct` : elle ajoute une ligne par question dans
+`question_stat_deltas` (aucun verrou sur les questions populaires).
+Une tâche périodique consomme ces lignes et les additionne dans
+`questions` en un UPDATE groupé par question.
+"""
+import logging
+from collections import Counter
+from itertools import compress
+from flask import current_app
+from app import db
+from app.models import Question, QuestionStatDelta
+from app.services.scoring_service import NO_CATEGORY
+from app.utils.scheduler import ensure_periodic_task
+
+logger = logging.getLogger(__name__)
+
+FOLD_BATCH_SIZE = 5000
+
+
+class QuestionStatsService:
+    """Enregistrement et agrégation des statistiques de questions"""
+    
+    @staticmethod
+    def record_attempt(key, result):
+        """
+        Ajoute les contributions d'une tentative corrigée (sans commit)
+        
+        Args:
+            key: AnswerKey de la tentative
+            result: ScoreResult correspondant
+        """
+        ensure_periodic_task(
+            'question_stats_fold',
+            current_app.config.get('QUESTION_STATS_FOLD_INTERVAL', 60),
+            QuestionStatsService.fold_deltas
+        )
+        
+        present = [c != NO_CATEGORY for c in key.category_codes]
+        rows = [
+            {'question_id': qid, 'shown': 1, 'correct': correct}
+            for qid, correct in zip(compress(key.question_ids, present), compress(result.correct, present))
+        ]
+        if rows:
+            db.session.execute(db.insert(QuestionStatDelta), rows)
+    
+    @staticmethod
+    def fold_deltas():
+        """
+        Additionne les deltas en attente dans `questions` (tâche périodique)
+        
+        Les lignes sont réclamées par DELETE ... RETURNING : deux workers qui
+        agrègent en même temps ne peuvent pas compter deux fois le même delta.
+        
+        Returns:
+            int: nombre de deltas agrégés
+        """
+        folded = 0
+        while True:
+            batch_ids = db.session.query(QuestionStatDelta.id).order_by(
+                QuestionStatDelta.id
+            ).limit(FOLD_BATCH_SIZE).subquery()
+            
+            claimed = db.session.execute(
+                db.delete(QuestionStatDelta).where(
+                    QuestionStatDelta.id.in_(db.select(batch_ids.c.id))
+                ).returning(
+                    QuestionStatDelta.question_id,
+                    QuestionStatDelta.shown,
+                    QuestionStatDelta.correct
+                )
+            ).all()
+            
+            if not claimed:
+                db.session.commit()
+                break
+            
+            shown = Counter()
+            correct = Counter()
+            for question_id, row_shown, row_correct in claimed:
+                shown[question_id] += row_shown
+                correct[question_id] += row_correct
+            
+            db.session.execute(
+                db.update(Question.__table__).where(
+                    Question.__table__.c.id == db.bindparam('qid')
+                ).values(
+                    times_shown=db.func.coalesce(Question.__table__.c.times_shown, 0) + db.bindparam('shown'),
+                    times_correct=db.func.coalesce(Question.__table__.c.times_correct, 0) + db.bindparam('correct')
+                ),
+                [
+                    {'qid': qid, 'shown': shown[qid], 'correct': correct[qid]}
+                    for qid in shown
+                ]
+            )
+            db.session.commit()
+            folded += len(claimed)
+        
+        if folded:
+            logger.info(f"Statistiques questions: {folded} delta(s) agrégé(s)")
+        return folded
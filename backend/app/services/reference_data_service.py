@@ -0,0 +1,98 @@
+"""
+Données de référence publiques (régions, timeline, FAQ, partenaires, actualités, pages)
+
+Chaque entité a son propre cache versionné (namespace ref:<entité>) : la
+réponse JSON est sérialisée une fois par version, avec son ETag et sa date
+de calcul (Last-Modified). Les écritures admin appellent
+ReferenceDataService.invalidate(entité) après commit ; seules les réponses
+de cette entité sont recalculées, par chaque worker à sa prochaine lecture.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+from app.models import StaticPage
+from app.utils.cache import VersionedCache
+from app.utils.http_cache import build_payload
+
+# Durée pendant laquelle navigateurs et CDN resservent la réponse sans revalider
+REFERENCE_CACHE_SECONDS = 60
+
+# Slugs de pages gardés par worker (les slugs viennent de l'URL)
+PAGES_CACHE_MAX_ENTRIES = 64
+
+ReferenceEntry = namedtuple('ReferenceEntry', ['payload', 'last_modified'])
+
+
+def _load_regions():
+    from app.services.school_service import SchoolService
+    return SchoolService.get_regions()
+
+
+def _load_news():
+    from app.services.content_service import ContentService
+    return ContentService.get_public_news()[0]
+
+
+def _load_faqs():
+    from app.services.content_service import ContentService
+    return ContentService.get_public_faqs()[0]
+
+
+def _load_timeline():
+    from app.services.content_service import ContentService
+    return ContentService.get_timeline()[0]
+
+
+def _load_partners():
+    from app.services.content_service import ContentService
+    return ContentService.get_public_partners()[0]
+
+
+def _load_page(slug):
+    page = StaticPage.query.filter_by(slug=slug).first()
+    return page.to_dict() if page else None
+
+
+def _reference_cache(entity, load, max_entries=None):
+    """Cache versionné d'une entité : ReferenceEntry, ou None si la donnée n'existe pas"""
+    def loader(*key):
+        data = load(*key)
+        if data is None:
+            return None
+        # Précision HTTP : la seconde
+        return ReferenceEntry(build_payload(data), datetime.now(timezone.utc).replace(microsecond=0))
+    
+    return VersionedCache(f"ref:{entity}", loader, max_entries=max_entries)
+
+
+_caches = {
+    'regions': _reference_cache('regions', _load_regions),
+    'news': _reference_cache('news', _load_news),
+    'faqs': _reference_cache('faqs', _load_faqs),
+    'timeline': _reference_cache('timeline', _load_timeline),
+    'partners': _reference_cache('partners', _load_partners),
+    'pages': _reference_cache('pages', _load_page, max_entries=PAGES_CACHE_MAX_ENTRIES)
+}
+
+
+class ReferenceDataService:
+    """Lecture en cache et invalidation des données de référence"""
+    
+    @staticmethod
+    def get(entity, key=None):
+        """
+        Réponse sérialisée d'une entité
+        
+        Args:
+            entity: regions, news, faqs, timeline, partners ou pages
+            key: slug pour les pages
+        
+        Returns:
+            ReferenceEntry ou None (page inexistante)
+        """
+        return _caches[entity].get(key)
+    
+    @staticmethod
+    def invalidate(*entities):
+        """Invalide les entités modifiées (à appeler après le commit)"""
+        for entity in entities:
+            _caches[entity].invalidate()
@@ -0,0 +1,216 @@
+"""
+Autocomplétion des établissements
+
+Le texte cherché et les établissements sont comparés sous forme normalisée
+(school_search_key : sans accents, casse ni ponctuation). Classement :
+nom commençant par la saisie, puis un mot du nom, puis le reste par
+similarité trigramme décroissante.
+
+Deux moteurs :
+  - PostgreSQL avec pg_trgm : LIKE '%q%' et opérateur % (similarité),
+    servis par les index GIN des colonnes search_name / search_city ;
+  - sinon (SQLite, dev, extension absente) : index en mémoire du worker
+    (trigrammes + préfixes de mots) sur les établissements actifs,
+    reconstruit quand la version 'schools' change. La similarité y est
+    calculée comme pg_trgm (trigrammes par mot, sur le nom seul) : les
+    deux moteurs classent de la même façon.
+"""
+import heapq
+import threading
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from itertools import islice
+from sqlalchemy import case, func, text
+from app import db
+from app.models import School
+from app.models.school import school_search_key
+from app.utils.cache import VersionedCache
+
+# Similarité minimale d'une correspondance approchée (seuil par défaut de pg_trgm)
+SIMILARITY_THRESHOLD = 0.3
+
+SearchEntry = namedtuple('SearchEntry', ['data', 'name', 'city', 'trigrams'])
+
+
+def trigrams(value):
+    """Trigrammes d'une chaîne normalisée (espaces compris)"""
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def word_trigrams(value):
+    """Trigrammes à la manière de pg_trgm : par mot, précédé de deux espaces et suivi d'un"""
+    result = set()
+    for word in value.split():
+        result |= trigrams(f"  {word} ")
+    return result
+
+
+class SchoolSearchIndex:
+    """Index en mémoire des établissements actifs (triés par nom)"""
+    
+    def __init__(self, schools):
+        self.entries = []
+        self.postings = {}  # trigramme (nom ou ville) -> positions, pour les sous-chaînes
+        self.name_postings = {}  # trigramme pg_trgm du nom -> positions, pour la similarité
+        tokens = []
+        for position, school in enumerate(schools):
+            name = school_search_key(school.name)
+            city = school_search_key(school.city)
+            name_trigrams = word_trigrams(name)
+            self.entries.append(SearchEntry(school.to_dict(), name, city, name_trigrams))
+            for trigram in trigrams(name) | trigrams(city):
+                self.postings.setdefault(trigram, []).append(position)
+            for trigram in name_trigrams:
+                self.name_postings.setdefault(trigram, []).append(position)
+            tokens.extend((token, position) for token in set(f"{name} {city}".split()))
+        tokens.sort()
+        self.tokens = [token for token, _ in tokens]
+        self.token_positions = [position for _, position in tokens]
+    
+    def _prefix_matches(self, query):
+        """Positions dont un mot (nom ou ville) commence par `query`"""
+        start = bisect_left(self.tokens, query)
+        matches = set()
+        for i in range(start, len(self.tokens)):
+            if not self.tokens[i].startswith(query):
+                break
+            matches.add(self.token_positions[i])
+        return matches
+    
+    def _similarity(self, query_trigrams, position):
+        """Similarité trigramme (Jaccard, comme similarity() de pg_trgm) entre la saisie et le nom"""
+        name_trigrams = self.entries[position].trigrams
+        shared = len(query_trigrams & name_trigrams)
+        union = len(query_trigrams) + len(name_trigrams) - shared
+        return shared / union if union else 0
+    
+    def search(self, query, region=None, limit=20):
+        entries = self.entries
+        if region:
+            accept = lambda p: entries[p].data['region'] == region
+        else:
+            accept = lambda p: True
+        if not query:
+            return [entries[p].data for p in islice(filter(accept, range(len(entries))), limit)]
+        
+        query_trigrams = word_trigrams(query)
+        fuzzy = {}  # position -> similarité des correspondances approchées
+        if len(query) < 3:
+            matches = [p for p in self._prefix_matches(query) if accept(p)]
+        else:
+            # Sous-chaîne : candidats de la plus courte liste de trigrammes, vérifiés
+            postings = min((self.postings.get(t, ()) for t in trigrams(query)), key=len)
+            matches = [
+                p for p in postings
+                if (query in entries[p].name or query in entries[p].city) and accept(p)
+            ]
+            # Approché (fautes de frappe) : seulement si la page n'est pas remplie
+            if len(matches) < limit:
+                found = set(matches)
+                shared = Counter()
+                for trigram in query_trigrams:
+                    shared.update(self.name_postings.get(trigram, ()))
+                for position, count in shared.items():
+                    if position in found or not accept(position):
+                        continue
+                    union = len(query_trigrams) + len(entries[position].trigrams) - count
+                    score = count / union if union else 0
+                    # Opérateur % de pg_trgm : strictement au-dessus du seuil
+                    if score > SIMILARITY_THRESHOLD:
+                        fuzzy[position] = score
+                matches.extend(fuzzy)
+        
+        def rank(position):
+            # Les entrées sont triées par nom : la position départage
+            name = entries[position].name
+            if position in fuzzy:
+                return (4, -fuzzy[position], position)
+            if name.startswith(query):
+                tier = 0
+            elif f" {query}" in f" {name}":
+                tier = 1
+            elif query in name:
+                tier = 2
+            else:
+                return (3, 0, position)  # ville seulement
+            return (tier, -self._similarity(query_trigrams, position), position)
+        
+        return [entries[p].data for p in heapq.nsmallest(limit, matches, key=rank)]
+
+
+def _load_index():
+    schools = School.query.filter(School.is_active == True).order_by(School.name, School.id).all()
+    return SchoolSearchIndex(schools)
+
+
+_index_cache = VersionedCache('schools', _load_index)
+
+# Disponibilité de pg_trgm, vérifiée une fois par process
+_trigram_support = None
+_trigram_lock = threading.Lock()
+
+
+def _has_trigram_support():
+    global _trigram_support
+    if _trigram_support is None:
+        with _trigram_lock:
+            if _trigram_support is None:
+                bind = db.session.get_bind()
+                _trigram_support = bind.dialect.name == 'postgresql' and bool(
+                    db.session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+                )
+    return _trigram_support
+
+
+class SchoolSearchService:
+    """Recherche d'établissements (autocomplete)"""
+    
+    @staticmethod
+    def search(query=None, region=None, limit=20):
+        """
+        Établissements actifs correspondant à la saisie, les plus pertinents d'abord
+        
+        Returns:
+            list: établissements (dicts)
+        """
+        normalized = school_search_key(query)
+        if normalized and _has_trigram_support():
+            return SchoolSearchService._search_trigram(normalized, region, limit)
+        return _index_cache.get().search(normalized, region, limit)
+    
+    @staticmethod
+    def _search_trigram(query, region, limit):
+        """Recherche SQL servie par les index GIN pg_trgm"""
+        schools = SchoolSearchService._trigram_query(query, region).limit(limit).all()
+        return [school.to_dict() for school in schools]
+    
+    @staticmethod
+    def _trigram_query(query, region):
+        """Requête classée : mêmes paliers que l'index en mémoire, puis similarité du nom"""
+        contains = f"%{query}%"  # la forme normalisée ne contient ni % ni _
+        q = School.query.filter(
+            School.is_active == True,
+            db.or_(
+                School.search_name.like(contains),
+                School.search_city.like(contains),
+                School.search_name.op('%')(query)
+            )
+        )
+        if region:
+            q = q.filter(School.region == region)
+        
+        tier = case(
+            (School.search_name.like(f"{query}%"), 0),
+            (School.search_name.like(f"% {query}%"), 1),
+            (School.search_name.like(contains), 2),
+            (School.search_city.like(contains), 3),
+            else_=4
+        )
+        return q.order_by(
+            tier, func.similarity(School.search_name, query).desc(), School.name, School.id
+        )
+    
+    @staticmethod
+    def invalidate():
+        """À appeler après toute modification des établissements"""
+        _index_cache.invalidate()
@@ -3,6 +3,30 @@ Service de gestion des établissements scolaires
 """
 from app import db
 from app.models import School
+from app.models.school import school_key, school_search_key
+from app.services.reference_data_service import ReferenceDataService
+from app.services.school_search_service import SchoolSearchService
+from app.utils.orm import insert_for
+
+# Couples (nom, ville) cherchés par requête lors d'un import
+IMPORT_LOOKUP_CHUNK = 500
+
+# Lignes par INSERT multi-lignes
+IMPORT_INSERT_CHUNK = 1000
+
+# Longueurs des colonnes (une valeur trop longue ferait échouer tout le lot)
+FIELD_MAX_LENGTHS = {'name': 200, 'city': 100, 'region': 100, 'type': 50}
+
+
+def _find_by_key(name, city, exclude_id=None):
+    """Établissement de même nom et même ville (clés normalisées, index unique)"""
+    query = School.query.filter(
+        School.name_key == school_key(name),
+        School.city_key == school_key(city)
+    )
+    if exclude_id is not None:
+        query = query.filter(School.id != exclude_id)
+    return query.first()
 
 
 class SchoolService:
@@ -19,24 +43,9 @@ class SchoolService:
             limit: nombre max de résultats
             
         Returns:
-            list: Liste d'établissements
+            list: Liste d'établissements (dicts), les plus pertinents d'abord
         """
-        q = School.query.filter(School.is_active == True)
-        
-        if query:
-            search_term = f"%{query}%"
-            q = q.filter(
-                db.or_(
-                    School.name.ilike(search_term),
-                    School.city.ilike(search_term)
-                )
-            )
-        
-        if region:
-            q = q.filter(School.region == region)
-        
-        schools = q.order_by(School.name).limit(limit).all()
-        return schools
+        return SchoolSearchService.search(query, region, limit)
     
     @staticmethod
     def get_all(page=1, per_page=50, search=None, region=None):
@@ -82,12 +91,7 @@ class SchoolService:
             return None, "Le nom est requis"
         
         # Vérifier si l'établissement existe déjà
-        existing = School.query.filter(
-            School.name.ilike(name),
-            School.city == city
-        ).first()
-        
-        if existing:
+        if _find_by_key(name, city):
             return None, "Cet établissement existe déjà"
         
         school = School(
@@ -99,6 +103,8 @@ class SchoolService:
         
         db.session.add(school)
         db.session.commit()
+        SchoolSearchService.invalidate()
+        ReferenceDataService.invalidate('regions')
         
         return school, None
     
@@ -126,7 +132,16 @@ class SchoolService:
         if 'is_active' in kwargs:
             school.is_active = kwargs['is_active']
         
+        # Sans autoflush : le renommage enfreindrait l'index unique avant la vérification
+        with db.session.no_autoflush:
+            duplicate = _find_by_key(school.name, school.city, exclude_id=school.id)
+        if duplicate:
+            db.session.rollback()
+            return None, "Cet établissement existe déjà"
+        
         db.session.commit()
+        SchoolSearchService.invalidate()
+        ReferenceDataService.invalidate('regions')
         return school, None
     
     @staticmethod
@@ -147,11 +162,15 @@ class SchoolService:
             # Soft delete
             school.is_active = False
             db.session.commit()
+            SchoolSearchService.invalidate()
+            ReferenceDataService.invalidate('regions')
             return True, None
         
         # Hard delete si pas de candidats
         db.session.delete(school)
         db.session.commit()
+        SchoolSearchService.invalidate()
+        ReferenceDataService.invalidate('regions')
         return True, None
     
     @staticmethod
@@ -159,48 +178,88 @@ class SchoolService:
         """
         Import en masse d'établissements
         
+        Les couples (nom, ville) normalisés du fichier sont résolus contre la
+        base par lots (une requête pour IMPORT_LOOKUP_CHUNK couples), puis les
+        nouveaux établissements sont insérés en INSERT multi-lignes
+        ON CONFLICT DO NOTHING (imports concurrents).
+        
         Args:
             schools_data: Liste de dicts avec name, city, region, type
             
         Returns:
-            dict: {imported: int, errors: list}
+            dict: {imported, errors, duplicates, total}
         """
-        imported = 0
         errors = []
+        duplicates = []
+        first_rows = {}  # (name_key, city_key) -> première ligne du fichier
+        rows = []
         
         for i, data in enumerate(schools_data, 1):
-            name = data.get('name', '').strip()
+            if not isinstance(data, dict):
+                errors.append({'row': i, 'error': 'Enregistrement invalide'})
+                continue
             
-            if not name:
+            values = {
+                field: str(data.get(field)).strip() if data.get(field) not in (None, '') else None
+                for field in FIELD_MAX_LENGTHS
+            }
+            if not values['name']:
                 errors.append({'row': i, 'error': 'Nom manquant'})
                 continue
             
-            # Vérifier si existe déjà
-            city = data.get('city', '').strip() if data.get('city') else None
-            existing = School.query.filter(
-                School.name.ilike(name),
-                School.city == city
-            ).first()
+            too_long = [f for f, limit in FIELD_MAX_LENGTHS.items() if values[f] and len(values[f]) > limit]
+            if too_long:
+                errors.append({'row': i, 'error': f"Valeur trop longue: {', '.join(too_long)}"})
+                continue
             
-            if existing:
-                errors.append({'row': i, 'error': f'Établissement déjà existant: {name}'})
+            key = (school_key(values['name']), school_key(values['city']))
+            if key in first_rows:
+                duplicates.append({'row': i, 'duplicate_of_row': first_rows[key], 'name': values['name']})
                 continue
+            first_rows[key] = i
             
-            school = School(
-                name=name,
-                city=city,
-                region=data.get('region', '').strip() if data.get('region') else None,
-                type=data.get('type')
+            rows.append((i, key, values))
+        
+        # Établissements déjà en base : une requête par lot de couples
+        existing = {}
+        keys = list(first_rows)
+        for start in range(0, len(keys), IMPORT_LOOKUP_CHUNK):
+            chunk = keys[start:start + IMPORT_LOOKUP_CHUNK]
+            matches = db.session.query(School.name_key, School.city_key, School.id).filter(
+                db.tuple_(School.name_key, School.city_key).in_(chunk)
             )
-            db.session.add(school)
-            imported += 1
+            existing.update({(name_key, city_key): school_id for name_key, city_key, school_id in matches})
+        
+        new_rows = []
+        for i, key, values in rows:
+            if key in existing:
+                duplicates.append({'row': i, 'school_id': existing[key], 'name': values['name']})
+                continue
+            new_rows.append({
+                **values,
+                'name_key': key[0],
+                'city_key': key[1],
+                'search_name': school_search_key(values['name']),
+                'search_city': school_search_key(values['city']),
+                'is_active': True
+            })
+        duplicates.sort(key=lambda d: d['row'])
+        
+        imported = 0
+        for start in range(0, len(new_rows), IMPORT_INSERT_CHUNK):
+            stmt = insert_for(School).values(new_rows[start:start + IMPORT_INSERT_CHUNK])
+            imported += db.session.execute(stmt.on_conflict_do_nothing()).rowcount
         
         if imported > 0:
             db.session.commit()
+            SchoolSearchService.invalidate()
+            ReferenceDataService.invalidate('regions')
         
         return {
             'imported': imported,
-            'errors': errors
+            'errors': errors,
+            'duplicates': duplicates,
+            'total': len(schools_data)
         }
     
     @staticmethod
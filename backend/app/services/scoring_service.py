@@ -0,0 +1,196 @@
+"""
+Moteur de correction du QCM sur tableaux compacts
+
+Une clé de correction (AnswerKey) décrit les questions d'une tentative sous
+forme de tableaux parallèles (module `array`) : IDs, bonnes réponses (int8)
+et codes de catégorie. Les réponses du candidat forment elles aussi un
+vecteur int8 ; la correction est une seule passe sur ces tableaux, sans
+objet ORM ni dictionnaire par question.
+
+La même clé sert à recorriger en masse les tentatives terminées lorsqu'un
+administrateur corrige la bonne réponse d'une question.
+"""
+import logging
+import operator
+from array import array
+from collections import Counter, namedtuple
+from itertools import compress
+from app import db
+from app.models import Question, QCMAttempt, Candidate
+from app.services.question_bank_service import QuestionBankService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.stats_rollup_service import StatsRollupService
+
+logger = logging.getLogger(__name__)
+
+# Bonne réponse d'une question supprimée : ne correspond à aucune réponse
+MISSING_ANSWER = -2
+NO_CATEGORY = -1
+
+RESCORE_BATCH_SIZE = 1000
+
+ScoreResult = namedtuple('ScoreResult', ['answers', 'correct', 'correct_count', 'score', 'category_stats'])
+
+
+def lookup_entries(question_ids):
+    """
+    Retourne {id: (bonne_réponse, catégorie)} pour les questions données
+    
+    Le snapshot de la banque active sert en priorité ; seules les questions
+    absentes (désactivées depuis) sont lues en base, en une requête.
+    """
+    snapshot = QuestionBankService.get_snapshot()
+    entries = {}
+    missing = []
+    for qid in set(question_ids):
+        entry = snapshot.entries.get(qid)
+        if entry:
+            entries[qid] = (entry.correct_answer, entry.category)
+        else:
+            missing.append(qid)
+    
+    if missing:
+        rows = db.session.query(
+            Question.id, Question.correct_answer, Question.category
+        ).filter(Question.id.in_(missing)).all()
+        for qid, correct_answer, category in rows:
+            entries[qid] = (correct_answer, category)
+    
+    return entries
+
+
+class AnswerKey:
+    """Clé de correction d'une liste ordonnée de questions"""
+    
+    __slots__ = ('question_ids', 'correct_answers', 'category_codes', 'categories')
+    
+    def __init__(self, question_ids, correct_answers, category_codes, categories):
+        self.question_ids = question_ids
+        self.correct_answers = correct_answers
+        self.category_codes = category_codes
+        self.categories = categories
+    
+    def __len__(self):
+        return len(self.question_ids)
+    
+    @classmethod
+    def build(cls, question_ids, entries=None):
+        """
+        Construit la clé d'une tentative
+        
+        Args:
+            question_ids: IDs dans l'ordre de passage
+            entries: résultat de lookup_entries (partagé lors d'une recorrection en masse)
+        """
+        if entries is None:
+            entries = lookup_entries(question_ids)
+        
+        codes = {}
+        correct_answers = array('b')
+        category_codes = array('h')
+        for qid in question_ids:
+            entry = entries.get(qid)
+            if entry is None:
+                correct_answers.append(MISSING_ANSWER)
+                category_codes.append(NO_CATEGORY)
+            else:
+                correct_answers.append(entry[0])
+                category_codes.append(codes.setdefault(entry[1] or 'Autre', len(codes)))
+        
+        return cls(array('l', question_ids), correct_answers, category_codes, tuple(codes))
+    
+    def present_ids(self):
+        """IDs des questions encore existantes"""
+        return [qid for qid, c in zip(self.question_ids, self.category_codes) if c != NO_CATEGORY]
+
+
+def score_answers(key, answers):
+    """
+    Corrige un vecteur de réponses contre une clé
+    
+    Args:
+        key: AnswerKey
+        answers: réponses du candidat (-1 = sans réponse), complétées ou tronquées à len(key)
+    
+    Returns:
+        ScoreResult (correct = bytes de 0/1 par question)
+    """
+    total = len(key)
+    vector = array('b', answers[:total])
+    if len(vector) < total:
+        vector.extend([-1] * (total - len(vector)))
+    
+    correct = bytes(map(operator.eq, key.correct_answers, vector))
+    correct_count = correct.count(1)
+    score = round((correct_count / total) * 100, 2) if total else 0
+    
+    totals = Counter(key.category_codes)
+    hits = Counter(compress(key.category_codes, correct))
+    category_stats = {
+        key.categories[code]: {'total': count, 'correct': hits[code]}
+        for code, count in totals.items()
+        if code != NO_CATEGORY
+    }
+    
+    return ScoreResult(vector, correct, correct_count, score, category_stats)
+
+
+class ScoringService:
+    """Recorrection en masse des tentatives terminées"""
+    
+    @staticmethod
+    def rescore_question(question_id):
+        """
+        Recorrige toutes les tentatives terminées contenant une question
+        
+        À appeler après le commit de la nouvelle bonne réponse.
+        
+        Returns:
+            int: nombre de tentatives dont le score a changé
+        """
+        # Les IDs sont stockés en binaire : filtrage à la lecture, par lots
+        attempts = [
+            attempt for attempt in QCMAttempt.query.options(
+                db.load_only(QCMAttempt.id, QCMAttempt.candidate_id,
+                             QCMAttempt.question_ids_packed, QCMAttempt.answers_packed,
+                             QCMAttempt.question_ids, QCMAttempt.answers,
+                             QCMAttempt.score, QCMAttempt.correct_count)
+            ).filter(
+                QCMAttempt.status == 'completed'
+            ).order_by(QCMAttempt.id).yield_per(RESCORE_BATCH_SIZE)
+            if question_id in attempt.question_id_array
+        ]
+        
+        if not attempts:
+            return 0
+        
+        # Une seule résolution des bonnes réponses pour toutes les tentatives
+        all_ids = set()
+        for attempt in attempts:
+            all_ids.update(attempt.question_id_array)
+        entries = lookup_entries(all_ids)
+        
+        attempt_updates = []
+        candidate_updates = []
+        for attempt in attempts:
+            key = AnswerKey.build(attempt.question_id_array, entries)
+            result = score_answers(key, attempt.answer_array)
+            if result.score == attempt.score and result.correct_count == attempt.correct_count:
+                continue
+            attempt_updates.append({
+                'id': attempt.id,
+                'score': result.score,
+                'correct_count': result.correct_count
+            })
+            candidate_updates.append({'id': attempt.candidate_id, 'qcm_score': result.score})
+        
+        if attempt_updates:
+            # Mise à jour en masse : hors du suivi automatique des compteurs
+            StatsRollupService.record_score_changes({u['id']: u['qcm_score'] for u in candidate_updates})
+            db.session.execute(db.update(QCMAttempt), attempt_updates)
+            db.session.execute(db.update(Candidate), candidate_updates)
+        db.session.commit()
+        LeaderboardService.refresh({update['id'] for update in candidate_updates})
+        
+        logger.info(f"Question {question_id}: {len(attempt_updates)} tentative(s) recorrigée(s)")
+        return len(attempt_updates)
@@ -0,0 +1,335 @@
+"""
+Compteurs de candidats précalculés (table stats_rollups)
+
+Chaque flush qui crée, modifie ou supprime un candidat ajoute, dans la même
+transaction, une ligne dans `stats_rollup_deltas` : -1 sur la combinaison
+de dimensions qu'il quittait et +1 sur celle qu'il rejoint (inscription,
+soumission / validation / rejet du dossier, modification du profil, score
+QCM). Table en ajout seul : aucune ligne partagée n'est verrouillée par
+les soumissions. Les deltas sont additionnés dans `stats_rollups` par une
+tâche périodique ; les lectures y ajoutent ceux en attente (UNION ALL,
+sans écriture). Les statistiques par région, genre, classe, statut et
+jour d'inscription lisent alors quelques lignes au lieu de parcourir
+`candidates`.
+
+Les mises à jour en masse (db.update) ne passent pas par le flush et
+doivent appeler StatsRollupService explicitement. La reconstruction
+(rebuild_stats_rollups.py, étape de déploiement) recalcule tout depuis
+`candidates` et enregistre sa version dans `cache_versions`
+(BUILT_MARKER) : tant que ce marqueur est absent, les statistiques sont
+calculées directement sur `candidates`.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, inspect
+from app import db
+from app.models import CacheVersion, Candidate, StatsRollup, StatsRollupDelta
+from app.utils.orm import insert_for, previous_values, track_previous_values
+from app.utils.scheduler import ensure_periodic_task
+
+logger = logging.getLogger(__name__)
+
+# Attributs du candidat qui déterminent sa ligne de compteurs
+TRACKED_ATTRIBUTES = ('created_at', 'region', 'gender', 'class_level', 'status', 'qcm_score')
+
+# Ligne de cache_versions écrite par chaque reconstruction
+BUILT_MARKER = 'stats_rollups:built'
+
+FOLD_BATCH_SIZE = 5000
+
+# Colonnes communes à stats_rollups et stats_rollup_deltas
+SOURCE_COLUMNS = (
+    'day', 'region', 'gender', 'class_level', 'status',
+    'candidates_count', 'scored_count', 'score_sum'
+)
+
+# Vrai une fois le marqueur de construction vu dans ce process
+_built = False
+_warned = False
+
+
+def _is_built():
+    """Vrai si les compteurs ont été construits (marqueur BUILT_MARKER)"""
+    global _built, _warned
+    if not _built:
+        _built = db.session.query(CacheVersion.version).filter(
+            CacheVersion.namespace == BUILT_MARKER
+        ).scalar() is not None
+        if not _built and not _warned:
+            logger.warning("Compteurs statistiques non construits : lancer rebuild_stats_rollups.py")
+            _warned = True
+    return _built
+
+
+def _to_date(value):
+    """Date d'une valeur DateTime ou de func.date() (chaîne sur SQLite)"""
+    if value is None:
+        return datetime.utcnow().date()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).date()
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _dimensions(created_at, region, gender, class_level, status):
+    """Clé de ligne de compteurs ('' pour une dimension absente)"""
+    return (_to_date(created_at), region or '', gender or '', class_level or '', status or 'draft')
+
+
+def _add(deltas, values, sign):
+    """Ajoute la contribution d'un état de candidat (values = TRACKED_ATTRIBUTES)"""
+    key = _dimensions(*values[:5])
+    score = values[5]
+    entry = deltas[key]
+    entry[0] += sign
+    if score is not None:
+        entry[1] += sign
+        entry[2] += sign * score
+
+
+def _current_values(candidate):
+    return [getattr(candidate, name) for name in TRACKED_ATTRIBUTES]
+
+
+# Sur un candidat expiré, l'historique du flush ne connaîtrait pas la ligne quittée
+track_previous_values(Candidate, TRACKED_ATTRIBUTES)
+
+
+def _rows(deltas):
+    return [
+        {
+            'day': key[0], 'region': key[1], 'gender': key[2], 'class_level': key[3], 'status': key[4],
+            'candidates_count': count, 'scored_count': scored, 'score_sum': score_sum
+        }
+        for key, (count, scored, score_sum) in deltas.items()
+        if count or scored or score_sum
+    ]
+
+
+def _record(connection, deltas):
+    """Ajoute les deltas à agréger (connexion de la transaction en cours)"""
+    rows = _rows(deltas)
+    if not rows:
+        return
+    
+    ensure_periodic_task(
+        'stats_rollups_fold',
+        current_app.config.get('STATS_ROLLUP_FOLD_INTERVAL', 60),
+        StatsRollupService.fold_deltas
+    )
+    connection.execute(db.insert(StatsRollupDelta), rows)
+
+
+def _apply(deltas):
+    """Upsert additif des deltas dans stats_rollups (sans commit)"""
+    rows = _rows(deltas)
+    if not rows:
+        return
+    
+    stmt = insert_for(StatsRollup).values(rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['day', 'region', 'gender', 'class_level', 'status'],
+        set_={
+            'candidates_count': StatsRollup.candidates_count + stmt.excluded.candidates_count,
+            'scored_count': StatsRollup.scored_count + stmt.excluded.scored_count,
+            'score_sum': StatsRollup.score_sum + stmt.excluded.score_sum
+        }
+    ))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_candidate_changes(session, flush_context):
+    """Répercute les candidats créés, modifiés ou supprimés par ce flush"""
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    
+    for obj in session.new:
+        if isinstance(obj, Candidate):
+            _add(deltas, _current_values(obj), 1)
+    
+    for obj in session.dirty:
+        if not isinstance(obj, Candidate):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in TRACKED_ATTRIBUTES):
+            continue
+        _add(deltas, previous_values(obj, TRACKED_ATTRIBUTES), -1)
+        _add(deltas, _current_values(obj), 1)
+    
+    for obj in session.deleted:
+        if isinstance(obj, Candidate):
+            _add(deltas, previous_values(obj, TRACKED_ATTRIBUTES), -1)
+    
+    if deltas:
+        _record(session.connection(), deltas)
+
+
+class StatsRollupService:
+    """Maintenance des compteurs précalculés"""
+    
+    @staticmethod
+    def record_score_changes(new_scores):
+        """
+        Répercute des changements de qcm_score faits par mise à jour en masse
+        
+        À appeler dans la transaction, avant la mise à jour.
+        
+        Args:
+            new_scores: {candidate_id: nouveau score}
+        """
+        if not new_scores:
+            return
+        
+        rows = db.session.query(
+            Candidate.id, Candidate.created_at, Candidate.region, Candidate.gender,
+            Candidate.class_level, Candidate.status, Candidate.qcm_score
+        ).filter(Candidate.id.in_(list(new_scores))).all()
+        
+        deltas = defaultdict(lambda: [0, 0, 0.0])
+        for cand_id, *values in rows:
+            _add(deltas, values, -1)
+            _add(deltas, values[:5] + [new_scores[cand_id]], 1)
+        _record(db.session.connection(), deltas)
+    
+    @staticmethod
+    def fold_deltas():
+        """
+        Additionne les deltas en attente dans stats_rollups (tâche périodique)
+        
+        Les lignes sont réclamées par DELETE ... RETURNING : deux workers qui
+        agrègent en même temps ne peuvent pas compter deux fois le même delta.
+        
+        Returns:
+            int: nombre de deltas agrégés
+        """
+        folded = 0
+        while True:
+            batch_ids = db.session.query(StatsRollupDelta.id).order_by(
+                StatsRollupDelta.id
+            ).limit(FOLD_BATCH_SIZE).subquery()
+            
+            claimed = db.session.execute(
+                db.delete(StatsRollupDelta).where(
+                    StatsRollupDelta.id.in_(db.select(batch_ids.c.id))
+                ).returning(
+                    StatsRollupDelta.day,
+                    StatsRollupDelta.region,
+                    StatsRollupDelta.gender,
+                    StatsRollupDelta.class_level,
+                    StatsRollupDelta.status,
+                    StatsRollupDelta.candidates_count,
+                    StatsRollupDelta.scored_count,
+                    StatsRollupDelta.score_sum
+                )
+            ).all()
+            
+            if not claimed:
+                db.session.commit()
+                break
+            
+            deltas = defaultdict(lambda: [0, 0, 0.0])
+            for *key, count, scored, score_sum in claimed:
+                entry = deltas[tuple(key)]
+                entry[0] += count
+                entry[1] += scored
+                entry[2] += score_sum
+            _apply(deltas)
+            db.session.commit()
+            folded += len(claimed)
+        
+        if folded:
+            logger.info(f"Compteurs statistiques: {folded} delta(s) agrégé(s)")
+        return folded
+    
+    @staticmethod
+    def rebuild():
+        """
+        Recalcule les compteurs depuis `candidates` et remplace la table
+        
+        Returns:
+            int: nombre de lignes de compteurs qui différaient
+        """
+        global _built
+        
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Les transactions qui modifient des candidats attendent la fin
+            # de la reconstruction : leurs deltas s'ajoutent ensuite
+            db.session.execute(db.text("LOCK TABLE stats_rollups, stats_rollup_deltas IN EXCLUSIVE MODE"))
+        
+        day = db.func.date(Candidate.created_at)
+        expected = {}
+        for created, region, gender, class_level, status, count, scored, score_sum in db.session.query(
+            day, Candidate.region, Candidate.gender, Candidate.class_level, Candidate.status,
+            db.func.count(), db.func.count(Candidate.qcm_score), db.func.coalesce(db.func.sum(Candidate.qcm_score), 0)
+        ).group_by(day, Candidate.region, Candidate.gender, Candidate.class_level, Candidate.status):
+            key = _dimensions(created, region, gender, class_level, status)
+            previous = expected.get(key, (0, 0, 0.0))
+            # Plusieurs groupes SQL peuvent tomber sur la même clé (NULL et '')
+            expected[key] = (previous[0] + count, previous[1] + scored, previous[2] + float(score_sum))
+        
+        current = {
+            (r.day, r.region, r.gender, r.class_level, r.status): (r.candidates_count, r.scored_count, r.score_sum)
+            for r in StatsRollup.query.all()
+        }
+        drift = sum(
+            1 for key in set(expected) | set(current)
+            if expected.get(key, (0, 0, 0.0))[:2] != current.get(key, (0, 0, 0.0))[:2]
+            or abs(expected.get(key, (0, 0, 0.0))[2] - current.get(key, (0, 0, 0.0))[2]) > 1e-6
+        )
+        
+        # Deltas déjà pris en compte par le recalcul
+        StatsRollupDelta.query.delete()
+        StatsRollup.query.delete()
+        if expected:
+            db.session.execute(db.insert(StatsRollup), [
+                {
+                    'day': key[0], 'region': key[1], 'gender': key[2], 'class_level': key[3], 'status': key[4],
+                    'candidates_count': count, 'scored_count': scored, 'score_sum': score_sum
+                }
+                for key, (count, scored, score_sum) in expected.items()
+            ])
+        
+        marker = db.session.get(CacheVersion, BUILT_MARKER)
+        if marker:
+            marker.version += 1
+        else:
+            db.session.add(CacheVersion(namespace=BUILT_MARKER, version=1))
+        db.session.commit()
+        _built = True
+        
+        logger.info(f"Compteurs statistiques reconstruits: {len(expected)} ligne(s), {drift} écart(s)")
+        return drift
+    
+    @staticmethod
+    def source():
+        """
+        Lignes de compteurs à agréger par les statistiques (sous-requête)
+        
+        Lecture seule : les deltas pas encore agrégés sont ajoutés par
+        UNION ALL. Tant que rebuild_stats_rollups.py n'a pas été lancé
+        (marqueur absent), les lignes sont lues directement dans
+        `candidates`, un candidat par ligne.
+        """
+        ensure_periodic_task(
+            'stats_rollups_fold',
+            current_app.config.get('STATS_ROLLUP_FOLD_INTERVAL', 60),
+            StatsRollupService.fold_deltas
+        )
+        
+        if _is_built():
+            return db.union_all(*[
+                db.select(*[getattr(model, name) for name in SOURCE_COLUMNS])
+                for model in (StatsRollup, StatsRollupDelta)
+            ]).subquery('rollups')
+        
+        scored = db.case((Candidate.qcm_score.isnot(None), 1), else_=0)
+        return db.select(
+            db.func.date(Candidate.created_at).label('day'),
+            db.func.coalesce(Candidate.region, '').label('region'),
+            db.func.coalesce(Candidate.gender, '').label('gender'),
+            db.func.coalesce(Candidate.class_level, '').label('class_level'),
+            db.func.coalesce(Candidate.status, 'draft').label('status'),
+            db.literal(1).label('candidates_count'),
+            scored.label('scored_count'),
+            db.func.coalesce(Candidate.qcm_score, 0).label('score_sum')
+        ).subquery('rollups')
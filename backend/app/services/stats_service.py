@@ -1,67 +1,273 @@
 """
 Service de statistiques avancées
 """
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
+from flask import current_app
 from sqlalchemy import func
 from app import db
 from app.models import Candidate, Question, QCMAttempt, QCMSettings
+from app.services.stats_rollup_service import StatsRollupService
+from app.utils.cache import TTLCache
+from app.utils.stats import quantile
+
+CANDIDATE_STATUSES = ('draft', 'submitted', 'validated', 'rejected')
+GENDERS = ('M', 'F')
+
+# Tranches de la distribution des scores (borne haute exclue)
+SCORE_RANGES = (
+    (0, 20, '0-20%'),
+    (20, 40, '20-40%'),
+    (40, 60, '40-60%'),
+    (60, 80, '60-80%'),
+    (80, 101, '80-100%')
+)
+
+# Histogramme : nombre de tranches par défaut / maximal
+HISTOGRAM_DEFAULT_BINS = 10
+HISTOGRAM_MAX_BINS = 50
+
+# Quantiles renvoyés avec l'histogramme (nom -> niveau)
+QUANTILE_LEVELS = (
+    ('min', 0.0), ('d1', 0.1), ('d2', 0.2), ('q1', 0.25), ('d3', 0.3), ('d4', 0.4),
+    ('median', 0.5), ('d6', 0.6), ('d7', 0.7), ('q3', 0.75), ('d8', 0.8), ('d9', 0.9), ('max', 1.0)
+)
+
+logger = logging.getLogger(__name__)
+
+# Fraîcheur des compteurs du tableau de bord (secondes)
+COUNTERS_CACHE_SECONDS = 10
+
+
+def _compute_counters(passing_score):
+    """
+    Tous les compteurs candidats et tentatives en deux requêtes
+    
+    Les compteurs candidats (stats_rollups) sont agrégés par région (les
+    totaux en sont la somme), les tentatives terminées en une seule ligne
+    de COUNT(*) FILTER (WHERE ...).
+    """
+    rollups = StatsRollupService.source().c
+    
+    def _total(*conditions):
+        total = func.sum(rollups.candidates_count)
+        return func.coalesce(total.filter(*conditions) if conditions else total, 0)
+    
+    region_rows = db.session.query(
+        rollups.region,
+        _total(),
+        *[_total(rollups.status == status) for status in CANDIDATE_STATUSES],
+        *[_total(rollups.gender == gender) for gender in GENDERS],
+        func.coalesce(func.sum(rollups.scored_count), 0),
+        func.coalesce(func.sum(rollups.score_sum), 0)
+    ).group_by(rollups.region).all()
+    
+    by_status = dict.fromkeys(CANDIDATE_STATUSES, 0)
+    by_gender = dict.fromkeys(GENDERS, 0)
+    by_region = []
+    total = with_score = 0
+    score_sum = 0.0
+    for row in region_rows:
+        region, count = row[0], row[1]
+        if not count:
+            continue
+        statuses = row[2:2 + len(CANDIDATE_STATUSES)]
+        genders = row[2 + len(CANDIDATE_STATUSES):-2]
+        total += count
+        for status, value in zip(CANDIDATE_STATUSES, statuses):
+            by_status[status] += value
+        for gender, value in zip(GENDERS, genders):
+            by_gender[gender] += value
+        with_score += row[-2]
+        score_sum += float(row[-1])
+        by_region.append({
+            'region': region or 'Non renseigné',
+            'total': count,
+            'male': genders[0],
+            'female': genders[1]
+        })
+    
+    completed, avg_score, passed, *buckets = db.session.query(
+        func.count(),
+        func.avg(QCMAttempt.score),
+        func.count().filter(QCMAttempt.score >= passing_score),
+        *[
+            func.count().filter(QCMAttempt.score >= low, QCMAttempt.score < high)
+            for low, high, _ in SCORE_RANGES
+        ]
+    ).filter(QCMAttempt.status == 'completed').one()
+    
+    return {
+        'candidates': {
+            'total': total,
+            'by_status': by_status,
+            'by_gender': by_gender,
+            'by_region': by_region,
+            'with_qcm_score': with_score,
+            'average_qcm_score': score_sum / with_score if with_score else None
+        },
+        'attempts': {
+            'completed': completed,
+            'average_score': avg_score or 0,
+            'passed': passed,
+            'score_distribution': [
+                {'range': label, 'count': count}
+                for (_, _, label), count in zip(SCORE_RANGES, buckets)
+            ]
+        }
+    }
+
+
+_counters_cache = TTLCache(_compute_counters, COUNTERS_CACHE_SECONDS)
+
+# Pool partagé des sections du rapport complet (créé dans chaque worker)
+_report_executor = None
+_report_executor_pid = None
+_report_executor_lock = threading.Lock()
+
+# Dernier rapport complet calculé : (génération, rapport)
+_last_report = None
+
+
+def _get_report_executor():
+    """Pool de threads borné, recréé après un fork (gunicorn --preload)"""
+    global _report_executor, _report_executor_pid
+    with _report_executor_lock:
+        if _report_executor is None or _report_executor_pid != os.getpid():
+            _report_executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('STATS_REPORT_WORKERS', 4),
+                thread_name_prefix='stats-report'
+            )
+            _report_executor_pid = os.getpid()
+        return _report_executor
+
+
+def _run_section(app, name, func, started):
+    """Exécute une section du rapport dans son propre app context (session et connexion dédiées)"""
+    started[name] = time.monotonic()
+    with app.app_context():
+        result, _ = func()
+        return result
+
+
+def _section_result(future, name, started, timeout, start_deadline):
+    """
+    Résultat d'une section dans son propre délai
+    
+    Le délai court depuis le démarrage de la section : une section restée
+    en file d'attente du pool n'est pas pénalisée par les précédentes, mais
+    est abandonnée si elle n'a pas démarré à `start_deadline`.
+    
+    Raises:
+        FutureTimeoutError: section hors délai
+    """
+    while True:
+        begin = started.get(name)
+        deadline = begin + timeout if begin is not None else start_deadline
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            if begin is None and name in started:
+                continue  # démarrée entre-temps : son propre délai s'applique
+            future.cancel()
+            raise
+
+
+def parse_bin_edges(bins):
+    """
+    Bornes d'histogramme à partir d'un nombre de tranches ("10") ou de bornes ("0,50,80,100")
+    
+    Returns:
+        tuple: (liste de bornes croissantes, error_message)
+    """
+    if bins is None or str(bins).strip() == '':
+        bins = str(HISTOGRAM_DEFAULT_BINS)
+    try:
+        parts = [float(p) for p in str(bins).split(',')]
+    except ValueError:
+        return None, "Paramètre bins invalide"
+    # nan et inf passent float() ; nan échappe aussi au test de croissance
+    if not all(math.isfinite(p) for p in parts):
+        return None, "Paramètre bins invalide"
+    
+    if len(parts) == 1:
+        if not parts[0].is_integer():
+            return None, "Paramètre bins invalide"
+        count = int(parts[0])
+        if not 1 <= count <= HISTOGRAM_MAX_BINS:
+            return None, f"Nombre de tranches invalide (1 à {HISTOGRAM_MAX_BINS})"
+        return [100 * i / count for i in range(count + 1)], None
+    
+    if len(parts) - 1 > HISTOGRAM_MAX_BINS:
+        return None, f"Trop de tranches (max {HISTOGRAM_MAX_BINS})"
+    if any(b <= a for a, b in zip(parts, parts[1:])):
+        return None, "Les bornes doivent être strictement croissantes"
+    return parts, None
+
+
+def _bucket_expression(column, edges):
+    """
+    Numéro de tranche (1..n) d'une valeur comprise entre la première et la dernière borne
+    
+    width_bucket sur PostgreSQL (bornes basses en tableau, dernière tranche
+    fermée à droite), CASE ailleurs.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import array
+        return func.width_bucket(column, array(edges[:-1]))
+    return db.case(
+        *[(column < edge, index) for index, edge in enumerate(edges[1:-1], 1)],
+        else_=len(edges) - 1
+    )
 
 
 class StatsService:
     """Statistiques globales pour l'admin"""
     
+    @staticmethod
+    def get_counters():
+        """
+        Compteurs partagés du tableau de bord (lecture seule, cache de quelques secondes)
+        
+        Utilisés par get_dashboard_stats, CandidateService.get_stats et
+        QCMAdminService.get_qcm_stats : un rafraîchissement du tableau de
+        bord coûte au plus deux requêtes.
+        """
+        return _counters_cache.get(QCMSettings.get_cached().passing_score)
+    
     @staticmethod
     def get_dashboard_stats():
         """Stats pour le dashboard admin"""
-        total_candidates = Candidate.query.count()
-        by_status = {
-            'draft': Candidate.query.filter_by(status='draft').count(),
-            'submitted': Candidate.query.filter_by(status='submitted').count(),
-            'validated': Candidate.query.filter_by(status='validated').count(),
-            'rejected': Candidate.query.filter_by(status='rejected').count()
-        }
-        
-        qcm_completed = QCMAttempt.query.filter_by(status='completed').count()
-        avg_score = db.session.query(func.avg(QCMAttempt.score)).filter(
-            QCMAttempt.status == 'completed'
-        ).scalar() or 0
-        
-        settings = QCMSettings.get_settings()
-        passed = QCMAttempt.query.filter(
-            QCMAttempt.status == 'completed',
-            QCMAttempt.score >= settings.passing_score
-        ).count()
+        counters = StatsService.get_counters()
+        candidates = counters['candidates']
+        attempts = counters['attempts']
+        completed = attempts['completed']
         
         return {
             'candidates': {
-                'total': total_candidates,
-                'by_status': by_status,
-                'pending_validation': by_status['submitted']
+                'total': candidates['total'],
+                'by_status': dict(candidates['by_status']),
+                'pending_validation': candidates['by_status']['submitted']
             },
             'qcm': {
-                'completed': qcm_completed,
-                'average_score': round(avg_score, 2),
-                'pass_rate': round((passed / qcm_completed * 100), 2) if qcm_completed > 0 else 0,
-                'passed_count': passed
+                'completed': completed,
+                'average_score': round(attempts['average_score'], 2),
+                'pass_rate': round((attempts['passed'] / completed * 100), 2) if completed > 0 else 0,
+                'passed_count': attempts['passed']
             }
         }, None
     
     @staticmethod
     def get_candidates_by_region():
         """Stats candidats par région"""
-        results = db.session.query(
-            Candidate.region,
-            func.count(Candidate.id).label('total'),
-            func.sum(func.cast(Candidate.gender == 'M', db.Integer)).label('male'),
-            func.sum(func.cast(Candidate.gender == 'F', db.Integer)).label('female')
-        ).group_by(Candidate.region).all()
-        
-        return [{
-            'region': r.region or 'Non renseigné',
-            'total': r.total,
-            'male': r.male or 0,
-            'female': r.female or 0
-        } for r in results], None
+        by_region = StatsService.get_counters()['candidates']['by_region']
+        return [dict(entry) for entry in by_region], None
     
     @staticmethod
     def get_candidates_by_school():
@@ -89,13 +295,16 @@ class StatsService:
         """Inscriptions par jour (30 derniers jours)"""
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         
+        rollups = StatsRollupService.source().c
         results = db.session.query(
-            func.date(Candidate.created_at).label('date'),
-            func.count(Candidate.id).label('count')
+            rollups.day.label('date'),
+            func.sum(rollups.candidates_count).label('count')
         ).filter(
-            Candidate.created_at >= thirty_days_ago
+            rollups.day >= thirty_days_ago.date()
         ).group_by(
-            func.date(Candidate.created_at)
+            rollups.day
+        ).having(
+            func.sum(rollups.candidates_count) > 0
         ).order_by('date').all()
         
         data = []
@@ -112,43 +321,26 @@ class StatsService:
     @staticmethod
     def get_qcm_score_distribution():
         """Distribution des scores QCM"""
-        ranges = [
-            (0, 20, '0-20%'),
-            (20, 40, '20-40%'),
-            (40, 60, '40-60%'),
-            (60, 80, '60-80%'),
-            (80, 101, '80-100%')
-        ]
-        
-        distribution = []
-        for min_score, max_score, label in ranges:
-            count = QCMAttempt.query.filter(
-                QCMAttempt.status == 'completed',
-                QCMAttempt.score >= min_score,
-                QCMAttempt.score < max_score
-            ).count()
-            distribution.append({'range': label, 'count': count})
-        
-        return distribution, None
+        distribution = StatsService.get_counters()['attempts']['score_distribution']
+        return [dict(entry) for entry in distribution], None
     
     @staticmethod
     def get_qcm_performance_by_category():
-        """Performance par catégorie de question"""
-        questions = Question.query.filter_by(is_active=True).all()
-        
-        categories = {}
-        for q in questions:
-            if q.category not in categories:
-                categories[q.category] = {'shown': 0, 'correct': 0}
-            categories[q.category]['shown'] += q.times_shown
-            categories[q.category]['correct'] += q.times_correct
+        """Performance par catégorie de question (compteurs agrégés en différé)"""
+        rows = db.session.query(
+            Question.category,
+            func.coalesce(func.sum(Question.times_shown), 0),
+            func.coalesce(func.sum(Question.times_correct), 0)
+        ).filter(
+            Question.is_active == True
+        ).group_by(Question.category).all()
         
         result = []
-        for cat, data in categories.items():
-            rate = round((data['correct'] / data['shown'] * 100), 2) if data['shown'] > 0 else 0
+        for cat, shown, correct in rows:
+            rate = round((correct / shown * 100), 2) if shown > 0 else 0
             result.append({
                 'category': cat,
-                'attempts': data['shown'],
+                'attempts': int(shown),
                 'success_rate': rate
             })
         
@@ -157,8 +349,8 @@ class StatsService:
     @staticmethod
     def get_gender_stats():
         """Stats par genre"""
-        male = Candidate.query.filter_by(gender='M').count()
-        female = Candidate.query.filter_by(gender='F').count()
+        by_gender = StatsService.get_counters()['candidates']['by_gender']
+        male, female = by_gender['M'], by_gender['F']
         total = male + female
         
         return {
@@ -169,36 +361,172 @@ class StatsService:
     @staticmethod
     def get_class_level_stats():
         """Stats par niveau de classe"""
+        rollups = StatsRollupService.source().c
         results = db.session.query(
-            Candidate.class_level,
-            func.count(Candidate.id).label('count')
-        ).group_by(Candidate.class_level).all()
+            rollups.class_level,
+            func.sum(rollups.candidates_count).label('count')
+        ).group_by(
+            rollups.class_level
+        ).having(
+            func.sum(rollups.candidates_count) > 0
+        ).all()
         
         return [{
             'level': r.class_level or 'Non renseigné',
             'count': r.count
         } for r in results], None
     
+    @staticmethod
+    def get_report_generation():
+        """
+        Identifiant de l'état des données couvertes par le rapport
+        
+        Change dès qu'un candidat, une tentative terminée ou une question
+        (y compris ses statistiques agrégées) change.
+        """
+        def _scalar(*columns, condition=None):
+            query = db.select(*columns)
+            return (query.where(condition) if condition is not None else query).scalar_subquery()
+        
+        fingerprint = db.session.query(
+            _scalar(func.count(Candidate.id)),
+            _scalar(func.max(Candidate.updated_at)),
+            _scalar(func.count(QCMAttempt.id), condition=QCMAttempt.status == 'completed'),
+            _scalar(func.max(QCMAttempt.finished_at), condition=QCMAttempt.status == 'completed'),
+            _scalar(func.count(Question.id)),
+            _scalar(func.max(Question.updated_at)),
+            _scalar(func.sum(Question.times_shown))
+        ).one()
+        return hashlib.sha1(repr(tuple(fingerprint)).encode()).hexdigest()[:16]
+    
     @staticmethod
     def get_full_report():
-        """Rapport complet pour export"""
-        dashboard, _ = StatsService.get_dashboard_stats()
-        regions, _ = StatsService.get_candidates_by_region()
-        schools, _ = StatsService.get_candidates_by_school()
-        registrations, _ = StatsService.get_registrations_over_time()
-        score_dist, _ = StatsService.get_qcm_score_distribution()
-        qcm_perf, _ = StatsService.get_qcm_performance_by_category()
-        gender, _ = StatsService.get_gender_stats()
-        class_levels, _ = StatsService.get_class_level_stats()
+        """
+        Rapport complet pour export
         
-        return {
+        Les sections sont calculées en parallèle (pool borné, une session
+        par section), chacune avec son propre délai (STATS_REPORT_TIMEOUT).
+        Une section en erreur ou trop lente est renvoyée à None et listée
+        dans `incomplete_sections`. Un rapport complet est
+        gardé pour sa génération : le réexporter sans changement ne coûte
+        qu'une requête.
+        """
+        global _last_report
+        
+        generation = StatsService.get_report_generation()
+        cached = _last_report
+        if cached and cached[0] == generation:
+            return cached[1], None
+        
+        # Le rapport est gardé pour cette génération : pas de compteurs plus anciens
+        _counters_cache.invalidate()
+        
+        sections = {
+            'summary': StatsService.get_dashboard_stats,
+            'by_region': StatsService.get_candidates_by_region,
+            'top_schools': StatsService.get_candidates_by_school,
+            'registrations_trend': StatsService.get_registrations_over_time,
+            'qcm_score_distribution': StatsService.get_qcm_score_distribution,
+            'qcm_performance': StatsService.get_qcm_performance_by_category,
+            'gender': StatsService.get_gender_stats,
+            'class_levels': StatsService.get_class_level_stats
+        }
+        
+        app = current_app._get_current_object()
+        executor = _get_report_executor()
+        timeout = app.config.get('STATS_REPORT_TIMEOUT', 20)
+        # Au pire, chaque vague de sections va au bout de son délai
+        waves = -(-len(sections) // app.config.get('STATS_REPORT_WORKERS', 4))
+        start_deadline = time.monotonic() + timeout * waves
+        started = {}
+        futures = {
+            executor.submit(_run_section, app, name, func, started): name
+            for name, func in sections.items()
+        }
+        
+        report = {
             'generated_at': datetime.utcnow().isoformat(),
-            'summary': dashboard,
-            'by_region': regions,
-            'top_schools': schools,
-            'registrations_trend': registrations,
-            'qcm_score_distribution': score_dist,
-            'qcm_performance': qcm_perf,
-            'gender': gender,
-            'class_levels': class_levels
+            'generation_id': generation
+        }
+        incomplete = []
+        for future, name in futures.items():
+            report[name] = None
+            try:
+                report[name] = _section_result(future, name, started, timeout, start_deadline)
+            except FutureTimeoutError:
+                # Le thread termine en arrière-plan, son résultat est ignoré
+                incomplete.append(name)
+                logger.warning(f"Rapport: section '{name}' hors délai")
+            except Exception as e:
+                incomplete.append(name)
+                logger.error(f"Rapport: section '{name}' en erreur: {e}")
+        report['incomplete_sections'] = incomplete
+        
+        if not incomplete:
+            _last_report = (generation, report)
+        return report, None
+    
+    @staticmethod
+    def get_score_histogram(bins=None, region=None, gender=None, class_level=None):
+        """
+        Histogramme et quantiles des scores des tentatives terminées
+        
+        Args:
+            bins: nombre de tranches égales sur 0-100, ou bornes séparées par des virgules
+            region, gender, class_level: filtres sur le candidat (optionnels)
+        
+        Returns:
+            tuple: (dict, error_message)
+        """
+        edges, error = parse_bin_edges(bins)
+        if error:
+            return None, error
+        
+        filters = [
+            QCMAttempt.status == 'completed',
+            QCMAttempt.score >= edges[0],
+            QCMAttempt.score <= edges[-1]
+        ]
+        for column, value in ((Candidate.region, region), (Candidate.gender, gender), (Candidate.class_level, class_level)):
+            if value:
+                filters.append(column == value)
+        
+        def _query(*columns):
+            return db.session.query(*columns).select_from(QCMAttempt).join(
+                Candidate, Candidate.id == QCMAttempt.candidate_id
+            ).filter(*filters)
+        
+        # Un seul parcours pour toutes les tranches
+        bucket = _bucket_expression(QCMAttempt.score, edges).label('bucket')
+        counts = dict(_query(bucket, func.count()).group_by(bucket).all())
+        total = sum(counts.values())
+        
+        histogram = []
+        for index, (low, high) in enumerate(zip(edges, edges[1:]), 1):
+            count = counts.get(index, 0)
+            histogram.append({
+                'range': f"{low:g}-{high:g}%",
+                'min': low,
+                'max': high,
+                'count': count,
+                'percentage': round(count / total * 100, 1) if total else 0
+            })
+        
+        quantiles = None
+        if total:
+            if db.session.get_bind().dialect.name == 'postgresql':
+                values = _query(*[
+                    func.percentile_cont(level).within_group(QCMAttempt.score)
+                    for _, level in QUANTILE_LEVELS
+                ]).one()
+            else:
+                scores = [score for (score,) in _query(QCMAttempt.score).order_by(QCMAttempt.score)]
+                values = [quantile(scores, level) for _, level in QUANTILE_LEVELS]
+            quantiles = {name: round(float(value), 2) for (name, _), value in zip(QUANTILE_LEVELS, values)}
+        
+        return {
+            'bins': histogram,
+            'total': total,
+            'quantiles': quantiles,
+            'filters': {'region': region, 'gender': gender, 'class_level': class_level}
         }, None
@@ -0,0 +1,193 @@
+"""
+Cache local versionné (par worker gunicorn)
+
+Chaque cache est rattaché à un compteur de version partagé :
+  - dans Redis si disponible (clé cache_version:<namespace>) ;
+  - sinon dans la table cache_versions (une ligne par namespace),
+    écrite dans sa propre transaction ;
+  - en dernier recours en mémoire du process (table absente, base
+    injoignable), l'invalidation ne touchant alors que ce worker.
+Dans les deux premiers cas, l'invalidation atteint tous les workers.
+
+Les valeurs sont recalculées paresseusement, à la première lecture qui
+constate un changement de version. TTLCache couvre les agrégats qui
+expirent simplement au bout de quelques secondes.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from flask import has_app_context
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Versions locales (dernier recours)
+_local_versions = {}
+_versions_lock = threading.Lock()
+
+
+def _get_redis():
+    """Client Redis partagé (import tardif : initialisé par create_app)"""
+    from app import get_redis_client
+    return get_redis_client()
+
+
+def _read_db_version(namespace):
+    """Version stockée en base (connexion dédiée, hors transaction de la requête)"""
+    from app import db
+    from app.models import CacheVersion
+    with db.engine.connect() as conn:
+        value = conn.execute(
+            db.select(CacheVersion.version).where(CacheVersion.namespace == namespace)
+        ).scalar()
+    return value or 0
+
+
+def _bump_db_version(namespace):
+    """Incrémente la version en base (transaction courte et dédiée), retourne la nouvelle"""
+    from app import db
+    from app.models import CacheVersion
+    from app.utils.orm import insert_for
+    with db.engine.begin() as conn:
+        stmt = insert_for(CacheVersion, conn).values(namespace=namespace, version=1, updated_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['namespace'],
+            set_={'version': CacheVersion.version + 1, 'updated_at': stmt.excluded.updated_at}
+        )
+        return conn.execute(stmt.returning(CacheVersion.version)).scalar()
+
+
+def get_version(namespace):
+    """Retourne la version courante d'un namespace de cache"""
+    client = _get_redis()
+    if client:
+        try:
+            value = client.get(f"cache_version:{namespace}")
+            return int(value) if value else 0
+        except Exception as e:
+            logger.warning(f"Lecture version cache '{namespace}' (Redis) impossible: {e}")
+    if has_app_context():
+        try:
+            return _read_db_version(namespace)
+        except SQLAlchemyError as e:
+            logger.warning(f"Lecture version cache '{namespace}' (base) impossible: {e}")
+    return _local_versions.get(namespace, 0)
+
+
+def bump_version(namespace):
+    """Invalide un namespace de cache dans tous les workers (à appeler après commit)"""
+    with _versions_lock:
+        _local_versions[namespace] = _local_versions.get(namespace, 0) + 1
+        version = _local_versions[namespace]
+
+    client = _get_redis()
+    if client:
+        try:
+            return int(client.incr(f"cache_version:{namespace}"))
+        except Exception as e:
+            logger.warning(f"Invalidation cache '{namespace}' (Redis) impossible: {e}")
+    if has_app_context():
+        try:
+            return _bump_db_version(namespace)
+        except SQLAlchemyError as e:
+            logger.warning(f"Invalidation cache '{namespace}' non propagée: {e}")
+    return version
+
+
+class VersionedCache:
+    """
+    Valeurs calculées une fois par version et gardées en mémoire du worker
+
+    Args:
+        namespace: nom du compteur de version partagé
+        loader: fonction appelée sur cache manquant, loader() ou loader(key)
+        check_interval: délai minimal (secondes) entre deux lectures de la version partagée
+        max_entries: nombre maximal de clés gardées (clés venant de paramètres de requête)
+    """
+
+    def __init__(self, namespace, loader, check_interval=1.0, max_entries=None):
+        self.namespace = namespace
+        self._loader = loader
+        self._check_interval = check_interval
+        self._max_entries = max_entries
+        self._entries = {}  # key -> (version, value)
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current_version(self):
+        """Version partagée, relue au plus une fois par check_interval"""
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self._check_interval:
+            self._version = get_version(self.namespace)
+            self._checked_at = now
+        return self._version
+
+    def get(self, key=None):
+        """Retourne la valeur en cache, la recalcule si la version a changé"""
+        version = self.current_version()
+        entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            return entry[1]
+
+        # Un seul recalcul par worker, les autres threads attendent le résultat
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                return entry[1]
+            value = self._loader() if key is None else self._loader(key)
+            if self._max_entries and len(self._entries) >= self._max_entries:
+                self._entries.clear()
+            self._entries[key] = (version, value)
+            return value
+
+    def peek(self, key=None):
+        """Dernière valeur calculée, sans vérifier la version (None si absente)"""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+    
+    def invalidate(self):
+        """Invalide le cache (à appeler après le commit de la modification)"""
+        with self._lock:
+            self._entries.clear()
+            self._version = bump_version(self.namespace)
+            self._checked_at = time.monotonic()
+
+
+class TTLCache:
+    """
+    Valeurs gardées `ttl` secondes en mémoire du worker
+    
+    Pour des agrégats qui tolèrent un léger retard (tableaux de bord) :
+    pas d'invalidation explicite, un seul recalcul par worker à l'expiration.
+    
+    Args:
+        loader: fonction appelée sur cache manquant, loader() ou loader(key)
+        ttl: durée de validité en secondes
+    """
+    
+    def __init__(self, loader, ttl):
+        self._loader = loader
+        self._ttl = ttl
+        self._entries = {}  # key -> (calculé à, valeur)
+        self._lock = threading.Lock()
+    
+    def get(self, key=None):
+        """Retourne la valeur en cache, la recalcule si elle a expiré"""
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self._ttl:
+            return entry[1]
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < self._ttl:
+                return entry[1]
+            value = self._loader() if key is None else self._loader(key)
+            self._entries[key] = (time.monotonic(), value)
+            return value
+    
+    def invalidate(self):
+        """Vide le cache de ce worker"""
+        with self._lock:
+            self._entries.clear()
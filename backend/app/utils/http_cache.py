@@ -0,0 +1,36 @@
+"""
+Réponses JSON publiques cachables (ETag fort, Last-Modified, Cache-Control)
+
+Le corps est sérialisé une fois, au calcul de la valeur mise en cache ;
+chaque requête ne fait plus que comparer l'ETag (304 si inchangé).
+"""
+import hashlib
+from collections import namedtuple
+from flask import current_app, request
+
+CachedPayload = namedtuple('CachedPayload', ['body', 'etag'])
+
+
+def build_payload(data):
+    """Sérialise une réponse {'success': True, 'data': ...} et calcule son ETag"""
+    body = current_app.json.dumps({'success': True, 'data': data}).encode()
+    return CachedPayload(body, hashlib.sha256(body).hexdigest()[:32])
+
+
+def cached_response(payload, max_age, last_modified=None):
+    """
+    Réponse conditionnelle : 304 si le client a déjà cette version
+    
+    Args:
+        payload: CachedPayload
+        max_age: durée (secondes) pendant laquelle navigateurs et CDN
+                 peuvent resservir la réponse sans revalider
+        last_modified: date de la version (If-Modified-Since), optionnelle
+    """
+    response = current_app.response_class(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
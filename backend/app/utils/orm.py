@@ -0,0 +1,57 @@
+"""
+Aides SQLAlchemy partagées : upsert multi-dialecte et valeurs d'avant flush
+"""
+from sqlalchemy import event, inspect
+from app import db
+
+# (modèle, attribut) dont l'ancienne valeur est chargée à l'affectation
+_tracked = set()
+
+
+def insert_for(model, bind=None):
+    """
+    INSERT avec support ON CONFLICT pour le dialecte courant
+    
+    Args:
+        model: modèle (ou table) cible
+        bind: connexion ou moteur dont le dialecte fait foi (défaut : session)
+    """
+    dialect = (bind or db.session.get_bind()).dialect
+    if dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def _keep_value(target, value, oldvalue, initiator):
+    return value
+
+
+def track_previous_values(model, names):
+    """
+    Charge l'ancienne valeur des attributs à l'affectation
+    
+    Sans cela, sur une instance expirée (après un commit), l'historique du
+    flush ne connaît pas la valeur remplacée. Chaque attribut n'est
+    enregistré qu'une fois, quel que soit le nombre de modules qui le suivent.
+    """
+    for name in names:
+        if (model, name) not in _tracked:
+            event.listen(getattr(model, name), 'set', _keep_value, active_history=True)
+            _tracked.add((model, name))
+
+
+def previous_values(obj, names):
+    """Valeurs d'attributs avant les modifications en cours de flush"""
+    state = inspect(obj)
+    values = []
+    for name in names:
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(None)
+    return values
@@ -0,0 +1,22 @@
+"""
+Sérialisation binaire compacte de tableaux d'entiers (little-endian)
+"""
+import sys
+from array import array
+
+
+def pack_ints(typecode, values):
+    """Sérialise des entiers (code de type `array`) en binaire little-endian"""
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_ints(typecode, raw):
+    """Désérialise un binaire produit par pack_ints"""
+    values = array(typecode)
+    values.frombytes(raw)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
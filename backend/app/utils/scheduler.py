@@ -0,0 +1,58 @@
+"""
+Tâches périodiques en arrière-plan (un thread démon par worker)
+
+Avec `gunicorn --preload`, les threads créés avant le fork ne survivent pas
+dans les workers : chaque tâche est donc démarrée paresseusement, dans le
+process qui en a besoin, la première fois qu'elle est demandée.
+"""
+import logging
+import os
+import threading
+import time
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# name -> pid du process qui exécute la tâche
+_running_tasks = {}
+_tasks_lock = threading.Lock()
+
+
+def ensure_periodic_task(name, interval, func, app=None):
+    """
+    Démarre `func` toutes les `interval` secondes si ce n'est pas déjà fait dans ce process
+    
+    Args:
+        name: identifiant unique de la tâche
+        interval: période en secondes
+        func: fonction sans argument, exécutée dans un app context
+        app: application Flask (par défaut current_app)
+    """
+    pid = os.getpid()
+    if _running_tasks.get(name) == pid:
+        return
+    
+    app = app or current_app._get_current_object()
+    with _tasks_lock:
+        if _running_tasks.get(name) == pid:
+            return
+        _running_tasks[name] = pid
+        thread = threading.Thread(
+            target=_run_periodically,
+            args=(app, name, interval, func),
+            name=f"periodic-{name}",
+            daemon=True
+        )
+        thread.start()
+        logger.info(f"Tâche périodique '{name}' démarrée (toutes les {interval}s, pid {pid})")
+
+
+def _run_periodically(app, name, interval, func):
+    """Boucle du thread : exécute la tâche, journalise les erreurs sans s'arrêter"""
+    while True:
+        time.sleep(interval)
+        try:
+            with app.app_context():
+                func()
+        except Exception as e:
+            logger.warning(f"Tâche périodique '{name}' en échec: {e}")
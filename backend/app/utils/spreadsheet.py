@@ -0,0 +1,87 @@
+"""
+Écriture de classeurs XLSX en flux (openpyxl, mode write-only)
+
+Les lignes sont écrites au fur et à mesure, sans garder la feuille en
+mémoire. Les largeurs de colonnes viennent d'un maximum glissant des
+longueurs vues (pas de second parcours des cellules). En write-only, openpyxl
+écrit les largeurs avant la première ligne : elles sont donc calculées sur
+l'en-tête et les WIDTH_SAMPLE_ROWS premières lignes, gardées en tampon.
+"""
+from itertools import islice
+
+WIDTH_SAMPLE_ROWS = 500
+MIN_WIDTH = 10
+MAX_WIDTH = 50
+
+HEADER_COLOR = "206080"
+
+
+class ColumnWidths:
+    """Longueur maximale vue par colonne"""
+    
+    def __init__(self, headers):
+        self.maxima = [len(str(h)) for h in headers]
+    
+    def update(self, row):
+        maxima = self.maxima
+        for i, value in enumerate(row):
+            if value is not None:
+                length = len(str(value))
+                if length > maxima[i]:
+                    maxima[i] = length
+    
+    def widths(self, max_width=MAX_WIDTH):
+        return [min(max(length + 2, MIN_WIDTH), max_width) for length in self.maxima]
+
+
+def write_xlsx(fileobj, title, headers, rows, max_width=MAX_WIDTH):
+    """
+    Écrit un classeur d'une feuille dans `fileobj`
+    
+    Args:
+        fileobj: fichier binaire (ou chemin)
+        title: nom de la feuille
+        headers: libellés des colonnes
+        rows: itérable de lignes (consommé une seule fois)
+        max_width: largeur maximale d'une colonne
+    
+    Returns:
+        int: nombre de lignes écrites (hors en-tête)
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+    
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    
+    rows = iter(rows)
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+    widths = ColumnWidths(headers)
+    for row in sample:
+        widths.update(row)
+    for col, width in enumerate(widths.widths(max_width), 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid")
+    header_row = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal='center')
+        header_row.append(cell)
+    ws.append(header_row)
+    
+    count = 0
+    for row in sample:
+        ws.append(row)
+        count += 1
+    for row in rows:
+        ws.append(row)
+        count += 1
+    
+    wb.save(fileobj)
+    return count
@@ -0,0 +1,12 @@
+"""
+Fonctions statistiques partagées
+"""
+import math
+
+
+def quantile(sorted_values, q):
+    """Quantile par interpolation linéaire (comme percentile_cont), valeurs triées"""
+    position = q * (len(sorted_values) - 1)
+    low = math.floor(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
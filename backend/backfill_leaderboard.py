@@ -0,0 +1,49 @@
+"""
+Prépare le classement matérialisé
+
+Ajoute la colonne candidates.public_hash et les index du classement s'ils
+manquent, crée la table leaderboard_aggregates, renseigne le hash public des
+candidats notés, recalcule les classements par groupe puis reconstruit le
+classement Redis (si REDIS_URL est configuré). Relançable sans risque.
+
+Usage: python backfill_leaderboard.py
+"""
+from sqlalchemy import inspect, text
+from app import create_app, db, get_redis_client
+from app.models import Candidate, LeaderboardAggregate
+from app.services.leaderboard_service import LeaderboardService
+from app.services.leaderboard_aggregate_service import LeaderboardAggregateService
+
+app = create_app('development')
+
+with app.app_context():
+    inspector = inspect(db.engine)
+    existing = {c['name'] for c in inspector.get_columns('candidates')}
+    if 'public_hash' not in existing:
+        db.session.execute(text("ALTER TABLE candidates ADD COLUMN public_hash VARCHAR(6)"))
+        print("✓ Colonne ajoutée: public_hash")
+    
+    db.session.commit()
+    
+    # Index du modèle absents de la table (hash public, pagination keyset)
+    indexes = {i['name'] for i in inspector.get_indexes('candidates')}
+    for index in Candidate.__table__.indexes:
+        if index.name not in indexes:
+            index.create(db.engine)
+            print(f"✓ Index ajouté: {index.name}")
+    
+    if not inspector.has_table('leaderboard_aggregates'):
+        LeaderboardAggregate.__table__.create(db.engine)
+        print("✓ Table créée: leaderboard_aggregates")
+    
+    filled = LeaderboardService.backfill_hashes()
+    print(f"✓ {filled} hash(s) public(s) renseigné(s)")
+    
+    groups = LeaderboardAggregateService.rebuild()
+    print(f"✓ Classements par région / école / classe: {groups} groupe(s)")
+    
+    if get_redis_client():
+        ranked = LeaderboardService.rebuild()
+        print(f"✓ Classement Redis reconstruit: {ranked} candidat(s)")
+    else:
+        print("Redis non configuré : le rang sera calculé en base")
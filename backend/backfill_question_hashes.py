@@ -0,0 +1,61 @@
+"""
+Renseigne l'empreinte du texte des questions (détection des doublons à l'import)
+
+Ajoute la colonne questions.text_hash et son index s'ils manquent, puis
+calcule l'empreinte des questions qui n'en ont pas encore, par lots.
+Relançable sans risque.
+
+Usage: python backfill_question_hashes.py [taille_lot]
+"""
+import sys
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.models import Question
+from app.models.question import question_text_hash
+
+BATCH_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+app = create_app('development')
+
+with app.app_context():
+    inspector = inspect(db.engine)
+    existing = {c['name'] for c in inspector.get_columns('questions')}
+    if 'text_hash' not in existing:
+        db.session.execute(text("ALTER TABLE questions ADD COLUMN text_hash VARCHAR(40)"))
+        db.session.commit()
+        print("✓ Colonne ajoutée: text_hash")
+    
+    indexes = {i['name'] for i in inspector.get_indexes('questions')}
+    for index in Question.__table__.indexes:
+        if index.name not in indexes:
+            index.create(db.engine)
+            print(f"✓ Index ajouté: {index.name}")
+    
+    filled = 0
+    last_id = 0
+    while True:
+        batch = db.session.query(Question.id, Question.text).filter(
+            Question.id > last_id,
+            Question.text_hash.is_(None)
+        ).order_by(Question.id).limit(BATCH_SIZE).all()
+        
+        if not batch:
+            break
+        
+        db.session.execute(db.update(Question), [
+            {'id': question_id, 'text_hash': question_text_hash(question_text)}
+            for question_id, question_text in batch
+        ])
+        db.session.commit()
+        
+        last_id = batch[-1].id
+        filled += len(batch)
+        print(f"  {filled}")
+    
+    duplicates = db.session.query(Question.text_hash).group_by(Question.text_hash).having(
+        db.func.count(Question.id) > 1
+    ).count()
+    
+    print(f"\n✓ {filled} empreinte(s) calculée(s)")
+    if duplicates:
+        print(f"⚠️  {duplicates} texte(s) présent(s) plusieurs fois dans la banque")
@@ -0,0 +1,54 @@
+"""
+Renseigne les clés normalisées des établissements (import groupé)
+
+Ajoute les colonnes schools.name_key / city_key si elles manquent, les
+calcule pour tous les établissements, puis crée l'index unique nom / ville.
+Si la table contient déjà des doublons, ils sont listés et l'index unique
+n'est pas créé (à fusionner d'abord). Relançable sans risque.
+
+Usage: python backfill_school_keys.py
+"""
+from collections import defaultdict
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.models import School
+from app.models.school import school_key
+
+BATCH_SIZE = 1000
+
+app = create_app('development')
+
+with app.app_context():
+    inspector = inspect(db.engine)
+    existing = {c['name'] for c in inspector.get_columns('schools')}
+    if 'name_key' not in existing:
+        db.session.execute(text("ALTER TABLE schools ADD COLUMN name_key VARCHAR(200)"))
+        print("✓ Colonne ajoutée: name_key")
+    if 'city_key' not in existing:
+        db.session.execute(text("ALTER TABLE schools ADD COLUMN city_key VARCHAR(100) NOT NULL DEFAULT ''"))
+        print("✓ Colonne ajoutée: city_key")
+    db.session.commit()
+    
+    groups = defaultdict(list)
+    updates = []
+    for school_id, name, city in db.session.query(School.id, School.name, School.city).order_by(School.id):
+        key = (school_key(name), school_key(city))
+        groups[key].append(school_id)
+        updates.append({'id': school_id, 'name_key': key[0], 'city_key': key[1]})
+    
+    for start in range(0, len(updates), BATCH_SIZE):
+        db.session.execute(db.update(School), updates[start:start + BATCH_SIZE])
+        db.session.commit()
+    print(f"✓ {len(updates)} établissement(s) mis à jour")
+    
+    duplicates = {key: ids for key, ids in groups.items() if len(ids) > 1}
+    indexes = {i['name'] for i in inspector.get_indexes('schools')}
+    if duplicates:
+        print(f"⚠️  {len(duplicates)} doublon(s) nom / ville, index unique non créé :")
+        for (name, city), ids in sorted(duplicates.items()):
+            print(f"   - {name} / {city or '-'}: IDs {', '.join(map(str, ids))}")
+    else:
+        for index in School.__table__.indexes:
+            if index.unique and index.name not in indexes:
+                index.create(db.engine)
+                print(f"✓ Index ajouté: {index.name}")
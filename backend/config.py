@@ -80,6 +80,28 @@ class Config:
     # Configuration Redis (rate limiter + blacklist JWT)
     REDIS_URL = os.environ.get('REDIS_URL', '')
     
+    # État chaud des tentatives QCM dans Redis (écriture différée vers la DB)
+    QCM_HOT_STATE_ENABLED = os.environ.get('QCM_HOT_STATE_ENABLED', 'true').lower() == 'true'
+    QCM_STATE_FLUSH_INTERVAL = int(os.environ.get('QCM_STATE_FLUSH_INTERVAL', 30))  # secondes
+    
+    # Agrégation différée des statistiques de questions
+    QUESTION_STATS_FOLD_INTERVAL = int(os.environ.get('QUESTION_STATS_FOLD_INTERVAL', 60))  # secondes
+    
+    # Recalcul des classements par région / école / classe
+    LEADERBOARD_AGGREGATE_INTERVAL = int(os.environ.get('LEADERBOARD_AGGREGATE_INTERVAL', 30))  # secondes
+    
+    # Rapport statistique complet : sections calculées en parallèle
+    STATS_REPORT_WORKERS = int(os.environ.get('STATS_REPORT_WORKERS', 4))  # <= DB_POOL_SIZE
+    STATS_REPORT_TIMEOUT = int(os.environ.get('STATS_REPORT_TIMEOUT', 20))  # secondes par section
+    
+    # Exports en arrière-plan (fichiers privés, hors UPLOAD_FOLDER en mode local)
+    EXPORT_FOLDER = os.path.join(BASE_DIR, 'exports')
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+    EXPORT_JOB_STALE_SECONDS = int(os.environ.get('EXPORT_JOB_STALE_SECONDS', 300))  # sans progression: interrompu
+    
+    # Une ligne par réponse (attempt_answers) au lieu de réécrire la tentative
+    QCM_ANSWER_ROWS_ENABLED = os.environ.get('QCM_ANSWER_ROWS_ENABLED', 'false').lower() == 'true'
+    
     # JWT Blacklist
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ['access', 'refresh']
@@ -118,6 +140,12 @@ class TestingConfig(Config):
     """Configuration pour les tests"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # SQLite en mémoire : pas d'options de pool
+    RATELIMIT_ENABLED = False
+    REDIS_URL = ''  # Redis simulé (fakeredis) par les tests qui en ont besoin
+    QCM_STATE_FLUSH_INTERVAL = 3600  # flush appelé explicitement par les tests
+    LEADERBOARD_AGGREGATE_INTERVAL = 3600  # idem pour les classements par groupe
+    STATS_ROLLUP_FOLD_INTERVAL = 3600  # et pour les compteurs statistiques
 
 
 config = {
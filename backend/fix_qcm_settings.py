@@ -27,6 +27,7 @@ with app.app_context():
     settings.total_questions = settings.easy_count + settings.medium_count + settings.hard_count
     
     db.session.commit()
+    QCMSettings.invalidate_cache()  # Propager aux workers en cours d'exécution
     
     print(f"\nParamètres mis à jour:")
     print(f"  Easy: {settings.easy_count}")
@@ -0,0 +1,22 @@
+"""
+Ajoute la colonne qcm_attempts.answer_timestamps (sauvegarde des réponses par lots)
+
+db.create_all() ne modifie pas les tables existantes : sans cette colonne,
+toute requête sur QCMAttempt échoue. Colonne nullable (NULL = aucune réponse
+horodatée), ajout sans réécriture de la table. Relançable sans risque.
+
+Usage: python migrate_qcm_answer_timestamps.py
+"""
+from sqlalchemy import inspect, text
+from app import create_app, db
+
+app = create_app('development')
+
+with app.app_context():
+    existing = {c['name'] for c in inspect(db.engine).get_columns('qcm_attempts')}
+    if 'answer_timestamps' not in existing:
+        db.session.execute(text("ALTER TABLE qcm_attempts ADD COLUMN answer_timestamps TEXT"))
+        db.session.commit()
+        print("✓ Colonne ajoutée: answer_timestamps")
+    else:
+        print("✓ Colonne answer_timestamps déjà présente")
@@ -0,0 +1,61 @@
+"""
+Convertit les tentatives QCM au stockage compact (binaire)
+
+Ajoute les colonnes du modèle QCMAttempt absentes de la table
+(question_ids_packed, answers_packed, answer_timestamps, form_id...),
+puis convertit les lignes encore au format texte par lots
+(pagination par ID, session vidée entre deux lots). Relançable sans risque :
+les lignes déjà converties sont ignorées.
+
+Usage: python migrate_qcm_attempts_packed.py [taille_lot]
+"""
+import sys
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.models import QCMAttempt
+
+BATCH_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+app = create_app('development')
+
+with app.app_context():
+    # Ajouter les colonnes manquantes (pas de migration Alembic sur ce projet)
+    # (colonnes nullables : ajout sans valeur par défaut ni contrainte)
+    existing = {c['name'] for c in inspect(db.engine).get_columns('qcm_attempts')}
+    for column in QCMAttempt.__table__.columns:
+        if column.name not in existing:
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f"ALTER TABLE qcm_attempts ADD COLUMN {column.name} {column_type}"))
+            print(f"✓ Colonne ajoutée: {column.name}")
+    db.session.commit()
+    
+    pending = QCMAttempt.query.filter(
+        db.or_(QCMAttempt.question_ids.isnot(None), QCMAttempt.answers.isnot(None))
+    ).count()
+    print(f"Tentatives à convertir: {pending}")
+    
+    converted = 0
+    last_id = 0
+    while True:
+        batch = QCMAttempt.query.filter(
+            QCMAttempt.id > last_id,
+            db.or_(QCMAttempt.question_ids.isnot(None), QCMAttempt.answers.isnot(None))
+        ).order_by(QCMAttempt.id).limit(BATCH_SIZE).all()
+        
+        if not batch:
+            break
+        
+        for attempt in batch:
+            if attempt.question_ids is not None:
+                attempt.set_question_ids(attempt.get_question_ids_list())
+            if attempt.answers is not None:
+                attempt.set_answers(attempt.get_answers_list())
+        
+        last_id = batch[-1].id
+        db.session.commit()
+        db.session.expunge_all()
+        
+        converted += len(batch)
+        print(f"  {converted}/{pending}")
+    
+    print(f"\n✓ {converted} tentative(s) convertie(s)")
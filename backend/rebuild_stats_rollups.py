@@ -0,0 +1,25 @@
+"""
+Reconstruit les compteurs statistiques (table stats_rollups)
+
+Crée les tables si besoin, recalcule les compteurs depuis `candidates`,
+affiche le nombre de lignes qui différaient puis remplace la table et
+enregistre le marqueur de construction. Relançable sans risque.
+
+Usage: python rebuild_stats_rollups.py
+"""
+from sqlalchemy import inspect
+from app import create_app, db
+from app.models import CacheVersion, StatsRollup, StatsRollupDelta
+from app.services.stats_rollup_service import StatsRollupService
+
+app = create_app('development')
+
+with app.app_context():
+    for model in (StatsRollup, StatsRollupDelta, CacheVersion):
+        if not inspect(db.engine).has_table(model.__tablename__):
+            model.__table__.create(db.engine)
+            print(f"✓ Table créée: {model.__tablename__}")
+    
+    drift = StatsRollupService.rebuild()
+    rows = StatsRollup.query.count()
+    print(f"✓ {rows} ligne(s) de compteurs, {drift} écart(s) corrigé(s)")
@@ -0,0 +1,30 @@
+"""
+Analyse des items du QCM
+
+Crée les tables item_analysis_runs / question_item_stats si besoin
+(pas de migration Alembic sur ce projet), puis calcule difficulté,
+discrimination, fréquence des options et KR-20 sur les tentatives terminées.
+Relançable : les résultats précédents sont remplacés.
+
+Usage: python run_item_analysis.py
+"""
+from app import create_app, db
+from app.models import ItemAnalysisRun, QuestionItemStat
+from app.services.item_analysis_service import ItemAnalysisService
+
+app = create_app('development')
+
+with app.app_context():
+    for model in (ItemAnalysisRun, QuestionItemStat):
+        model.__table__.create(db.engine, checkfirst=True)
+    print("✓ Tables d'analyse des items prêtes")
+    
+    result, error = ItemAnalysisService.run()
+    if error:
+        print(f"✗ {error}")
+    else:
+        print(f"✓ {result['attempts_count']} tentative(s), {result['items_count']} question(s)")
+        print(f"  Score moyen: {result['mean_total']} (écart-type {result['std_total']})")
+        print(f"  KR-20: {result['kr20']}")
+        for form_id, form in result['kr20_by_form'].items():
+            print(f"  Cahier {form_id}: KR-20 {form['kr20']} ({form['attempts']} tentatives)")
@@ -0,0 +1,56 @@
+"""
+Prépare l'autocomplétion des établissements
+
+Ajoute les colonnes schools.search_name / search_city si elles manquent et
+les calcule (forme sans accents ni casse). Sous PostgreSQL, active
+l'extension pg_trgm et crée les index GIN trigrammes ; sans l'extension
+(droits insuffisants), la recherche utilise l'index en mémoire des workers.
+Relançable sans risque.
+
+Usage: python setup_school_search.py
+"""
+from sqlalchemy import inspect, text
+from app import create_app, db
+from app.models import School
+from app.models.school import school_search_key
+
+BATCH_SIZE = 1000
+TRIGRAM_INDEXES = ('ix_schools_search_name_trgm', 'ix_schools_search_city_trgm')
+
+app = create_app('development')
+
+with app.app_context():
+    inspector = inspect(db.engine)
+    existing = {c['name'] for c in inspector.get_columns('schools')}
+    for column in ('search_name', 'search_city'):
+        if column not in existing:
+            column_type = School.__table__.columns[column].type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f"ALTER TABLE schools ADD COLUMN {column} {column_type}"))
+            print(f"✓ Colonne ajoutée: {column}")
+    db.session.commit()
+    
+    updates = [
+        {'id': school_id, 'search_name': school_search_key(name), 'search_city': school_search_key(city)}
+        for school_id, name, city in db.session.query(School.id, School.name, School.city)
+    ]
+    for start in range(0, len(updates), BATCH_SIZE):
+        db.session.execute(db.update(School), updates[start:start + BATCH_SIZE])
+        db.session.commit()
+    print(f"✓ {len(updates)} établissement(s) mis à jour")
+    
+    if db.engine.dialect.name != 'postgresql':
+        print("Base non PostgreSQL : recherche par index en mémoire")
+    else:
+        try:
+            db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            db.session.commit()
+            print("✓ Extension pg_trgm active")
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️  pg_trgm indisponible ({e}) : recherche par index en mémoire")
+        else:
+            indexes = {i['name'] for i in inspector.get_indexes('schools')}
+            for index in School.__table__.indexes:
+                if index.name in TRIGRAM_INDEXES and index.name not in indexes:
+                    index.create(db.engine)
+                    print(f"✓ Index ajouté: {index.name}")
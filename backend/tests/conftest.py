@@ -0,0 +1,78 @@
+"""
+Fixtures de test : application sur SQLite en mémoire, Redis simulé (fakeredis)
+"""
+import itertools
+import fakeredis
+import pytest
+from flask_jwt_extended import create_access_token
+import app as app_module
+from app import create_app, db
+from app.models import User, Candidate, Question, QCMSettings
+from app.services import attempt_state_service
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Application de test, base créée une fois pour la session"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        for difficulty, count in (('easy', 4), ('medium', 8), ('hard', 4)):
+            for i in range(count):
+                db.session.add(Question(
+                    text=f"{difficulty} {i}",
+                    option_a='a', option_b='b', option_c='c', option_d='d',
+                    correct_answer=i % 4,
+                    category='IA',
+                    difficulty=difficulty
+                ))
+        db.session.add(QCMSettings(
+            total_questions=10, duration_minutes=30,
+            easy_count=2, medium_count=5, hard_count=3
+        ))
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture(autouse=True)
+def session(app):
+    """Session propre à chaque test"""
+    yield db.session
+    db.session.rollback()
+    db.session.remove()
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """Serveur Redis simulé branché à la place du client partagé"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(app_module, '_redis_client', fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(attempt_state_service, '_unavailable_until', 0.0)
+    return server
+
+
+@pytest.fixture
+def candidate_user():
+    """Utilisateur candidat validé, retourne son ID"""
+    number = next(_user_numbers)
+    user = User(email=f"candidat{number}@test.bj", role='candidate', is_active=True, is_verified=True)
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(Candidate(user_id=user.id, first_name='Test', last_name=f"C{number}", status='validated'))
+    db.session.commit()
+    return user.id
+
+
+@pytest.fixture
+def admin_headers():
+    """En-têtes d'authentification d'un administrateur"""
+    number = next(_user_numbers)
+    user = User(email=f"admin{number}@test.bj", role='admin', is_active=True, is_verified=True)
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.commit()
+    token = create_access_token(identity=str(user.id), additional_claims={'email': user.email, 'role': user.role})
+    return {'Authorization': f"Bearer {token}"}
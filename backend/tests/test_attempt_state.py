@@ -0,0 +1,127 @@
+"""
+État chaud des tentatives QCM (Redis simulé) : sauvegarde, flush, soumission, repli sur la base
+"""
+from datetime import timedelta
+from unittest import mock
+import pytest
+from app import db
+from app.models import QCMAttempt, Question
+from app.services.attempt_state_service import AttemptStateService, AttemptStateStore
+from app.services.qcm_service import QCMService
+
+
+def _start(user_id):
+    result, error = QCMService.start_qcm(user_id)
+    assert error is None
+    return result
+
+
+def _correct_answers(attempt_id):
+    attempt = db.session.get(QCMAttempt, attempt_id)
+    questions = {q.id: q for q in Question.query.filter(Question.id.in_(attempt.get_question_ids_list()))}
+    return [questions[qid].correct_answer for qid in attempt.get_question_ids_list()]
+
+
+def _db_answers(attempt_id):
+    db.session.expire_all()
+    return db.session.get(QCMAttempt, attempt_id).get_answers_list()
+
+
+def test_save_answer_stays_in_redis_until_flush(app, redis_server, candidate_user):
+    attempt_id = _start(candidate_user)['attempt_id']
+    
+    result, error = QCMService.save_answer(candidate_user, attempt_id, 0, 2)
+    assert error is None and result['saved']
+    assert _db_answers(attempt_id)[0] == -1
+    
+    assert AttemptStateService.flush_dirty() == 1
+    assert _db_answers(attempt_id)[0] == 2
+
+
+def test_save_answer_rejects_invalid_indexes(app, redis_server, candidate_user):
+    attempt_id = _start(candidate_user)['attempt_id']
+    
+    for question_index, answer_index in ((0, 200), (0, -2), (10, 1), (0, 'x')):
+        result, error = QCMService.save_answer(candidate_user, attempt_id, question_index, answer_index)
+        assert result is None and error
+    
+    answers, _ = AttemptStateStore.get().get_answers(attempt_id, 10)
+    assert answers == [-1] * 10
+    
+    result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+    assert error is None and result['score'] == 0
+
+
+def test_submit_scores_hot_answers(app, redis_server, candidate_user):
+    attempt_id = _start(candidate_user)['attempt_id']
+    correct = _correct_answers(attempt_id)
+    changes = [
+        {'question_index': i, 'answer_index': answer, 'client_ts': 1000 + i}
+        for i, answer in enumerate(correct[:5])
+    ]
+    
+    result, error = QCMService.save_answers_batch(candidate_user, attempt_id, changes)
+    assert error is None and result['applied'] == 5
+    
+    result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+    assert error is None
+    assert result['correct_count'] == 5 and result['score'] == 50.0
+    assert AttemptStateStore.get().get_meta(attempt_id) is None
+
+
+def test_redis_failure_falls_back_to_db(app, redis_server, candidate_user):
+    attempt_id = _start(candidate_user)['attempt_id']
+    redis_server.connected = False
+    
+    result, error = QCMService.save_answer(candidate_user, attempt_id, 1, 3)
+    assert error is None and result['saved']
+    assert _db_answers(attempt_id)[1] == 3
+    
+    # Repli pendant le délai de grâce, sans retenter Redis
+    assert AttemptStateStore.get() is None
+    result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+    assert error is None and result['total_questions'] == 10
+
+
+def test_db_answers_written_during_outage_win_after_recovery(app, redis_server, candidate_user, monkeypatch):
+    from app.services import attempt_state_service
+    attempt_id = _start(candidate_user)['attempt_id']
+    change = {'question_index': 0, 'answer_index': 1, 'client_ts': 1000}
+    QCMService.save_answers_batch(candidate_user, attempt_id, [change, {**change, 'question_index': 1}])
+    
+    redis_server.connected = False
+    result, error = QCMService.save_answers_batch(candidate_user, attempt_id, [{**change, 'answer_index': 2, 'client_ts': 2000}])
+    assert error is None and result['applied'] == 1
+    
+    redis_server.connected = True
+    monkeypatch.setattr(attempt_state_service, '_unavailable_until', 0.0)
+    result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+    assert error is None
+    assert _db_answers(attempt_id)[:2] == [2, 1]
+
+
+def test_expired_attempt_keeps_hot_state_when_flush_commit_fails(app, redis_server, candidate_user):
+    attempt_id = _start(candidate_user)['attempt_id']
+    result, error = QCMService.save_answer(candidate_user, attempt_id, 0, 2)
+    assert error is None
+    
+    attempt = db.session.get(QCMAttempt, attempt_id)
+    attempt.started_at -= timedelta(minutes=attempt.time_limit_minutes + 1)
+    db.session.commit()
+    
+    def failing_commit():
+        raise RuntimeError("commit impossible")
+    
+    with mock.patch.object(db.session, 'commit', failing_commit):
+        with pytest.raises(RuntimeError):
+            AttemptStateService.flush_dirty()
+    
+    # Réponse toujours en Redis, tentative remise à recopier
+    answers, _ = AttemptStateStore.get().get_answers(attempt_id, 10)
+    assert answers[0] == 2
+    
+    assert AttemptStateService.flush_dirty() == 1
+    db.session.expire_all()
+    attempt = db.session.get(QCMAttempt, attempt_id)
+    assert attempt.status == 'expired' and attempt.get_answers_list()[0] == 2
+    assert AttemptStateStore.get().get_meta(attempt_id) is None
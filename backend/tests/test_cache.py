@@ -0,0 +1,43 @@
+"""
+Caches versionnés sans Redis : version partagée par la table cache_versions
+"""
+from app import db
+from app.models import CacheVersion, QCMSettings
+from app.utils.cache import VersionedCache, bump_version, get_version, _bump_db_version
+
+
+def test_versions_are_stored_in_db_without_redis(app):
+    before = get_version('test_ns')
+    assert bump_version('test_ns') == before + 1
+    assert db.session.get(CacheVersion, 'test_ns').version == before + 1
+
+
+def test_cache_reloads_after_bump_from_another_worker(app):
+    loads = []
+    cache = VersionedCache('test_reload', lambda: loads.append(1) or len(loads), check_interval=0)
+    assert cache.get() == 1
+    assert cache.get() == 1
+    
+    # Autre worker : seule la ligne cache_versions change
+    _bump_db_version('test_reload')
+    assert cache.get() == 2
+
+
+def test_settings_change_reaches_other_workers(app):
+    settings = QCMSettings.query.first()
+    duration = settings.duration_minutes
+    assert QCMSettings.get_cached().duration_minutes == duration
+    
+    # Modification commitée par un autre worker, qui incrémente la version partagée
+    settings.duration_minutes = duration + 15
+    db.session.commit()
+    _bump_db_version('qcm_settings')
+    
+    from app.models import qcm_settings
+    qcm_settings._settings_cache._checked_at = 0.0
+    try:
+        assert QCMSettings.get_cached().duration_minutes == duration + 15
+    finally:
+        settings.duration_minutes = duration
+        db.session.commit()
+        QCMSettings.invalidate_cache()
@@ -0,0 +1,47 @@
+"""
+Exports en arrière-plan : filtres et reprise des jobs interrompus
+"""
+import json
+from unittest import mock
+from app import db
+from app.models import ExportJob
+from app.services import export_job_service
+from app.services.export_job_service import ExportJobService, ExportKind
+
+
+def test_candidate_export_keeps_admin_list_filters(app):
+    with mock.patch.object(export_job_service, '_submit'):
+        job, error = ExportJobService.create('candidates', 'csv', {
+            'status': 'validated', 'score_min': '50', 'score_max': 'abc',
+            'has_score': 'yes', 'search': '', 'unknown': 'x'
+        }, None)
+    assert error is None
+    
+    filters = db.session.get(ExportJob, job['id']).get_filters()
+    assert filters == {'status': 'validated', 'score_min': 50.0, 'has_score': 'yes'}
+
+
+def test_recovery_spares_job_running_in_this_process(app):
+    job = ExportJob(kind='questions', format='csv', filters=json.dumps({}), status='pending')
+    db.session.add(job)
+    db.session.commit()
+    
+    def rows(filters):
+        # Aucune progression enregistrée sous SQLite : la reprise passe pendant l'export
+        for i in range(3):
+            if i == 1:
+                ExportJobService.recover()
+            yield [i]
+    
+    kind = ExportKind(['n'], lambda filters: 3, rows, 'Test', 'test', 10)
+    with mock.patch.dict(export_job_service.EXPORT_KINDS, {'questions': kind}), \
+            mock.patch.dict(app.config, {'EXPORT_JOB_STALE_SECONDS': 0}), \
+            mock.patch.object(export_job_service.FileService, 'save_export', return_value=('exports/test.csv', None)), \
+            mock.patch.object(export_job_service, '_submit'):
+        ExportJobService.process(job.id)
+    
+    db.session.expire_all()
+    job = db.session.get(ExportJob, job.id)
+    assert job.status == 'completed'
+    assert job.rows_done == 3
+    assert not export_job_service._running_jobs
@@ -0,0 +1,115 @@
+"""
+Analyse des items : p-value, point-bisériale corrigée et KR-20
+"""
+import math
+import pytest
+from app import db
+from app.models import Candidate, Question, QCMAttempt
+from app.services.item_analysis_service import ItemAnalysisService, _kr20
+
+# Réussite (1), erreur (0) ou absence de réponse (None) aux 4 questions
+MATRIX = [
+    [1, 1, 1, 1],
+    [1, 1, 1, 0],
+    [1, 1, 0, None],
+    [1, 0, 0, 0],
+    [0, 1, 0, None],
+    [0, 0, None, 0]
+]
+
+
+def _pearson(xs, ys):
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    cov = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sx = math.sqrt(sum((x - mx) ** 2 for x in xs))
+    sy = math.sqrt(sum((y - my) ** 2 for y in ys))
+    return cov / (sx * sy) if sx and sy else None
+
+
+def _reference():
+    """Indicateurs recalculés naïvement sur toutes les tentatives terminées"""
+    correct_answers = dict(db.session.query(Question.id, Question.correct_answer))
+    vectors = []
+    for attempt in QCMAttempt.query.filter(QCMAttempt.status == 'completed'):
+        answers = attempt.get_answers_list()
+        vectors.append({
+            qid: int(answers[i] == correct_answers[qid])
+            for i, qid in enumerate(attempt.get_question_ids_list())
+            if qid in correct_answers
+        })
+    
+    items = {}
+    for qid in {qid for vector in vectors for qid in vector}:
+        taken = [v for v in vectors if qid in v]
+        xs = [v[qid] for v in taken]
+        rests = [sum(v.values()) - v[qid] for v in taken]
+        items[qid] = (sum(xs) / len(xs), _pearson(xs, rests), len(xs))
+    
+    totals = [sum(v.values()) for v in vectors]
+    mean = sum(totals) / len(totals)
+    variance = sum((t - mean) ** 2 for t in totals) / len(totals)
+    k = sum(len(v) for v in vectors) / len(vectors)
+    sum_pq = sum(n * p * (1 - p) for p, _, n in items.values()) / len(vectors)
+    return items, k / (k - 1) * (1 - sum_pq / variance)
+
+
+@pytest.fixture
+def analysed_attempts(app, candidate_user):
+    candidate = Candidate.query.filter_by(user_id=candidate_user).one()
+    questions = Question.query.order_by(Question.id).limit(4).all()
+    for row in MATRIX:
+        answers = [
+            -1 if hit is None else q.correct_answer if hit else (q.correct_answer + 1) % 4
+            for q, hit in zip(questions, row)
+        ]
+        attempt = QCMAttempt(candidate_id=candidate.id, status='completed', total_questions=4)
+        attempt.set_question_ids([q.id for q in questions])
+        attempt.set_answers(answers)
+        db.session.add(attempt)
+    db.session.commit()
+    return [q.id for q in questions]
+
+
+def test_kr20_matches_classical_formula():
+    # MATRIX (absence = erreur) : p = (4, 4, 2, 1) / 6, somme p*q = 29/36,
+    # scores totaux (4, 3, 2, 1, 1, 0) de variance 65/36
+    assert _kr20(4, 29 / 36, 65 / 36) == pytest.approx(48 / 65)
+    assert _kr20(1, 29 / 36, 1.0) is None
+    assert _kr20(4, 29 / 36, 0.0) is None
+
+
+def test_run_matches_naive_computation(analysed_attempts):
+    summary, error = ItemAnalysisService.run()
+    assert error is None
+    
+    items, kr20 = _reference()
+    assert summary['kr20'] == pytest.approx(kr20, abs=1e-4)
+    
+    stats = ItemAnalysisService.get_item_stats(analysed_attempts)
+    assert set(stats) == set(analysed_attempts)
+    for qid in analysed_attempts:
+        p_value, point_biserial, responses = items[qid]
+        assert stats[qid]['responses'] == responses
+        assert stats[qid]['p_value'] == pytest.approx(p_value, abs=1e-4)
+        assert stats[qid]['point_biserial'] == pytest.approx(point_biserial, abs=1e-4)
+
+
+def test_run_counts_options_and_unanswered(analysed_attempts, candidate_user):
+    ItemAnalysisService.run()
+    
+    before = ItemAnalysisService.get_item_stats(analysed_attempts)
+    question = db.session.get(Question, analysed_attempts[3])
+    wrong = (question.correct_answer + 1) % 4
+    # Ajout d'une tentative : une réponse fausse et une absence de réponse de plus
+    candidate = Candidate.query.filter_by(user_id=candidate_user).one()
+    attempt = QCMAttempt(candidate_id=candidate.id, status='completed', total_questions=4)
+    attempt.set_question_ids(analysed_attempts)
+    attempt.set_answers([-1, -1, -1, wrong])
+    db.session.add(attempt)
+    db.session.commit()
+    ItemAnalysisService.run()
+    
+    after = ItemAnalysisService.get_item_stats(analysed_attempts)
+    assert after[question.id]['option_counts'][wrong] == before[question.id]['option_counts'][wrong] + 1
+    assert after[analysed_attempts[0]]['unanswered'] == before[analysed_attempts[0]]['unanswered'] + 1
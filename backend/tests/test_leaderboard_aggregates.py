@@ -0,0 +1,46 @@
+"""
+Classements par groupe : marquage à la soumission et suivi des changements de groupe
+"""
+from app import db
+from app.models import Candidate, LeaderboardAggregate
+from app.services.leaderboard_aggregate_service import LeaderboardAggregateService
+from app.services.qcm_service import QCMService
+
+
+def _submit(user_id, region):
+    candidate = Candidate.query.filter_by(user_id=user_id).first()
+    candidate.region = region
+    db.session.commit()
+    
+    result, error = QCMService.start_qcm(user_id)
+    assert error is None
+    result, error = QCMService.submit_qcm(user_id, result['attempt_id'])
+    assert error is None
+    return candidate
+
+
+def _region_counts():
+    return {row['region']: row['candidates_count'] for row in LeaderboardAggregateService.get_scope('region')}
+
+
+def test_submit_only_marks_groups_until_periodic_refresh(app, candidate_user):
+    _submit(candidate_user, 'Atacora')
+    aggregate = LeaderboardAggregate.query.filter_by(scope='region', group_key='Atacora').one()
+    assert aggregate.dirty_version > aggregate.refreshed_version
+    
+    LeaderboardAggregateService.refresh_stale()
+    assert _region_counts().get('Atacora') == 1
+
+
+def test_region_change_of_ranked_candidate_marks_both_groups(app, candidate_user):
+    candidate = _submit(candidate_user, 'Borgou')
+    LeaderboardAggregateService.refresh_stale()
+    before = _region_counts()
+    
+    candidate.region = 'Collines'
+    db.session.commit()
+    LeaderboardAggregateService.refresh_stale()
+    
+    after = _region_counts()
+    assert after.get('Borgou', 0) == before['Borgou'] - 1
+    assert after.get('Collines', 0) == before.get('Collines', 0) + 1
@@ -0,0 +1,69 @@
+"""
+Classement complet paginé : rangs repris depuis le curseur, une requête par page
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import User, Candidate
+from app.services.leaderboard_service import LeaderboardService, decode_cursor
+
+SCORES = [90, 80, 80, 80, 70, 60, 60]
+
+
+@pytest.fixture(scope='module')
+def ranked(app):
+    started = datetime(2026, 5, 1, 10, 0)
+    for i, score in enumerate(SCORES):
+        user = User(email=f"page{i}@test.bj", role='candidate', is_active=True, is_verified=True)
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Candidate(
+            user_id=user.id, first_name='Page', last_name=str(i), status='validated',
+            region='Pagination', qcm_score=score, qcm_completed_at=started + timedelta(minutes=i)
+        ))
+    db.session.commit()
+
+
+def _all_pages(limit):
+    entries, cursor = [], None
+    while True:
+        data, error = LeaderboardService.get_page(cursor, limit, 'Pagination')
+        assert error is None
+        entries.extend(data['entries'])
+        cursor = data['next_cursor']
+        if not cursor:
+            return entries, data['total']
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 50])
+def test_ranks_continue_across_pages(ranked, limit):
+    entries, total = _all_pages(limit)
+    assert [e['score'] for e in entries] == SCORES
+    assert [e['rank'] for e in entries] == [1, 2, 2, 2, 5, 6, 6]
+    assert [e['dense_rank'] for e in entries] == [1, 2, 2, 2, 3, 4, 4]
+    assert total == len(SCORES)
+
+
+def test_next_page_runs_a_single_query(ranked):
+    data, _ = LeaderboardService.get_page(None, 2, 'Pagination')
+    statements = []
+    
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        page, error = LeaderboardService.get_page(data['next_cursor'], 2, 'Pagination')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    
+    assert error is None
+    assert len(statements) == 1
+    assert [e['rank'] for e in page['entries']] == [2, 2]
+
+
+def test_invalid_cursor_is_rejected(ranked):
+    assert LeaderboardService.get_page('not-a-cursor', 2, 'Pagination') == (None, "Curseur invalide")
+    assert decode_cursor('not-a-cursor') is None
@@ -0,0 +1,99 @@
+"""
+Sauvegarde des réponses sans état chaud (écriture directe en base)
+"""
+import pytest
+from app import db
+from app.models import AttemptAnswer, QCMAttempt
+from app.services.attempt_answer_service import AttemptAnswerService
+from app.services.qcm_service import QCMService
+
+
+def _start(user_id):
+    result, error = QCMService.start_qcm(user_id)
+    assert error is None
+    return result['attempt_id']
+
+
+def test_save_answer_writes_packed_answers(app, candidate_user):
+    attempt_id = _start(candidate_user)
+    
+    result, error = QCMService.save_answer(candidate_user, attempt_id, 3, 1)
+    assert error is None and result['saved']
+    db.session.expire_all()
+    assert db.session.get(QCMAttempt, attempt_id).get_answers_list()[3] == 1
+
+
+def test_save_answer_rejects_out_of_range_answer(app, candidate_user):
+    attempt_id = _start(candidate_user)
+    
+    for question_index, answer_index in ((0, 200), (0, 4), (0, -2), (-1, 0), (10, 0)):
+        result, error = QCMService.save_answer(candidate_user, attempt_id, question_index, answer_index)
+        assert result is None and error
+    
+    result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+    assert error is None and result['correct_count'] == 0
+
+
+def test_answer_rows_reject_out_of_range_answer(app, candidate_user):
+    app.config['QCM_ANSWER_ROWS_ENABLED'] = True
+    try:
+        attempt_id = _start(candidate_user)
+        
+        result, error = QCMService.save_answer(candidate_user, attempt_id, 0, 200)
+        assert result is None and error
+        result, error = QCMService.save_answers_batch(
+            candidate_user, attempt_id, [{'question_index': 1, 'answer_index': 9, 'client_ts': 1}]
+        )
+        assert result is None and error
+        result, error = QCMService.save_answer(candidate_user, attempt_id, 2, 3)
+        assert error is None
+        
+        # Ligne hors bornes déjà en base : ignorée au scellement
+        attempt = db.session.get(QCMAttempt, attempt_id)
+        db.session.add(AttemptAnswer(
+            attempt_id=attempt_id, position=4, question_id=attempt.get_question_ids_list()[4],
+            answer=200, client_ts=0
+        ))
+        db.session.commit()
+        with pytest.raises(ValueError):
+            AttemptAnswerService.upsert(attempt, [(0, 200, None)])
+        
+        result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+        assert error is None
+        db.session.expire_all()
+        assert db.session.get(QCMAttempt, attempt_id).get_answers_list()[:5] == [-1, -1, 3, -1, -1]
+    finally:
+        app.config['QCM_ANSWER_ROWS_ENABLED'] = False
+
+
+def test_answer_rows_do_not_override_newer_column_answers(app, candidate_user):
+    app.config['QCM_ANSWER_ROWS_ENABLED'] = True
+    try:
+        attempt_id = _start(candidate_user)
+        result, error = QCMService.save_answers_batch(candidate_user, attempt_id, [
+            {'question_index': 0, 'answer_index': 1, 'client_ts': 1000},
+            {'question_index': 1, 'answer_index': 3, 'client_ts': 500},
+            {'question_index': 2, 'answer_index': 0, 'client_ts': 3000}
+        ])
+        assert error is None
+        
+        # Colonnes recopiées depuis l'état chaud : 0 et 1 plus récentes, 2 plus ancienne
+        attempt = db.session.get(QCMAttempt, attempt_id)
+        answers = attempt.get_answers_list()
+        stamps = attempt.get_answer_timestamps_list()
+        answers[:3] = [2, -1, 1]
+        stamps[:3] = [2000, 900, 100]
+        attempt.set_answers(answers)
+        attempt.set_answer_timestamps(stamps)
+        db.session.commit()
+        
+        result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+        assert error is None
+        db.session.expire_all()
+        assert db.session.get(QCMAttempt, attempt_id).get_answers_list()[:3] == [2, -1, 0]
+        rows = dict(db.session.query(AttemptAnswer.position, AttemptAnswer.answer).filter(
+            AttemptAnswer.attempt_id == attempt_id
+        ).all())
+        assert [rows[p] for p in range(3)] == [2, -1, 0]
+    finally:
+        app.config['QCM_ANSWER_ROWS_ENABLED'] = False
@@ -0,0 +1,69 @@
+"""
+Import de questions : validation, doublons (fichier et banque) et dry-run
+"""
+import io
+import json
+from werkzeug.datastructures import FileStorage
+from app.models import Question
+from app.services.question_import_service import QuestionImportService
+
+HEADER = 'text,option_a,option_b,option_c,option_d,correct_answer,category,difficulty\n'
+
+
+def _file(name, content):
+    return FileStorage(stream=io.BytesIO(content.encode('utf-8')), filename=name)
+
+
+def _csv(*lines):
+    return _file('questions.csv', HEADER + ''.join(f"{line}\n" for line in lines))
+
+
+def test_dry_run_reports_errors_and_duplicates_without_writing(app):
+    before = Question.query.count()
+    report, error = QuestionImportService.import_file(_csv(
+        'Import dry-run A ?,a,b,c,d,0,IA,easy',
+        '  import   DRY-RUN a ?,a,b,c,d,1,IA,easy',
+        'Import dry-run B ?,a,,c,d,7,IA,extreme',
+        ',,,,,,,',
+        'Import dry-run C ?,a,b,c,d,2,,'
+    ), None, dry_run=True)
+    
+    assert error is None
+    assert report['dry_run'] and report['imported'] == 0
+    assert report['total_in_file'] == 4
+    assert report['valid'] == 2
+    assert report['duplicates'] == [{'row': 3, 'duplicate_of_row': 2}]
+    assert [e['row'] for e in report['errors']] == [4]
+    assert len(report['errors'][0]['errors']) == 3
+    assert Question.query.count() == before
+
+
+def test_import_writes_rows_then_flags_bank_duplicates(app):
+    lines = [
+        {'text': 'Import JSON A ?', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+         'correct_answer': 2, 'category': 'IA', 'difficulty': 'hard'},
+        {'text': 'Import JSON B ?', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+         'correct_answer': '1'}
+    ]
+    content = '\n'.join(json.dumps(line) for line in lines)
+    
+    report, error = QuestionImportService.import_file(_file('questions.jsonl', content), None)
+    assert error is None and report['imported'] == 2
+    imported = {q.text: q for q in Question.query.filter(Question.text.like('Import JSON%'))}
+    assert imported['Import JSON B ?'].category == 'Logique'
+    assert imported['Import JSON B ?'].difficulty == 'medium'
+    
+    report, error = QuestionImportService.import_file(_file('questions.jsonl', content), None)
+    assert error is None and report['imported'] == 0
+    assert report['duplicates'] == [
+        {'row': 1, 'question_id': imported['Import JSON A ?'].id},
+        {'row': 2, 'question_id': imported['Import JSON B ?'].id}
+    ]
+
+
+def test_import_rejects_unknown_format_and_missing_columns(app):
+    report, error = QuestionImportService.import_file(_file('questions.txt', ''), None)
+    assert report is None and 'Format non supporté' in error
+    
+    report, error = QuestionImportService.import_file(_file('questions.csv', 'text,option_a\nQ,a\n'), None)
+    assert report is None and 'Colonnes manquantes' in error
@@ -0,0 +1,53 @@
+"""
+Import d'établissements : doublons du fichier, de la base et imports concurrents
+"""
+from unittest import mock
+from app import db
+from app.models import School
+from app.services import school_service
+from app.services.school_service import SchoolService
+from app.utils.orm import insert_for
+
+
+def test_import_skips_file_and_database_duplicates(app):
+    db.session.add(School(name='Lycée Import Existant', city='Parakou', region='Import'))
+    db.session.commit()
+    existing = School.query.filter_by(name='Lycée Import Existant').one()
+    
+    result = SchoolService.import_from_list([
+        {'name': 'CEG Import Un', 'city': 'Parakou', 'region': 'Import'},
+        {'name': '  ceg IMPORT   un ', 'city': 'PARAKOU', 'region': 'Import'},
+        {'name': 'CEG Import Un', 'city': 'Djougou', 'region': 'Import'},
+        {'name': 'lycée import existant', 'city': 'parakou'},
+        {'name': '', 'city': 'Parakou'},
+        {'name': 'x' * 201},
+        'pas un dict'
+    ])
+    
+    assert result['total'] == 7
+    assert result['imported'] == 2
+    assert result['duplicates'] == [
+        {'row': 2, 'duplicate_of_row': 1, 'name': 'ceg IMPORT   un'},
+        {'row': 4, 'school_id': existing.id, 'name': 'lycée import existant'}
+    ]
+    assert [e['row'] for e in result['errors']] == [5, 6, 7]
+    assert School.query.filter_by(name='CEG Import Un').count() == 2
+
+
+def test_import_ignores_rows_inserted_by_a_concurrent_import(app):
+    def concurrent_insert(model):
+        # Un autre import insère le même établissement entre la recherche et l'insertion
+        db.session.execute(insert_for(School).values(
+            name='CEG Concurrent', name_key='ceg concurrent', city='Kandi', city_key='kandi',
+            region='Import', is_active=True
+        ))
+        return insert_for(model)
+    
+    with mock.patch.object(school_service, 'insert_for', side_effect=concurrent_insert):
+        result = SchoolService.import_from_list([
+            {'name': 'CEG Concurrent', 'city': 'Kandi', 'region': 'Import'},
+            {'name': 'CEG Sans Conflit', 'city': 'Kandi', 'region': 'Import'}
+        ])
+    
+    assert result['imported'] == 1
+    assert School.query.filter_by(name_key='ceg concurrent', city_key='kandi').count() == 1
@@ -0,0 +1,63 @@
+"""
+Recherche d'établissements : classement de l'index en mémoire et de la requête pg_trgm
+"""
+import pytest
+from sqlalchemy.dialects import postgresql
+from app import db
+from app.models import School
+from app.services.school_search_service import SchoolSearchService, word_trigrams
+
+REGION = 'Recherche'
+
+
+@pytest.fixture(scope='module')
+def schools(app):
+    """Établissements d'une région réservée à ces tests"""
+    for name, city in (
+        ('CEG 1', 'Cotonou'),
+        ('CEG Kotonu', 'Parakou'),
+        ('Natitingou Lycée', 'Natitingou'),
+        ('CEG Natitingou', 'Djougou'),
+        ('Lycée Bonatitingou', 'Kandi'),
+        ('CEG 2', 'Natitingou')
+    ):
+        db.session.add(School(name=name, city=city, region=REGION, is_active=True))
+    db.session.commit()
+    SchoolSearchService.invalidate()
+
+
+def _names(query):
+    return [school['name'] for school in SchoolSearchService.search(query, region=REGION)]
+
+
+def test_word_trigrams_match_pg_trgm():
+    # show_trgm('cat') = {"  c"," ca","at ","cat"}
+    assert word_trigrams('cat') == {'  c', ' ca', 'cat', 'at '}
+
+
+def test_memory_index_ranks_prefix_word_substring_then_city(schools):
+    assert _names('natitingou') == ['Natitingou Lycée', 'CEG Natitingou', 'Lycée Bonatitingou', 'CEG 2']
+
+
+def test_memory_index_fuzzy_matches_name_only(schools):
+    # Faute de frappe : le nom proche l'emporte, la ville seule ne compte pas
+    assert _names('kotonou') == ['CEG Kotonu']
+
+
+def test_trigram_query_uses_the_same_tiers():
+    sql = str(SchoolSearchService._trigram_query('natit', None).statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+    ))
+    order_by = sql[sql.index('ORDER BY'):]
+    tiers = [
+        "(schools.search_name LIKE 'natit%%') THEN 0",
+        "(schools.search_name LIKE '%% natit%%') THEN 1",
+        "(schools.search_name LIKE '%%natit%%') THEN 2",
+        "(schools.search_city LIKE '%%natit%%') THEN 3",
+        "ELSE 4"
+    ]
+    positions = [order_by.index(tier) for tier in tiers]
+    assert positions == sorted(positions)
+    assert order_by.index('ELSE 4') < order_by.index('similarity(schools.search_name')
+    # Approché : sur le nom seul, comme l'index en mémoire
+    assert "(schools.search_name %% 'natit')" in sql and "(schools.search_city %%" not in sql
@@ -0,0 +1,51 @@
+"""
+Histogramme des scores : lecture des bornes et répartition dans les tranches
+"""
+import pytest
+from app import db
+from app.models import Candidate, QCMAttempt
+from app.services.stats_service import StatsService, parse_bin_edges, HISTOGRAM_DEFAULT_BINS
+
+REGION = 'Histogramme'
+
+
+@pytest.mark.parametrize('bins, edges', [
+    ('4', [0, 25, 50, 75, 100]),
+    ('0,50,80,100', [0, 50, 80, 100]),
+    (' 2 ', [0, 50, 100]),
+    (None, [100 * i / HISTOGRAM_DEFAULT_BINS for i in range(HISTOGRAM_DEFAULT_BINS + 1)])
+])
+def test_parse_bin_edges(bins, edges):
+    assert parse_bin_edges(bins) == (edges, None)
+
+
+@pytest.mark.parametrize('bins', ['nan', 'inf', '-inf', '0,nan,100', '0,50,inf', 'abc', '1.5', '0', '1000', '0,50,50', '50,0'])
+def test_parse_bin_edges_rejects_invalid_values(bins):
+    edges, error = parse_bin_edges(bins)
+    assert edges is None and error
+
+
+def test_histogram_assigns_edges_to_the_upper_bin_and_closes_the_last(app, candidate_user):
+    candidate = Candidate.query.filter_by(user_id=candidate_user).first()
+    candidate.region = REGION
+    for score in (0, 24.9, 25, 50, 99.9, 100):
+        db.session.add(QCMAttempt(candidate_id=candidate.id, score=score, status='completed'))
+    db.session.add(QCMAttempt(candidate_id=candidate.id, score=80, status='expired'))
+    db.session.commit()
+    
+    result, error = StatsService.get_score_histogram('4', region=REGION)
+    assert error is None
+    assert [b['count'] for b in result['bins']] == [2, 1, 1, 2]
+    assert result['total'] == 6
+    assert result['quantiles']['median'] == 37.5
+    
+    result, _ = StatsService.get_score_histogram('0,50,100', region=REGION)
+    assert [b['count'] for b in result['bins']] == [3, 3]
+    assert [b['range'] for b in result['bins']] == ['0-50%', '50-100%']
+
+
+def test_histogram_endpoint_returns_400_for_non_finite_bins(app, admin_headers):
+    client = app.test_client()
+    for bins in ('nan', 'inf', '0,nan,100'):
+        response = client.get(f'/api/v1/stats/qcm/histogram?bins={bins}', headers=admin_headers)
+        assert response.status_code == 400
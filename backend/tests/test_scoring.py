@@ -0,0 +1,77 @@
+"""
+Correction sur tableaux compacts et recorrection en masse
+"""
+from app import db
+from app.models import Candidate, Question, QCMAttempt
+from app.services.question_bank_service import QuestionBankService
+from app.services.qcm_service import QCMService
+from app.services.scoring_service import AnswerKey, MISSING_ANSWER, ScoringService, score_answers
+
+ENTRIES = {1: (0, 'IA'), 2: (3, 'Logique'), 3: (1, 'IA')}
+
+
+def test_answer_key_marks_deleted_questions():
+    key = AnswerKey.build([1, 2, 99, 3], ENTRIES)
+    
+    assert len(key) == 4
+    assert list(key.correct_answers) == [0, 3, MISSING_ANSWER, 1]
+    assert key.categories == ('IA', 'Logique')
+    assert key.present_ids() == [1, 2, 3]
+
+
+def test_score_answers_counts_correct_answers_by_category():
+    key = AnswerKey.build([1, 2, 99, 3], ENTRIES)
+    
+    result = score_answers(key, [0, 2, 0, 1])
+    assert result.correct == bytes([1, 0, 0, 1])
+    assert result.correct_count == 2
+    assert result.score == 50.0
+    assert result.category_stats == {
+        'IA': {'total': 2, 'correct': 2},
+        'Logique': {'total': 1, 'correct': 0}
+    }
+
+
+def test_score_answers_pads_and_truncates_answers():
+    key = AnswerKey.build([1, 2, 3], ENTRIES)
+    
+    assert list(score_answers(key, [0]).answers) == [0, -1, -1]
+    assert score_answers(key, [0, 3, 1, 2, 2]).correct_count == 3
+    assert score_answers(AnswerKey.build([], ENTRIES), []).score == 0
+
+
+def test_rescore_question_updates_attempt_and_candidate(app, candidate_user):
+    result, error = QCMService.start_qcm(candidate_user)
+    assert error is None
+    attempt_id = result['attempt_id']
+    question_ids = db.session.get(QCMAttempt, attempt_id).get_question_ids_list()
+    correct = dict(db.session.query(Question.id, Question.correct_answer).filter(
+        Question.id.in_(question_ids)
+    ).all())
+    for index, question_id in enumerate(question_ids):
+        _, error = QCMService.save_answer(candidate_user, attempt_id, index, correct[question_id])
+        assert error is None
+    result, error = QCMService.submit_qcm(candidate_user, attempt_id)
+    assert error is None and result['score'] == 100
+    
+    question = db.session.get(Question, question_ids[0])
+    original = question.correct_answer
+    try:
+        question.correct_answer = (original + 1) % 4
+        db.session.commit()
+        QuestionBankService.invalidate()
+        
+        assert ScoringService.rescore_question(question.id) >= 1
+        db.session.expire_all()
+        attempt = db.session.get(QCMAttempt, attempt_id)
+        assert attempt.score == 90.0 and attempt.correct_count == 9
+        assert Candidate.query.filter_by(user_id=candidate_user).one().qcm_score == 90.0
+        
+        # Rien à changer au second passage
+        assert ScoringService.rescore_question(question.id) == 0
+    finally:
+        question = db.session.get(Question, question_ids[0])
+        question.correct_answer = original
+        db.session.commit()
+        QuestionBankService.invalidate()
+        ScoringService.rescore_question(question.id)
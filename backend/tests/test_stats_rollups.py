@@ -0,0 +1,52 @@
+"""
+Compteurs statistiques : lecture sans écriture, deltas en attente et base non construite
+"""
+from app import db
+from app.models import CacheVersion, Candidate, StatsRollupDelta
+from app.services import stats_rollup_service
+from app.services.stats_rollup_service import BUILT_MARKER, StatsRollupService
+from app.services.stats_service import _compute_counters
+
+
+def _expected():
+    by_status = dict(db.session.query(Candidate.status, db.func.count()).group_by(Candidate.status).all())
+    return Candidate.query.count(), by_status
+
+
+def _counted():
+    counters = _compute_counters(50)['candidates']
+    return counters['total'], {status: n for status, n in counters['by_status'].items() if n}
+
+
+def test_counters_read_candidates_until_built(app, candidate_user, monkeypatch):
+    marker = db.session.get(CacheVersion, BUILT_MARKER)
+    if marker:
+        db.session.delete(marker)
+        db.session.commit()
+    monkeypatch.setattr(stats_rollup_service, '_built', False)
+    
+    candidate = Candidate.query.filter_by(user_id=candidate_user).first()
+    candidate.status = 'rejected'
+    db.session.commit()
+    
+    assert _counted() == _expected()
+    assert db.session.get(CacheVersion, BUILT_MARKER) is None
+    
+    StatsRollupService.rebuild()
+    assert db.session.get(CacheVersion, BUILT_MARKER) is not None
+    assert _counted() == _expected()
+
+
+def test_pending_deltas_are_counted_without_folding(app, candidate_user):
+    StatsRollupService.rebuild()
+    candidate = Candidate.query.filter_by(user_id=candidate_user).first()
+    candidate.status = 'submitted'
+    db.session.commit()
+    pending = StatsRollupDelta.query.count()
+    assert pending > 0
+    
+    assert _counted() == _expected()
+    assert StatsRollupDelta.query.count() == pending
+    
+    assert StatsRollupService.fold_deltas() == pending
+    assert _counted() == _expected()
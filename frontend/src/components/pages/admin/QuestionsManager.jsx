@@ -440,7 +440,7 @@ export default function QuestionsManager() {
   const handleImport = () => {
     const input = document.createElement('input')
     input.type = 'file'
-    input.accept = '.json,.xlsx,.xls'
+    input.accept = '.json,.jsonl,.csv,.xlsx,.xls'
     
     input.onchange = async (e) => {
       const file = e.target.files?.[0]
@@ -448,8 +448,8 @@ export default function QuestionsManager() {
       
       const filename = file.name.toLowerCase()
       
-      // Si c'est un fichier Excel, utiliser l'endpoint d'upload backend
-      if (filename.endsWith('.xlsx') || filename.endsWith('.xls')) {
+      // Excel, CSV ou JSON lines : import groupé côté backend
+      if (['.xlsx', '.xls', '.csv', '.jsonl'].some(ext => filename.endsWith(ext))) {
         try {
           const formData = new FormData()
           formData.append('file', file)
@@ -457,13 +457,13 @@ export default function QuestionsManager() {
             headers: { 'Content-Type': 'multipart/form-data' }
           })
           if (res.data.success) {
-            toast.success(`${res.data.imported || 0} question(s) importée(s)`)
+            toast.success(res.data.message || `${res.data.data?.imported || 0} question(s) importée(s)`)
             fetchQuestions()
           } else {
             toast.error(res.data.error || "Erreur lors de l'import")
           }
         } catch (err) {
-          toast.error(err.response?.data?.error || "Erreur lors de l'import Excel")
+          toast.error(err.response?.data?.error || "Erreur lors de l'import")
         }
         return
       }
@@ -10,6 +10,7 @@ import toast from 'react-hot-toast'
 import api from '../../../services/api'
 
 const TOTAL_TIME = 30 * 60 // 30 minutes en secondes (fallback)
+const ANSWER_FLUSH_INTERVAL = 3000 // Envoi groupé des réponses toutes les 3 secondes
 
 export default function QCMPage() {
   const { user, updateUser } = useAuth()
@@ -29,6 +30,15 @@ export default function QCMPage() {
   const [tabSwitchCount, setTabSwitchCount] = useState(0)
   const [fullscreenExits, setFullscreenExits] = useState(0)
   const isSubmittingRef = useRef(false)
+  
+  // Réponses en attente d'envoi (une entrée par question, la plus récente gagne)
+  const pendingAnswersRef = useRef(new Map())
+  const flushInFlightRef = useRef(null)
+  const attemptIdRef = useRef(null)
+  
+  useEffect(() => {
+    attemptIdRef.current = attemptId
+  }, [attemptId])
 
   // Charger le statut du QCM au démarrage
   useEffect(() => {
@@ -242,22 +252,67 @@ export default function QCMPage() {
     return `${m.toString().padStart(2, '0')}:${s.toString().padStart(2, '0')}`
   }
 
-  const handleAnswer = async (questionId, answer) => {
-    setAnswers(prev => ({ ...prev, [questionId]: answer }))
+  // Envoie les réponses en attente en un seul appel (un lot à la fois)
+  const flushAnswers = useCallback(async () => {
+    // Attendre le lot en cours : la soumission ne doit pas le devancer
+    while (flushInFlightRef.current) {
+      await flushInFlightRef.current
+    }
+    
+    const pending = pendingAnswersRef.current
+    if (!attemptIdRef.current || pending.size === 0) return
     
-    // Sauvegarder la réponse en temps réel
-    if (attemptId) {
+    const changes = Array.from(pending.values())
+    pendingAnswersRef.current = new Map()
+    
+    const request = (async () => {
       try {
-        const answerIndex = ['A', 'B', 'C', 'D'].indexOf(answer)
-        await api.post('/qcm/answer', {
-          attempt_id: attemptId,
-          question_index: currentQuestion,
-          answer_index: answerIndex
+        await api.post('/qcm/answers/batch', {
+          attempt_id: attemptIdRef.current,
+          changes
         })
       } catch (error) {
-        console.error('Erreur sauvegarde réponse:', error)
+        console.error('Erreur sauvegarde réponses:', error)
+        // Remettre en file les changements non remplacés par une saisie plus récente
+        changes.forEach(change => {
+          const current = pendingAnswersRef.current.get(change.question_index)
+          if (!current || current.client_ts < change.client_ts) {
+            pendingAnswersRef.current.set(change.question_index, change)
+          }
+        })
+      }
+    })()
+    
+    flushInFlightRef.current = request
+    try {
+      await request
+    } finally {
+      if (flushInFlightRef.current === request) {
+        flushInFlightRef.current = null
       }
     }
+  }, [])
+  
+  // Envoi périodique pendant le test
+  useEffect(() => {
+    if (step !== 'quiz') return
+    
+    const interval = setInterval(flushAnswers, ANSWER_FLUSH_INTERVAL)
+    return () => {
+      clearInterval(interval)
+      flushAnswers()
+    }
+  }, [step, flushAnswers])
+  
+  const handleAnswer = (questionId, answer) => {
+    setAnswers(prev => ({ ...prev, [questionId]: answer }))
+    
+    // Mettre la réponse en file, envoyée avec le prochain lot
+    pendingAnswersRef.current.set(currentQuestion, {
+      question_index: currentQuestion,
+      answer_index: ['A', 'B', 'C', 'D'].indexOf(answer),
+      client_ts: Date.now()
+    })
   }
 
   const startQCM = async () => {
@@ -304,6 +359,9 @@ export default function QCMPage() {
     }
     
     try {
+      // Attendre le lot en cours puis envoyer les dernières réponses
+      await flushAnswers()
+      
       const response = await api.post('/qcm/submit', { attempt_id: attemptId })
       
       if (response.data.success) {
@@ -329,7 +387,7 @@ export default function QCMPage() {
       toast.error(error.response?.data?.error || 'Erreur lors de la soumission du QCM')
       isSubmittingRef.current = false
     }
-  }, [answers, user, updateUser, attemptId, questions])
+  }, [answers, user, updateUser, attemptId, questions, flushAnswers])
 
   const question = questions[currentQuestion]
 